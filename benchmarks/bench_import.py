@@ -0,0 +1,67 @@
+"""
+Import-time benchmark for cc_sdk.
+
+Each scenario runs in a fresh interpreter so nothing is cached between runs.
+The reported time covers the interpreter start up as well; the `baseline`
+scenario measures that on its own so the SDK's share can be read off.
+
+Usage:
+    python benchmarks/bench_import.py --repeat 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+SCENARIOS = [
+    ("baseline", "pass"),
+    ("import cc_sdk", "import cc_sdk"),
+    ("Payload, Status", "from cc_sdk import Payload, Status"),
+    ("PluginManager", "from cc_sdk import PluginManager"),
+    ("S3 client", "from cc_sdk import CCStoreS3, AWSConfig; CCStoreS3.create_s3_client(AWSConfig(aws_region='us-east-1'))"),
+]
+
+BOTO3_CHECK = "; import sys; print('boto3' in sys.modules)"
+
+
+def run_scenario(code: str) -> tuple[float, bool]:
+    """Returns the wall time of a fresh interpreter running `code` and whether it loaded boto3."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_PATH, env.get("PYTHONPATH")]))
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code + BOTO3_CHECK],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, result.stdout.strip() == "True"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--repeat", type=int, default=10, help="number of timed repetitions"
+    )
+    args = parser.parse_args()
+    print(f"{'scenario':<18}{'min ms':>10}{'median ms':>12}{'boto3':>8}")
+    for name, code in SCENARIOS:
+        timings = []
+        loaded_boto3 = False
+        for _ in range(args.repeat):
+            elapsed, loaded_boto3 = run_scenario(code)
+            timings.append(elapsed)
+        print(
+            f"{name:<18}{min(timings) * 1e3:>10.1f}{statistics.median(timings) * 1e3:>12.1f}"
+            f"{str(loaded_boto3):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Lookup benchmark for PluginManager data sources and data stores.
+
+Times get_input_data_source, get_output_data_source and get_store for the
+last entry of payloads with a growing number of sources and stores, to show
+how the cost of a lookup scales with the payload.
+
+Usage:
+    python benchmarks/bench_lookup.py --sizes 10 100 1000 10000
+"""
+import argparse
+import os
+import timeit
+
+from synthetic import EVENT_ENV_VAR, make_payload
+
+from cc_sdk import PluginManager, environment_variables
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 10000],
+        help="numbers of sources and stores to run",
+    )
+    parser.add_argument(
+        "--number", type=int, default=10000, help="lookups per timed run"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="number of timed repetitions"
+    )
+    args = parser.parse_args()
+    os.environ.setdefault(EVENT_ENV_VAR, "1")
+    os.environ.setdefault(environment_variables.CC_PLUGIN_DEFINITION, "benchmark")
+
+    print(f"{'size':>8}{'input ns':>12}{'output ns':>12}{'store ns':>12}")
+    for size in args.sizes:
+        payload = make_payload(stores=size, sources=size, paths=1, attributes=0)
+        os.environ[environment_variables.CC_PAYLOAD_FORMATTED] = payload.serialize()
+        # pylint: disable=protected-access
+        PluginManager._instance = None
+        plugin_manager = PluginManager()
+        plugin_manager.get_payload()
+        # the last entries are the worst case for a scan
+        last = size - 1
+        lookups = [
+            lambda: plugin_manager.get_input_data_source(f"INPUT_{last}"),
+            lambda: plugin_manager.get_output_data_source(f"output_{last}"),
+            lambda: plugin_manager.get_store(f"store_{last}"),
+        ]
+        timings = [
+            min(timeit.repeat(lookup, number=args.number, repeat=args.repeat))
+            / args.number
+            for lookup in lookups
+        ]
+        print(f"{size:>8}" + "".join(f"{timing * 1e9:>12.0f}" for timing in timings))
+
+
+if __name__ == "__main__":
+    main()
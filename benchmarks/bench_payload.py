@@ -0,0 +1,129 @@
+"""
+Micro-benchmarks for Payload decoding and the PluginManager payload helpers.
+
+Times parsing, validation, path substitution, data source/store lookup and
+serialization of a synthetic payload and reports the allocations made by
+each operation.
+
+Usage:
+    python benchmarks/bench_payload.py --sources 8 --paths 10000 --attributes 1000
+"""
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Callable
+
+import attr
+from synthetic import EVENT_ENV_VAR, add_arguments, make_payload
+
+from cc_sdk import Payload, PluginManager, environment_variables
+
+
+def time_operation(
+    operation: Callable[[], object], setup: Callable[[], None], repeat: int
+) -> list[float]:
+    """Returns the wall time in seconds of each of `repeat` runs of `operation`."""
+    timings = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def trace_operation(
+    operation: Callable[[], object], setup: Callable[[], None]
+) -> tuple[int, int]:
+    """Returns the peak and retained bytes allocated by one run of `operation`."""
+    setup()
+    tracemalloc.start()
+    try:
+        result = operation()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak, retained
+
+
+def install_payload(payload_json: str) -> None:
+    """Starts a fresh PluginManager on `payload_json` without going through S3."""
+    os.environ[environment_variables.CC_PAYLOAD_FORMATTED] = payload_json
+    # pylint: disable=protected-access
+    PluginManager._instance = None
+    PluginManager()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_arguments(parser)
+    parser.add_argument(
+        "--lookups", type=int, default=10000, help="number of lookups per lookup run"
+    )
+    args = parser.parse_args()
+    os.environ.setdefault(EVENT_ENV_VAR, "1")
+    os.environ.setdefault(environment_variables.CC_PLUGIN_DEFINITION, "benchmark")
+
+    payload = make_payload(args.stores, args.sources, args.paths, args.attributes)
+    payload_json = payload.serialize()
+    names = [source.name for source in payload.inputs]
+    store_names = [store.name for store in payload.stores]
+
+    def validate():
+        attr.validate(payload)
+        for source in payload.inputs + payload.outputs:
+            attr.validate(source)
+        for store in payload.stores:
+            attr.validate(store)
+
+    def substitute():
+        # pylint: disable=protected-access
+        PluginManager._substitute_path_variables()
+
+    def lookup():
+        # pylint: disable=protected-access
+        inputs = PluginManager.get_input_data_sources()
+        for i in range(args.lookups):
+            PluginManager._find_data_source(names[i % len(names)], inputs)
+            PluginManager._find_data_store(store_names[i % len(store_names)])
+
+    def fresh_payload():
+        install_payload(payload_json)
+
+    def nothing():
+        pass
+
+    operations = [
+        ("parse", lambda: Payload.from_json(payload_json), nothing),
+        ("parse trust", lambda: Payload.from_json(payload_json, validate=False), nothing),
+        ("parse compact", lambda: Payload.from_json(payload_json, compact=True), nothing),
+        ("validate", validate, nothing),
+        ("substitute", substitute, fresh_payload),
+        ("lookup", lookup, lambda: install_payload(payload_json)),
+        ("serialize", payload.serialize, nothing),
+    ]
+
+    total_paths = 2 * args.sources * args.paths
+    print(
+        f"payload: {args.stores} stores, {2 * args.sources} sources, "
+        f"{total_paths} paths, {args.attributes} attributes, "
+        f"{len(payload_json) / 1024:.0f} KiB of JSON"
+    )
+    print(
+        f"{'operation':<14}{'min ms':>12}{'median ms':>12}{'peak KiB':>12}{'retained KiB':>14}"
+    )
+    for name, operation, setup in operations:
+        timings = time_operation(operation, setup, args.repeat)
+        peak, retained = trace_operation(operation, setup)
+        print(
+            f"{name:<14}{min(timings) * 1e3:>12.2f}{statistics.median(timings) * 1e3:>12.2f}"
+            f"{peak / 1024:>12.0f}{retained / 1024:>14.0f}"
+        )
+    print(f"(lookup runs {args.lookups} data source and data store lookups)")
+
+
+if __name__ == "__main__":
+    main()
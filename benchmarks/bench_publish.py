@@ -0,0 +1,98 @@
+"""
+Manifest publishing benchmark for CCStoreS3.
+
+Publishes the payloads of a range of events with a serial set_payload loop
+and with set_payloads, against a stand-in S3 client that sleeps for a fixed
+latency per PUT, so the numbers reflect serialization and concurrency rather
+than the network.
+
+Usage:
+    python benchmarks/bench_publish.py --events 2000 --latency-ms 20 --paths 100
+"""
+import argparse
+import time
+
+from synthetic import add_arguments, make_payload
+
+from cc_sdk import CCStoreS3
+
+
+class LatencyClient:
+    """Accepts put_object calls after sleeping for `latency` seconds."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.bytes_written = 0
+
+    def put_object(self, Bucket, Key, Body):  # pylint: disable=invalid-name,unused-argument
+        time.sleep(self.latency)
+        self.bytes_written += len(Body)
+
+
+def make_store(latency: float) -> CCStoreS3:
+    """Builds a CCStoreS3 on a LatencyClient without reading the environment."""
+    store = CCStoreS3.__new__(CCStoreS3)
+    store.root = "benchmark"
+    store.bucket = "benchmark"
+    store.manifest_id = ""
+    store.aws_s3 = LatencyClient(latency)
+    return store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_arguments(parser)
+    parser.add_argument("--events", type=int, default=2000, help="number of events to publish")
+    parser.add_argument("--latency-ms", type=float, default=20, help="simulated latency of a PUT")
+    parser.add_argument("--workers", type=int, default=32, help="set_payloads max_workers")
+    args = parser.parse_args()
+
+    payload = make_payload(args.stores, args.sources, args.paths, args.attributes)
+    latency = args.latency_ms / 1e3
+
+    def serial():
+        # what orchestration code did before set_payloads
+        store = make_store(latency)
+        for event in range(args.events):
+            store.manifest_id = str(event)
+            event_payload = payload.__class__(
+                attributes=payload.attributes | {"seed": event},
+                stores=payload.stores,
+                inputs=payload.inputs,
+                outputs=payload.outputs,
+            )
+            store.set_payload(event_payload)
+
+    def batch():
+        store = make_store(latency)
+        failures = store.set_payloads(
+            payload, range(args.events), lambda event: {"seed": event}, max_workers=args.workers
+        )
+        assert not failures
+
+    def batch_expand():
+        store = make_store(latency)
+        failures = store.set_payloads(
+            payload,
+            range(args.events),
+            lambda event: {"seed": event},
+            expand_paths=True,
+            max_workers=args.workers,
+        )
+        assert not failures
+
+    print(f"{args.events} events, {args.latency_ms:g} ms per PUT, {args.workers} workers")
+    print(f"{'method':<22}{'seconds':>10}{'events/s':>12}")
+    for name, operation in [
+        ("set_payload loop", serial),
+        ("set_payloads", batch),
+        ("set_payloads expand", batch_expand),
+    ]:
+        start = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<22}{elapsed:>10.2f}{args.events / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
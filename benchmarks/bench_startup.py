@@ -0,0 +1,92 @@
+"""
+Start up benchmark for PluginManager against a mocked S3 bucket.
+
+Times PluginManager construction, with lazy and with eager store sessions
+and with the payload handed over through CC_PAYLOAD_FORMATTED, for payloads
+with a growing number of data stores. Requires moto, so the S3 round trip
+saved by the inline payload is an in-process one here.
+
+Usage:
+    python benchmarks/bench_startup.py --stores 1 8 64 --profiles 2
+"""
+import argparse
+import os
+import statistics
+import time
+
+from moto import mock_s3
+from synthetic import EVENT_ENV_VAR, make_payload
+
+from cc_sdk import CCStoreS3, PluginManager, environment_variables
+
+BUCKET = "benchmark-bucket"
+
+
+def set_profile_env(profile: str) -> None:
+    os.environ[profile + "_" + environment_variables.AWS_ACCESS_KEY_ID] = "key"
+    os.environ[profile + "_" + environment_variables.AWS_SECRET_ACCESS_KEY] = "secret"
+    os.environ[profile + "_" + environment_variables.AWS_DEFAULT_REGION] = "us-east-1"
+    os.environ[profile + "_" + environment_variables.AWS_S3_BUCKET] = BUCKET
+    os.environ[profile + "_" + environment_variables.S3_MOCK] = "True"
+
+
+def time_startup(eager: bool, repeat: int, payload_json: str | None = None) -> list[float]:
+    if payload_json is None:
+        os.environ.pop(environment_variables.CC_PAYLOAD_FORMATTED, None)
+    else:
+        os.environ[environment_variables.CC_PAYLOAD_FORMATTED] = payload_json
+    if eager:
+        os.environ[environment_variables.CC_EAGER_STORE_SESSIONS] = "True"
+    else:
+        os.environ.pop(environment_variables.CC_EAGER_STORE_SESSIONS, None)
+    timings = []
+    for _ in range(repeat):
+        # pylint: disable=protected-access
+        PluginManager._instance = None
+        start = time.perf_counter()
+        plugin_manager = PluginManager()
+        # a typical plugin touches one store
+        plugin_manager.get_file_store("store_0")
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--stores", type=int, nargs="+", default=[1, 8, 64], help="store counts to run"
+    )
+    parser.add_argument(
+        "--profiles", type=int, default=2, help="number of distinct store profiles"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="number of timed repetitions"
+    )
+    args = parser.parse_args()
+
+    set_profile_env(environment_variables.CC_PROFILE)
+    os.environ[environment_variables.CC_PLUGIN_DEFINITION] = "benchmark"
+    os.environ[environment_variables.CC_ROOT] = "cc_root"
+    os.environ[EVENT_ENV_VAR] = "1"
+    print(f"{'stores':>8}{'lazy ms':>12}{'eager ms':>12}{'inline ms':>12}")
+    with mock_s3():
+        cc_store = CCStoreS3()
+        cc_store.aws_s3.create_bucket(Bucket=BUCKET)
+        for stores in args.stores:
+            payload = make_payload(
+                stores=stores, sources=1, paths=1, attributes=0, profiles=args.profiles
+            )
+            for store in payload.stores:
+                set_profile_env(store.ds_profile)
+            cc_store.set_payload(payload)
+            lazy = time_startup(False, args.repeat)
+            eager = time_startup(True, args.repeat)
+            inline = time_startup(False, args.repeat, payload.serialize())
+            print(
+                f"{stores:>8}{statistics.median(lazy) * 1e3:>12.1f}"
+                f"{statistics.median(eager) * 1e3:>12.1f}{statistics.median(inline) * 1e3:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Peak memory and CPU benchmark for moving file data in and out of S3.
+
+Each operation runs in its own process against a minimal S3 stand-in served
+over HTTP by another process, so the measured peak RSS is that of the SDK and
+botocore only. The peak is reported above the process's resident size just
+before the operation (with the data to upload already in memory), as a
+multiple of the object size: 0 means the data was streamed, 1 means one
+full copy was made (for get_file, the returned bytes themselves).
+
+Usage:
+    python benchmarks/bench_transfer.py --megabytes 256
+"""
+import argparse
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic import EVENT_ENV_VAR, make_payload  # also puts the source checkout on sys.path
+
+from cc_sdk import CCStoreS3, ObjectState, PluginManager, PullObjectInput, PutObjectInput, StoreType
+from cc_sdk import environment_variables
+
+BUCKET = "benchmark-bucket"
+CHUNK_SIZE = 1024 * 1024
+OPERATIONS = (
+    "put_file bytes",
+    "put_file bytearray",
+    "file_writer",
+    "get_file",
+    "put_object disk",
+    "pull_object",
+)
+
+
+class _S3Handler(BaseHTTPRequestHandler):
+    """PUT, GET and HEAD of objects kept as files, streamed in both directions."""
+
+    protocol_version = "HTTP/1.1"
+    directory = ""
+
+    def _path(self) -> str:
+        return os.path.join(self.directory, hashlib.sha1(self.path.split("?")[0].encode()).hexdigest())
+
+    def do_PUT(self) -> None:  # pylint: disable=invalid-name
+        remaining = int(self.headers["Content-Length"])
+        with open(self._path(), "wb") as the_file:
+            while remaining:
+                chunk = self.rfile.read(min(CHUNK_SIZE, remaining))
+                the_file.write(chunk)
+                remaining -= len(chunk)
+        self.send_response(200)
+        self.send_header("ETag", '"etag"')
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self) -> None:  # pylint: disable=invalid-name
+        self._send_object(body=False)
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        self._send_object(body=True)
+
+    def _send_object(self, body: bool) -> None:
+        path = self._path()
+        if not os.path.exists(path):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"etag"')
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.end_headers()
+        if body:
+            with open(path, "rb") as the_file:
+                while chunk := the_file.read(CHUNK_SIZE):
+                    self.wfile.write(chunk)
+
+    def log_message(self, *args) -> None:  # pylint: disable=arguments-differ
+        pass
+
+
+def serve(directory: str, port_file: str) -> None:
+    _S3Handler.directory = directory
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _S3Handler)
+    with open(port_file, "w", encoding="utf-8") as the_file:
+        the_file.write(str(server.server_address[1]))
+    server.serve_forever()
+
+
+def set_env(endpoint: str, directory: str) -> None:
+    for profile in (environment_variables.CC_PROFILE, "profile_0"):
+        os.environ[profile + "_" + environment_variables.AWS_ACCESS_KEY_ID] = "key"
+        os.environ[profile + "_" + environment_variables.AWS_SECRET_ACCESS_KEY] = "secret"
+        os.environ[profile + "_" + environment_variables.AWS_DEFAULT_REGION] = "us-east-1"
+        os.environ[profile + "_" + environment_variables.AWS_S3_BUCKET] = BUCKET
+        os.environ[profile + "_" + environment_variables.S3_MOCK] = "True"
+        os.environ[profile + "_" + environment_variables.S3_ENDPOINT] = endpoint
+        os.environ[profile + "_" + environment_variables.S3_DISABLE_SSL] = "True"
+        os.environ[profile + "_" + environment_variables.S3_FORCE_PATH_STYLE] = "True"
+    os.environ[environment_variables.CC_PLUGIN_DEFINITION] = "benchmark"
+    os.environ[environment_variables.CC_ROOT] = "cc_root"
+    os.environ[EVENT_ENV_VAR] = "1"
+    payload = make_payload(stores=1, sources=1, paths=1, attributes=0, profiles=1)
+    os.environ[environment_variables.CC_PAYLOAD_FORMATTED] = payload.serialize()
+    os.environ["BENCH_DIRECTORY"] = directory
+
+
+def run_operation(operation: str, size: int) -> tuple[float, float]:
+    """Runs an operation, returns its extra peak RSS in bytes and its CPU seconds."""
+    plugin_manager = PluginManager()
+    data_source = plugin_manager.get_output_data_source("output_0")
+    cc_store = CCStoreS3()
+    local_directory = os.environ["BENCH_DIRECTORY"]
+    data = None
+    if operation in ("put_file bytes", "file_writer"):
+        data = os.urandom(size)
+    elif operation == "put_file bytearray":
+        data = bytearray(os.urandom(size))
+    elif operation == "put_object disk":
+        with open(os.path.join(local_directory, "upload.bin"), "wb") as the_file:
+            the_file.write(os.urandom(size))
+    # the object read by get_file and pull_object
+    plugin_manager.put_file(b"x" * size if data is None else b"", data_source, 0)
+    stream = None
+    if operation == "file_writer":
+        stream = io.BytesIO()
+        stream.write(data)
+        data = None
+    baseline = _reset_peak_resident_bytes()
+    start = time.process_time()
+    if operation.startswith("put_file"):
+        plugin_manager.put_file(data, data_source, 0)
+    elif operation == "file_writer":
+        plugin_manager.file_writer(stream, data_source, 0)
+    elif operation == "get_file":
+        data = plugin_manager.get_file(data_source, 0)
+        assert len(data) == size
+    elif operation == "put_object disk":
+        cc_store.put_object(
+            PutObjectInput(
+                file_name="upload",
+                file_extension="bin",
+                dest_store_type=StoreType.S3,
+                object_state=ObjectState.LOCAL_DISK,
+                source_root_path=local_directory,
+                dest_root_path="uploads",
+            )
+        )
+    elif operation == "pull_object":
+        key = plugin_manager.get_file_store(data_source.store_name).post_fix + "/" + data_source.paths[0]
+        assert cc_store.pull_object(
+            PullObjectInput(
+                file_name=key,
+                file_extension="",
+                source_store_type=StoreType.S3,
+                source_root_path="",
+                dest_root_path=local_directory,
+            )
+        )
+    cpu = time.process_time() - start
+    return _peak_resident_bytes() - baseline, cpu
+
+
+def _reset_peak_resident_bytes() -> int:
+    """Resets the peak RSS of the process to its current RSS, which is returned (Linux only)."""
+    with open("/proc/self/clear_refs", "w", encoding="utf-8") as clear_refs:
+        clear_refs.write("5")
+    return _status_bytes("VmRSS")
+
+
+def _peak_resident_bytes() -> int:
+    return _status_bytes("VmHWM")
+
+
+def _status_bytes(name: str) -> int:
+    with open("/proc/self/status", encoding="utf-8") as status:
+        for line in status:
+            if line.startswith(name + ":"):
+                # in kB
+                return int(line.split()[1]) * 1024
+    raise RuntimeError(f"{name} not in /proc/self/status")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--megabytes", type=int, default=256, help="size of the object")
+    parser.add_argument("--operation", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size = args.megabytes * 1024 * 1024
+    if args.operation:
+        extra, cpu = run_operation(args.operation, size)
+        print(extra, cpu)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        port_file = os.path.join(directory, "port")
+        server = subprocess.Popen(  # pylint: disable=consider-using-with
+            [sys.executable, "-c", f"import bench_transfer; bench_transfer.serve({directory!r}, {port_file!r})"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        try:
+            while not os.path.exists(port_file) or not os.path.getsize(port_file):
+                time.sleep(0.05)
+            with open(port_file, encoding="utf-8") as the_file:
+                set_env(f"http://127.0.0.1:{the_file.read()}", directory)
+            print(f"{'operation':<22}{'peak RSS / size':>16}{'CPU s / GB':>12}")
+            for operation in OPERATIONS:
+                output = subprocess.run(
+                    [sys.executable, __file__, "--megabytes", str(args.megabytes), "--operation", operation],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout.split()
+                extra, cpu = float(output[-2]), float(output[-1])
+                print(f"{operation:<22}{extra / size:>16.2f}{cpu * (1024**3) / size:>12.2f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
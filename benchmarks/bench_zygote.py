@@ -0,0 +1,95 @@
+"""
+Per-event start up benchmark for the zygote runner.
+
+Each event starts a PluginManager, which reads the payload of the event from
+S3, and reads one input file, against the minimal S3 stand-in of
+bench_transfer served over HTTP by another process. Events run in a fresh
+interpreter each, the way a process per event starts today, and in children
+forked by run_zygote, which have the SDK imported and the S3 clients created
+by the zygote.
+
+Usage:
+    python benchmarks/bench_zygote.py --events 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import EVENT_ENV_VAR, make_payload  # also puts the source checkout on sys.path
+
+import bench_transfer
+from cc_sdk import CCStoreS3, PluginManager, environment_variables
+from cc_sdk.zygote import run_zygote
+
+HANDLER = """
+from cc_sdk import PluginManager
+plugin_manager = PluginManager()
+assert plugin_manager.get_file(plugin_manager.get_input_data_source("input_0"), 0) == b"input"
+"""
+
+
+def handler(_event: int) -> None:
+    """The in-process equivalent of HANDLER."""
+    plugin_manager = PluginManager()
+    assert plugin_manager.get_file(plugin_manager.get_input_data_source("input_0"), 0) == b"input"
+
+
+def publish(events: int) -> None:
+    """Publishes the payload of every event and the input file they read."""
+    payload = make_payload(stores=1, sources=1, paths=1, attributes=0, profiles=1)
+    store = CCStoreS3()
+    assert not store.set_payloads(payload, range(events), expand_paths=True)
+    for event in range(events):
+        os.environ[EVENT_ENV_VAR] = str(event)
+        PluginManager._instance = None  # pylint: disable=protected-access
+        plugin_manager = PluginManager()
+        assert plugin_manager.put_file(b"input", plugin_manager.get_input_data_source("input_0"), 0)
+    PluginManager._instance = None  # pylint: disable=protected-access
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=20, help="number of events to run")
+    args = parser.parse_args()
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+    with tempfile.TemporaryDirectory() as directory:
+        port_file = os.path.join(directory, "port")
+        server = subprocess.Popen(  # pylint: disable=consider-using-with
+            [sys.executable, "-c", f"import bench_transfer; bench_transfer.serve({directory!r}, {port_file!r})"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        try:
+            while not os.path.exists(port_file) or not os.path.getsize(port_file):
+                time.sleep(0.05)
+            with open(port_file, encoding="utf-8") as the_file:
+                bench_transfer.set_env(f"http://127.0.0.1:{the_file.read()}", directory)
+            # the payloads are read from S3
+            del os.environ[environment_variables.CC_PAYLOAD_FORMATTED]
+            publish(args.events)
+            env = dict(os.environ, PYTHONPATH=src)
+
+            start = time.perf_counter()
+            for event in range(args.events):
+                env[EVENT_ENV_VAR] = str(event)
+                subprocess.run([sys.executable, "-c", HANDLER], env=env, check=True)
+            fresh = time.perf_counter() - start
+
+            start = time.perf_counter()
+            exit_codes = run_zygote(handler, range(args.events), profiles=("CC", "profile_0"))
+            zygote = time.perf_counter() - start
+            assert set(exit_codes.values()) == {0}
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'runner':<20}{'ms per event':>14}")
+    print(f"{'fresh interpreter':<20}{fresh / args.events * 1e3:>14.1f}")
+    print(f"{'run_zygote':<20}{zygote / args.events * 1e3:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
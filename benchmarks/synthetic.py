@@ -0,0 +1,88 @@
+"""
+Synthetic payload generation for the cc_sdk benchmarks.
+
+The generated payloads mirror production manifests: every path and data path
+is templated with ENV and ATTR placeholders, stores share a handful of
+profiles, and the attributes dictionary carries both the placeholder values
+and a configurable amount of filler.
+"""
+import argparse
+import os
+import sys
+
+# allow running the benchmarks from a source checkout without installing
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from cc_sdk import DataSource, DataStore, Payload, StoreType
+
+EVENT_ENV_VAR = "CC_EVENT_NUMBER"
+
+
+def make_payload(
+    stores: int = 4,
+    sources: int = 8,
+    paths: int = 1000,
+    attributes: int = 100,
+    profiles: int = 2,
+) -> Payload:
+    """
+    Builds a synthetic Payload.
+
+    Args:
+        stores (int): the number of data stores.
+        sources (int): the number of input data sources, and again of output data sources.
+        paths (int): the number of paths (and of data paths) in every data source.
+        attributes (int): the number of filler attributes.
+        profiles (int): the number of distinct store profiles.
+
+    Returns:
+        Payload: the generated payload.
+    """
+    the_attributes = {"scenario": "baseline", "model": "hec-ras"}
+    for i in range(attributes):
+        the_attributes[f"attr_{i}"] = {"value": i, "label": f"attribute {i}"}
+    the_stores = [
+        DataStore(
+            name=f"store_{i}",
+            id=f"store_id_{i}",
+            parameters={"root": f"root_{i}"},
+            store_type=StoreType.S3,
+            ds_profile=f"profile_{i % profiles}",
+        )
+        for i in range(stores)
+    ]
+    return Payload(
+        attributes=the_attributes,
+        stores=the_stores,
+        inputs=[_make_source("input", i, stores, paths) for i in range(sources)],
+        outputs=[_make_source("output", i, stores, paths) for i in range(sources)],
+    )
+
+
+def _make_source(kind: str, index: int, stores: int, paths: int) -> DataSource:
+    prefix = "{ATTR::scenario}/event_{ENV::" + EVENT_ENV_VAR + "}/" + f"{kind}_{index}"
+    return DataSource(
+        name=f"{kind}_{index}",
+        id=f"{kind}_id_{index}",
+        store_name=f"store_{index % stores}",
+        paths=[f"{prefix}/{{ATTR::model}}/file_{j}.tif" for j in range(paths)],
+        data_paths=[f"/results/{{ATTR::model}}/table_{j}" for j in range(paths)],
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the payload size options shared by the benchmark scripts."""
+    parser.add_argument("--stores", type=int, default=4, help="number of data stores")
+    parser.add_argument(
+        "--sources", type=int, default=8, help="number of input (and output) data sources"
+    )
+    parser.add_argument(
+        "--paths", type=int, default=1000, help="number of paths per data source"
+    )
+    parser.add_argument(
+        "--attributes", type=int, default=100, help="number of filler attributes"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="number of timed repetitions"
+    )
@@ -1,30 +1,104 @@
-from .data_store import *
-from .aws_config import *
-from .data_source import *
-from .store_type import *
-from .payload import *
-from .get_object_input import *
-from .pull_object_input import *
-from .put_object_input import *
-from .config import *
+import importlib
+from typing import TYPE_CHECKING
 from . import constants
 from . import environment_variables
-from .message import Message
-from .error import Error, ErrorLevel, ErrorLevelOptions
-from .status import Status, StatusLevel
-from .seed_set import SeedSet
-from .cc_store import CCStore
-from .file_data_store import FileDataStore
-from .cc_store_s3 import CCStoreS3
-from .json_encoder import EnumEncoder
-from .file_data_store_s3 import FileDataStoreS3
-from .plugin_manager import PluginManager
+
+if TYPE_CHECKING:
+    from .data_store import DataStore
+    from .aws_config import AWSConfig
+    from .data_source import DataSource
+    from .compact_path_list import CompactPathList
+    from .store_type import StoreType
+    from .object_state import ObjectState
+    from .payload import Payload
+    from .get_object_input import GetObjectInput
+    from .pull_object_input import PullObjectInput
+    from .put_object_input import PutObjectInput
+    from .config import Config
+    from .message import Message
+    from .error import Error, ErrorLevel, ErrorLevelOptions
+    from .status import Status, StatusLevel
+    from .seed_set import SeedSet
+    from .cc_store import CCStore
+    from .file_data_store import FileDataStore
+    from .cc_store_s3 import CCStoreS3
+    from .json_encoder import EnumEncoder
+    from .file_data_store_s3 import FileDataStoreS3
+    from .shared_memory_cache import SharedMemoryCache
+    from .disk_cache import DiskCache
+    from .object_cache import ObjectCache, ObjectCacheStats
+    from .buffer_io import BufferReader
+    from .spooled_writer import SpooledWriter
+    from .range_reader import RangeReader
+    from .fsspec_filesystem import DataStoreFileSystem
+    from .columnar_writer import ColumnarWriter
+    from .archive_reader import ArchiveReader
+    from .packed_store import PackedFileDataStore
+    from .plugin_manager import PluginManager
+
+# Public names and the submodules that define them. Submodules are imported on
+# first attribute access so that `import cc_sdk` stays cheap and the AWS
+# modules (and boto3) are only loaded by plugins that actually use them.
+_LAZY_ATTRIBUTES = {
+    "DataStore": ".data_store",
+    "AWSConfig": ".aws_config",
+    "DataSource": ".data_source",
+    "CompactPathList": ".compact_path_list",
+    "StoreType": ".store_type",
+    "ObjectState": ".object_state",
+    "Payload": ".payload",
+    "GetObjectInput": ".get_object_input",
+    "PullObjectInput": ".pull_object_input",
+    "PutObjectInput": ".put_object_input",
+    "Config": ".config",
+    "Message": ".message",
+    "Error": ".error",
+    "ErrorLevel": ".error",
+    "ErrorLevelOptions": ".error",
+    "Status": ".status",
+    "StatusLevel": ".status",
+    "SeedSet": ".seed_set",
+    "CCStore": ".cc_store",
+    "FileDataStore": ".file_data_store",
+    "CCStoreS3": ".cc_store_s3",
+    "EnumEncoder": ".json_encoder",
+    "FileDataStoreS3": ".file_data_store_s3",
+    "SharedMemoryCache": ".shared_memory_cache",
+    "DiskCache": ".disk_cache",
+    "ObjectCache": ".object_cache",
+    "ObjectCacheStats": ".object_cache",
+    "BufferReader": ".buffer_io",
+    "SpooledWriter": ".spooled_writer",
+    "RangeReader": ".range_reader",
+    "DataStoreFileSystem": ".fsspec_filesystem",
+    "ColumnarWriter": ".columnar_writer",
+    "ArchiveReader": ".archive_reader",
+    "PackedFileDataStore": ".packed_store",
+    "PluginManager": ".plugin_manager",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # cache the attribute so later lookups bypass __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 __all__ = [
     "DataStore",
     "AWSConfig",
     "DataSource",
+    "CompactPathList",
     "StoreType",
+    "ObjectState",
     "Payload",
     "GetObjectInput",
     "PullObjectInput",
@@ -44,5 +118,16 @@ __all__ = [
     "CCStoreS3",
     "EnumEncoder",
     "FileDataStoreS3",
+    "SharedMemoryCache",
+    "DiskCache",
+    "ObjectCache",
+    "ObjectCacheStats",
+    "BufferReader",
+    "SpooledWriter",
+    "RangeReader",
+    "DataStoreFileSystem",
+    "ColumnarWriter",
+    "ArchiveReader",
+    "PackedFileDataStore",
     "PluginManager",
 ]
@@ -0,0 +1,138 @@
+import io
+import struct
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from .file_data_store import FileDataStore
+
+ARCHIVE_FORMATS = ("zip", "tar")
+
+# the local header of a zip member: signature, versions, flags, method, time, date, crc, sizes, name and extra lengths
+_ZIP_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_ZIP_LOCAL_SIGNATURE = b"PK\x03\x04"
+# the local extra field of a member usually differs a little from the central one, reading a few more bytes than
+# the central directory announces saves a second request for the rest of the member
+_ZIP_LOCAL_SLACK = 256
+
+
+class ArchiveReader:
+    """
+    Reads members of a zip or uncompressed tar archive in a file data store without downloading the archive.
+
+    The index of the archive is read when the reader is created, through the store's open_read stream, which on S3
+    downloads only the blocks that are read: the central directory at the end of a zip file, or the member headers
+    of a tar file (which has no index, so each header is a seek). Then each member is read with a single range
+    request of its bytes, and read_many reads several members concurrently, so reading a few files out of a large
+    archive moves only those files.
+
+    Attributes:
+    - store : FileDataStore
+        The store of the archive.
+    - path : str
+        The path of the archive in the store.
+    - format : str
+        "zip" or "tar".
+    - max_workers : int
+        The number of concurrent requests of read_many.
+
+    Methods:
+    - names(): returns the names of the files of the archive.
+    - size(name): returns the uncompressed size of a member.
+    - read(name): returns the content of a member.
+    - read_many(names): returns the contents of several members, read concurrently, by name.
+    - open(name): returns the content of a member as a byte stream.
+
+    Raises:
+    - ValueError:
+        If the format is unknown, or the file is not a zip or an uncompressed tar archive.
+    - KeyError:
+        If there is no file member of the name, by the methods.
+    """
+
+    def __init__(
+        self,
+        store: "FileDataStore",
+        path: str,
+        format: str | None = None,  # pylint: disable=redefined-builtin
+        max_workers: int = 8,
+    ):
+        if format is None:
+            format = "tar" if path.lower().endswith(".tar") else "zip"
+        if format not in ARCHIVE_FORMATS:
+            raise ValueError(f"unknown archive format {format!r}, expected one of {ARCHIVE_FORMATS}")
+        self.store = store
+        self.path = path
+        self.format = format
+        self.max_workers = max_workers
+        stream = store.open_read(path)
+        try:
+            if format == "zip":
+                self._members = _zip_members(stream, path)
+            else:
+                self._members = _tar_members(stream, path)
+        finally:
+            stream.close()
+
+    def names(self) -> list[str]:
+        return list(self._members)
+
+    def size(self, name: str) -> int:
+        return self._member(name).file_size if self.format == "zip" else self._member(name).size
+
+    def read(self, name: str) -> bytes:
+        member = self._member(name)
+        if self.format == "tar":
+            return self.store.get_range(self.path, member.offset_data, member.size)
+        if member.flag_bits & 0x1:
+            raise RuntimeError(f"{name} of {self.path} is encrypted")
+        name_length = len(member.orig_filename.encode("utf-8" if member.flag_bits & 0x800 else "cp437"))
+        length = _ZIP_LOCAL_HEADER.size + name_length + len(member.extra) + member.compress_size
+        data = self.store.get_range(self.path, member.header_offset, length + _ZIP_LOCAL_SLACK)
+        header = _ZIP_LOCAL_HEADER.unpack_from(data)
+        if header[0] != _ZIP_LOCAL_SIGNATURE:
+            raise ValueError(f"{name} of {self.path}: bad local file header")
+        start = _ZIP_LOCAL_HEADER.size + header[-2] + header[-1]
+        if start + member.compress_size > len(data):
+            data += self.store.get_range(
+                self.path, member.header_offset + len(data), start + member.compress_size - len(data)
+            )
+        compressed = io.BytesIO(memoryview(data)[start : start + member.compress_size])
+        # decompresses and checks the CRC like ZipFile.read
+        with zipfile.ZipExtFile(compressed, "r", member) as member_file:
+            return member_file.read()
+
+    def read_many(self, names: Iterable[str]) -> dict[str, bytes]:
+        names = list(dict.fromkeys(names))
+        for name in names:
+            self._member(name)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names) or 1)) as executor:
+            return dict(zip(names, executor.map(self.read, names)))
+
+    def open(self, name: str) -> io.BytesIO:
+        return io.BytesIO(self.read(name))
+
+    def _member(self, name: str) -> zipfile.ZipInfo | tarfile.TarInfo:
+        member = self._members.get(name)
+        if member is None:
+            raise KeyError(f"there is no file {name!r} in {self.path}")
+        return member
+
+
+def _zip_members(stream, path: str) -> dict[str, zipfile.ZipInfo]:
+    try:
+        with zipfile.ZipFile(stream) as archive:
+            return {info.filename: info for info in archive.infolist() if not info.is_dir()}
+    except zipfile.BadZipFile as exc:
+        raise ValueError(f"{path} is not a zip archive: {exc}") from exc
+
+
+def _tar_members(stream, path: str) -> dict[str, tarfile.TarInfo]:
+    try:
+        # "r:" rather than "r", a compressed tar archive cannot be read by ranges
+        with tarfile.open(fileobj=stream, mode="r:") as archive:
+            return {info.name: info for info in archive.getmembers() if info.isfile() and not info.issparse()}
+    except tarfile.ReadError as exc:
+        raise ValueError(f"{path} is not an uncompressed tar archive: {exc}") from exc
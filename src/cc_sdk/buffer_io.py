@@ -0,0 +1,126 @@
+import io
+
+# the size of the reads of read_into for streams without readinto
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class BufferReader(io.RawIOBase):
+    """
+    A seekable, read only binary stream over a buffer, e.g. the memory of a NumPy array.
+
+    Unlike io.BytesIO, the buffer is not copied: reads are sliced from a memoryview of it, so uploading the stream
+    only ever copies the chunk being sent. The buffer must not be changed while the stream is read.
+
+    Attributes:
+    - buffer : memoryview
+        A flat view of the bytes of the buffer. readonly
+
+    Raises:
+    - TypeError:
+        If the buffer is not C contiguous.
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        view = memoryview(buffer)
+        if not view.c_contiguous:
+            raise TypeError("BufferReader requires a C contiguous buffer")
+        self._view = view.cast("B") if view.format != "B" or view.ndim != 1 else view
+        self._position = 0
+
+    @property
+    def buffer(self) -> memoryview:
+        return self._view
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        target = memoryview(buffer).cast("B")
+        end = min(self._position + len(target), len(self._view))
+        count = max(end - self._position, 0)
+        target[:count] = self._view[self._position : end]
+        self._position += count
+        return count
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(self._position + size, len(self._view))
+        data = self._view[self._position : end].tobytes() if end > self._position else b""
+        self._position = max(self._position, end)
+        return data
+
+    def readall(self) -> bytes:
+        return self.read()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._position = seek_position(offset, whence, self._position, len(self._view))
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+
+def seek_position(offset: int, whence: int, position: int, size: int) -> int:
+    """
+    The position a seek moves a stream to, following io.IOBase.seek.
+
+    Args:
+        offset (int): The offset of the seek.
+        whence (int): io.SEEK_SET, io.SEEK_CUR or io.SEEK_END.
+        position (int): The current position of the stream.
+        size (int): The size of the stream.
+
+    Returns:
+        int: The new position, which may be past the end of the stream.
+
+    Raises:
+        ValueError: If whence is invalid or the new position is negative.
+    """
+    if whence == io.SEEK_SET:
+        new_position = offset
+    elif whence == io.SEEK_CUR:
+        new_position = position + offset
+    elif whence == io.SEEK_END:
+        new_position = size + offset
+    else:
+        raise ValueError(f"invalid whence: {whence}")
+    if new_position < 0:
+        raise ValueError(f"negative seek position: {new_position}")
+    return new_position
+
+
+def read_into(stream, buffer) -> int:
+    """
+    Read a binary stream into a preallocated buffer until the buffer is full or the stream ends.
+
+    The stream's readinto is used when it has one, so the data is written straight into the buffer. Otherwise the
+    stream is read in chunks of READ_CHUNK_SIZE that are copied into the buffer, so no more than a chunk is ever held
+    twice.
+
+    Args:
+        stream: The binary stream, e.g. the Body of an S3 get_object response.
+        buffer: The writable buffer, e.g. a bytearray or the memory of a NumPy array.
+
+    Returns:
+        int: The number of bytes read.
+    """
+    view = memoryview(buffer).cast("B")
+    position = 0
+    readinto = getattr(stream, "readinto", None)
+    while position < len(view):
+        if readinto is not None:
+            count = readinto(view[position:])
+        else:
+            chunk = stream.read(min(READ_CHUNK_SIZE, len(view) - position))
+            count = len(chunk)
+            view[position : position + count] = chunk
+        if not count:
+            break
+        position += count
+    return position
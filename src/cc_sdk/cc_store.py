@@ -21,7 +21,8 @@ class CCStore(metaclass=abc.ABCMeta):
         - pull_object(input): retrieves the input from the store, returns true
           on success and false on failure
         - get_object(input): retrieves the object bytes from the store
-        - get_payload(): retrieves the payload from the store
+        - get_payload(compact): retrieves the payload from the store, storing
+          its paths as CompactPathList objects if compact is set
         - root_path(): retrieves the root path of the store
         - handles_data_store_type(datastore_type): returns whether the given
           data store type is handled by this class
@@ -40,7 +41,7 @@ class CCStore(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def get_payload(self) -> Payload:
+    def get_payload(self, compact: bool = False) -> Payload:
         pass
 
     @abc.abstractmethod
@@ -1,21 +1,102 @@
-import io
 import os
-import boto3
+import json
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, BinaryIO, Callable, Iterable
+from attr import asdict, astuple, filters, fields
 from botocore.exceptions import ClientError
-from botocore.client import Config
 from .cc_store import CCStore
 from .get_object_input import GetObjectInput
 from .pull_object_input import PullObjectInput
 from .put_object_input import PutObjectInput
 from .payload import Payload
+from .data_store import DataStore
+from .json_encoder import EnumEncoder
+from .path_template import compile_path_template
 from .store_type import StoreType
 from . import environment_variables
 from .aws_config import AWSConfig
 from . import constants
 from .object_state import ObjectState
+from .disk_cache import DiskCache
+from .buffer_io import READ_CHUNK_SIZE
 
 
-class CCStoreS3(CCStore):
+# clients shared by get_s3_client, keyed by the AWSConfig values they were built from
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+
+
+# stands for a name or path of a data source in the JSON of the payload while set_payloads compiles its format
+_MARKER = re.compile(r"\\u0001(\d+)\\u0001")
+
+
+def _sources_format(shared: dict) -> tuple[str, tuple]:
+    """
+    Compile the JSON of the stores, inputs and outputs of a payload into a str.format string whose fields are the
+    placeholders of the names, paths and data paths of its data sources, the only strings the plugin substitutes.
+    Placeholders anywhere else, e.g. in the parameters of a store, are kept as they are.
+
+    Returns:
+        tuple: The format string and the distinct placeholders, in the order of their fields.
+    """
+    templates = []
+
+    def mark(template: str) -> str:
+        templates.append(template)
+        return f"\x01{len(templates) - 1}\x01"
+
+    marked = dict(shared)
+    for name in ("inputs", "outputs"):
+        marked[name] = [
+            dict(
+                source,
+                name=mark(source["name"]),
+                paths=[mark(path) for path in source["paths"]],
+                data_paths=[mark(path) for path in source["data_paths"]],
+            )
+            for source in shared[name]
+        ]
+    parts = _MARKER.split(json.dumps(marked, cls=EnumEncoder)[1:])
+    placeholders = {}
+    body_format = []
+    for index, part in enumerate(parts):
+        if index % 2 == 0:
+            body_format.append(part.replace("{", "{{").replace("}", "}}"))
+            continue
+        for segment in compile_path_template(templates[int(part)]):
+            if isinstance(segment, str):
+                body_format.append(json.dumps(segment)[1:-1].replace("{", "{{").replace("}", "}}"))
+            else:
+                body_format.append("{" + str(placeholders.setdefault(segment, len(placeholders))) + "}")
+    return "".join(body_format), tuple(placeholders)
+
+
+def _after_fork_in_child() -> None:
+    """
+    Make the shared clients safe to use in a forked child. The child inherits the pooled connections of the
+    parent, which must not be shared, so the pools are emptied and the child opens its own connections. The
+    clients themselves (their credentials, endpoints and loaded service models) are kept.
+    """
+    global _shared_clients_lock  # pylint: disable=global-statement
+    # the lock may have been held by another thread of the parent
+    _shared_clients_lock = threading.Lock()
+    for client in _shared_clients.values():
+        # botocore keeps the urllib3 pool managers in the endpoint's http session
+        # pylint: disable=protected-access
+        http_session = getattr(getattr(client, "_endpoint", None), "http_session", None)
+        if http_session is not None:
+            http_session.close()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class CCStoreS3(CCStore):  # pylint: disable=too-many-instance-attributes
     """An implementation of the abstract CCStore class for use with AWS S3 as the data store.
     You must set the following required and options environment variables to construct an object of this class:
 
@@ -33,6 +114,11 @@ class CCStoreS3(CCStore):
     - CC_S3_ENDPOINT: the AWS S3 endpoint for the bucket
     - CC_S3_DISABLE_SSL: True or False. If true, bucket will not use SSL
     - CC_S3_FORCE_PATH_STYLE: True or False. If true, bucket will force path style
+    - CC_PAYLOAD_FORMATTED: the payload JSON, or the path to a local file containing it. If set, the payload is not
+        read from S3
+    - CC_DISK_CACHE: a directory on a volume shared by the processes of the host. If set, pulled objects are cached
+        there by ETag and hard linked to their destination (see DiskCache)
+    - CC_DISK_CACHE_MAX_BYTES: the size budget of the disk cache, no eviction if not set
     """
 
     def __init__(self):
@@ -43,6 +129,7 @@ class CCStoreS3(CCStore):
         self.store_type = StoreType.S3
         self.aws_s3 = None
         self.config = AWSConfig()
+        self.disk_cache = None
         self._initialize()
 
     def _initialize(self):
@@ -53,7 +140,8 @@ class CCStoreS3(CCStore):
         """
         self.config = self.create_aws_config_from_env()
 
-        self.aws_s3 = self.create_s3_client(self.config)
+        # shared, e.g. created by the zygote before forking the children of the events
+        self.aws_s3 = self.get_s3_client(self.config)
 
         self.store_type = StoreType.S3
         manifest_id = os.getenv(environment_variables.CC_MANIFEST_ID)
@@ -70,6 +158,7 @@ class CCStoreS3(CCStore):
                 f"{environment_variables.CC_ROOT} environment variable not set"
             )
         self.root = root
+        self.disk_cache = DiskCache.from_env()
 
     @staticmethod
     def create_aws_config_from_env(
@@ -159,6 +248,12 @@ class CCStoreS3(CCStore):
         Returns:
             The boto3 AWS S3 Client object
         """
+        # boto3 is imported here rather than at module level because it takes
+        # hundreds of milliseconds to import and not every plugin needs a client
+        # pylint: disable=import-outside-toplevel
+        import boto3
+        from botocore.client import Config
+
         if config.aws_mock:
             if config.aws_force_path_style:
                 client_config = Config(
@@ -184,6 +279,49 @@ class CCStoreS3(CCStore):
         )
         return s3_client
 
+    @staticmethod
+    def get_s3_client(config: AWSConfig):
+        """Get an S3 client for the config settings, creating it on first use. boto3 clients are thread safe, so
+        every caller with the same settings (e.g. data stores sharing a profile) shares one client.
+
+        Args:
+            config (AWSConfig): the config settings used to create the s3 client
+
+        Returns:
+            The boto3 AWS S3 Client object
+        """
+        key = astuple(config)
+        # creation is serialized because boto3's default session is not thread safe
+        with _shared_clients_lock:
+            client = _shared_clients.get(key)
+            if client is None:
+                client = CCStoreS3.create_s3_client(config)
+                _shared_clients[key] = client
+        return client
+
+    @staticmethod
+    def cached_object(client, bucket: str, key: str) -> tuple[str, int, Callable]:
+        """Get the ETag, the size and a download function of an S3 object, the arguments of the DiskCache methods.
+
+        Args:
+            client: the boto3 AWS S3 Client object
+            bucket (str): the bucket of the object
+            key (str): the key of the object
+
+        Returns:
+            tuple: the ETag, the size in bytes, and a function downloading the object into a binary file. The
+            download fails if the object has changed since its ETag was read, so a new content is never cached under
+            the old ETag
+        """
+        head = client.head_object(Bucket=bucket, Key=key)
+
+        def fetch(the_file: BinaryIO) -> None:
+            response = client.get_object(Bucket=bucket, Key=key, IfMatch=head["ETag"])
+            with response["Body"] as body:
+                shutil.copyfileobj(body, the_file, READ_CHUNK_SIZE)
+
+        return head["ETag"].strip('"'), head["ContentLength"], fetch
+
     def handles_data_store_type(self, data_store_type: StoreType) -> bool:
         return self.store_type == data_store_type
 
@@ -215,8 +353,8 @@ class CCStoreS3(CCStore):
                 # read from local
                 try:
                     with open(local_path, "rb") as the_file:
-                        data = the_file.read()
-                        self._upload_to_s3(remote_path, data)
+                        # streamed from the file by botocore, not read into memory
+                        self._upload_to_s3(remote_path, the_file)
                 except FileNotFoundError as exc:
                     raise FileNotFoundError from exc
                 except IOError as exc:
@@ -249,8 +387,14 @@ class CCStoreS3(CCStore):
             remote_path += "." + pull_input.file_extension
             local_path += "." + pull_input.file_extension
         try:
-            data = self._download_bytes_from_s3(remote_path)
-            self._write_input_stream_to_disk(io.BytesIO(data), local_path)
+            if self.disk_cache is not None:
+                self.disk_cache.link(*self.cached_object(self.aws_s3, self.bucket, remote_path), local_path)
+                return True
+            if self.aws_s3 is None:
+                raise RuntimeError("AWS config not set.")
+            response = self.aws_s3.get_object(Bucket=self.bucket, Key=remote_path)
+            with response["Body"] as body:
+                self._write_input_stream_to_disk(body, local_path)
         except ClientError:
             return False
         except IOError:
@@ -278,23 +422,58 @@ class CCStoreS3(CCStore):
         except ClientError as exc:
             raise exc
 
-    def get_payload(self) -> Payload:
-        """Get the payload from S3. The payload is always at:
+    def get_payload(self, compact: bool = False, manifest_id: str | None = None) -> Payload:
+        """Get the payload. A payload supplied through the CC_PAYLOAD_FORMATTED environment variable is used if
+        present (see get_local_payload), otherwise the payload is read from S3 at:
             s3://<CC_AWS_S3_BUCKET>/<CC_ROOT>/<CC_EVENT_NUMBER>/payload
 
+        Args:
+            compact (bool): store the paths of the payload as CompactPathList objects
+            manifest_id (str): read the payload of this manifest from S3 instead, e.g. the next event of a worker
+
         Returns:
             Payload: the payload object
         """
-        # use S3 file path separator convention
-        path = os.path.join(
-            self.root, self.manifest_id, constants.PAYLOAD_FILE_NAME
-        ).replace("\\", "/")
+        if manifest_id is None:
+            local_payload = self.get_local_payload(compact)
+            if local_payload is not None:
+                return local_payload
+            manifest_id = self.manifest_id
         try:
-            body = self._download_bytes_from_s3(path)
-            return self._read_json_model_payload_from_bytes(body)
+            body = self._download_bytes_from_s3(self._payload_key(manifest_id))
+            return self._read_json_model_payload_from_bytes(body, compact)
         except ClientError as exc:
             raise exc
 
+    @staticmethod
+    def get_local_payload(compact: bool = False) -> Payload | None:
+        """Get the payload supplied through the CC_PAYLOAD_FORMATTED environment variable, without touching S3.
+        The variable holds either the payload JSON itself or the path to a local file containing it.
+
+        Args:
+            compact (bool): store the paths of the payload as CompactPathList objects
+
+        Raises:
+            EnvironmentError: if the variable is neither a JSON object nor the path of an existing file
+
+        Returns:
+            Payload | None: the payload object, or None if the variable is not set
+        """
+        payload = os.getenv(environment_variables.CC_PAYLOAD_FORMATTED)
+        if payload is None or len(payload.strip()) == 0:
+            return None
+        if payload.lstrip().startswith("{"):
+            return Payload.from_json(payload, compact=compact)
+        try:
+            with open(payload, "rb") as payload_file:
+                return CCStoreS3._read_json_model_payload_from_bytes(
+                    payload_file.read(), compact
+                )
+        except FileNotFoundError as exc:
+            raise EnvironmentError(
+                f"{environment_variables.CC_PAYLOAD_FORMATTED} is neither a JSON payload nor an existing file"
+            ) from exc
+
     def set_payload(self, payload: Payload) -> bool:
         """Set the payload on S3. The payload is always at:
             s3://<CC_AWS_S3_BUCKET>/<CC_ROOT>/<CC_EVENT_NUMBER>/payload
@@ -303,35 +482,137 @@ class CCStoreS3(CCStore):
         Returns:
             Payload: the payload object
         """
-        # use S3 file path separator convention
-        path = os.path.join(
-            self.root, self.manifest_id, constants.PAYLOAD_FILE_NAME
-        ).replace("\\", "/")
         try:
-            self._upload_to_s3(path, payload.serialize().encode())
+            self._upload_to_s3(self._payload_key(self.manifest_id), payload.serialize().encode())
             return True
         except ClientError:
             return False
 
+    # pylint: disable=too-many-arguments,too-many-locals
+    def set_payloads(
+        self,
+        payload: Payload,
+        events: Iterable[Any],
+        attributes: Callable[[Any], dict[str, Any]] | None = None,
+        expand_paths: bool = False,
+        manifest_id: Callable[[Any], str] = str,
+        max_workers: int = 16,
+        progress: Callable[[int, int | None], None] | None = None,
+    ) -> dict[Any, Exception]:
+        """Set the payloads of many events on S3, e.g. every event of a simulation. The payload of each event is
+        written to:
+            s3://<CC_AWS_S3_BUCKET>/<CC_ROOT>/<manifest_id(event)>/payload
+
+            The stores, inputs and outputs of `payload` are serialized once and shared by every event, only the
+            attributes are serialized per event. Manifests are uploaded concurrently by up to `max_workers` threads
+            sharing this store's client.
+
+            This is for use in cloud compute, not for use inside a plugin
+
+        Args:
+            payload (Payload): the template payload
+            events (Iterable): the events to publish, e.g. a range of event numbers or a list of seeds
+            attributes (Callable): returns the attributes of an event, they are merged over the attributes of
+                `payload`. If None every event has the attributes of `payload`
+            expand_paths (bool): substitute the {ATTR::<name>} placeholders of the data source names, paths and data
+                paths with the attributes of each event before publishing. {ENV::<name>} placeholders are left for
+                the plugin to substitute
+            manifest_id (Callable): returns the manifest id of an event, the event number itself by default
+            max_workers (int): the maximum number of concurrent uploads
+            progress (Callable): called with the number of events done and the total number of events (None if
+                `events` has no length) each time an event is published or fails
+
+        Returns:
+            dict: the exception raised for each event that could not be published, empty if every event was
+        """
+        # same key order as Payload.serialize, with the attributes spliced in front of the shared fields
+        shared = asdict(payload, recurse=True, filter=filters.exclude(fields(DataStore).session))
+        del shared["attributes"]
+        shared_json = json.dumps(shared, cls=EnumEncoder)[1:]
+        if expand_paths:
+            body_format, placeholders = _sources_format(shared)
+
+        def publish(event) -> None:
+            event_attributes = dict(payload.attributes)
+            if attributes is not None:
+                event_attributes.update(attributes(event))
+            body = shared_json
+            if expand_paths:
+                body = body_format.format(
+                    *(self._expand_placeholder(placeholder, event_attributes) for placeholder in placeholders)
+                )
+            manifest = '{"attributes": ' + json.dumps(event_attributes, cls=EnumEncoder) + ", " + body
+            self._upload_to_s3(self._payload_key(manifest_id(event)), manifest.encode())
+
+        total = len(events) if hasattr(events, "__len__") else None
+        failures = {}
+        done = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # bound the number of pending events so a huge range is not queued at once
+            pending = {}
+            events_iterator = iter(events)
+            while True:
+                for event in events_iterator:
+                    pending[executor.submit(publish, event)] = event
+                    if len(pending) >= 2 * max_workers:
+                        break
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    event = pending.pop(future)
+                    exc = future.exception()
+                    if exc is not None:
+                        failures[event] = exc
+                    done += 1
+                    if progress is not None:
+                        progress(done, total)
+        return failures
+
     @staticmethod
-    def _read_json_model_payload_from_bytes(data: bytes) -> Payload:
+    def _expand_placeholder(placeholder: tuple[str, str], event_attributes: dict[str, Any]) -> str:
+        """Value of an ATTR placeholder of an event, escaped to stay a valid JSON string, ENV placeholders are left
+        for the plugin"""
+        prefix, name = placeholder
+        if prefix != "ATTR":
+            return "{" + prefix + "::" + name + "}"
+        try:
+            return json.dumps(str(event_attributes[name]))[1:-1]
+        except KeyError as exc:
+            raise RuntimeError(f"Payload attributes has no key {name}.") from exc
+
+    def _payload_key(self, manifest_id: str) -> str:
+        # use S3 file path separator convention
+        return os.path.join(self.root, manifest_id, constants.PAYLOAD_FILE_NAME).replace("\\", "/")
+
+    @staticmethod
+    def _read_json_model_payload_from_bytes(data: bytes, compact: bool = False) -> Payload:
         """Helper method to decode the JSON to a Payload object"""
         try:
-            return Payload.from_json(data.decode("utf-8"))
+            return Payload.from_json(data, compact=compact)
         except Exception as exc:
             raise exc
 
     def _write_input_stream_to_disk(
-        self, input_stream: io.BytesIO, output_destination: str
+        self, input_stream: BinaryIO, output_destination: str
     ) -> None:
         directory = os.path.dirname(output_destination)
         if not os.path.exists(directory):
             os.makedirs(directory)
-        bytes_data = input_stream.read()
-        with open(output_destination, "wb") as output_file:
-            output_file.write(bytes_data)
-
-    def _upload_to_s3(self, object_key: str, file_bytes: bytes) -> None:
+        # in chunks, the stream is never held in memory as a whole, and into a temporary file so a failed
+        # download does not leave a partial file behind, of its own for each thread pulling the same object
+        output_file = tempfile.NamedTemporaryFile(  # pylint: disable=consider-using-with
+            dir=directory, prefix=os.path.basename(output_destination) + ".", suffix=".tmp", delete=False
+        )
+        try:
+            with output_file:
+                shutil.copyfileobj(input_stream, output_file, READ_CHUNK_SIZE)
+            os.replace(output_file.name, output_destination)
+        finally:
+            if os.path.exists(output_file.name):
+                os.remove(output_file.name)
+
+    def _upload_to_s3(self, object_key: str, file_bytes: bytes | BinaryIO) -> None:
         if self.aws_s3 is not None:
             self.aws_s3.put_object(Bucket=self.bucket, Key=object_key, Body=file_bytes)
         else:
@@ -0,0 +1,251 @@
+import io
+from array import array
+from itertools import islice
+from typing import Any, Iterable, Mapping, Sequence
+
+# the array typecodes of the fixed width column types, which are buffered in arrays rather than lists
+_TYPECODES = {
+    "int8": "b",
+    "int16": "h",
+    "int32": "i",
+    "int64": "q",
+    "uint8": "B",
+    "uint16": "H",
+    "uint32": "I",
+    "uint64": "Q",
+    "float32": "f",
+    "float64": "d",
+}
+COLUMN_TYPES = (*_TYPECODES, "bool", "string")
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+
+class ColumnarWriter:  # pylint: disable=too-many-instance-attributes
+    """
+    Writes rows to a binary stream as a Parquet file or an Arrow IPC file, one row group (or record batch) at a
+    time, with pyarrow.
+
+    Rows are buffered by column, fixed width columns in typed arrays, and every `row_group_size` rows the buffers
+    are encoded and written to the stream and then emptied, so memory stays flat however many rows are written.
+    Given the stream of PluginManager.open_writer, which on S3 is a MultipartWriter, the encoded row groups are
+    uploaded as multipart parts in the background while the next ones are buffered and encoded.
+
+    Attributes:
+    - columns : dict[str, str]
+        The name and type of each column: int8 to int64, uint8 to uint64, float32, float64, bool or string. The
+        fixed width types cannot hold None.
+    - format : str
+        "parquet" or "arrow".
+    - row_group_size : int
+        The number of rows of a row group.
+    - compression : str | None
+        The compression of the file: a Parquet codec (snappy if None) or an Arrow IPC one, lz4 or zstd (none if
+        None).
+    - rows : int
+        The number of rows written so far. readonly
+
+    Methods:
+    - write_row(row): buffers a row, a mapping of column names to values.
+    - write_rows(rows): buffers rows.
+    - write_columns(columns): buffers rows given as a mapping of column names to sequences of values.
+    - flush(): encodes the buffered rows as a row group.
+    - close(): writes the buffered rows and the footer, and closes the stream.
+    - discard(): discards the output, if the stream supports it, and closes it.
+
+    Raises:
+    - ImportError:
+        If pyarrow is not installed.
+    - ValueError:
+        If a column type or the format is unknown.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        sink: io.BufferedIOBase,
+        columns: Mapping[str, str],
+        format: str = "parquet",  # pylint: disable=redefined-builtin
+        row_group_size: int = 65536,
+        compression: str | None = None,
+    ):
+        for name, column_type in columns.items():
+            if column_type not in COLUMN_TYPES:
+                raise ValueError(f"unknown type {column_type!r} of column {name!r}, expected one of {COLUMN_TYPES}")
+        if format not in COLUMNAR_FORMATS:
+            raise ValueError(f"unknown format {format!r}, expected one of {COLUMNAR_FORMATS}")
+        self._pyarrow = _import_pyarrow()
+        self.columns = dict(columns)
+        self.format = format
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._sink = sink
+        self._rows = 0
+        self._buffers = self._new_buffers()
+        pyarrow = self._pyarrow
+        self._schema = pyarrow.schema(
+            [(name, _arrow_type(pyarrow, column_type)) for name, column_type in self.columns.items()]
+        )
+        # pyarrow closes the streams it writes to, the sink is closed by close or discard instead
+        self._target = target = _Unclosed(sink)
+        if format == "parquet":
+            # pylint: disable-next=import-outside-toplevel,import-error
+            import pyarrow.parquet
+
+            self._writer = pyarrow.parquet.ParquetWriter(target, self._schema, compression=compression or "snappy")
+        else:
+            # pylint: disable-next=import-outside-toplevel,import-error
+            import pyarrow.ipc
+
+            options = pyarrow.ipc.IpcWriteOptions(compression=compression)
+            self._writer = pyarrow.ipc.new_file(target, self._schema, options=options)
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    def write_row(self, row: Mapping[str, Any]) -> None:
+        """Buffer a row. A row missing a column, or with a value the column cannot hold, is not buffered at all."""
+        # every value is looked up before any buffer grows, so the columns keep the same length
+        values = [row[name] for name in self._buffers]
+        appended = 0
+        try:
+            for buffer, value in zip(self._buffers.values(), values):
+                buffer.append(value)
+                appended += 1
+        except BaseException:
+            for buffer in islice(self._buffers.values(), appended):
+                del buffer[-1]
+            raise
+        self._rows += 1
+        if len(next(iter(self._buffers.values()), ())) >= self.row_group_size:
+            self.flush()
+
+    def write_rows(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        for row in rows:
+            self.write_row(row)
+
+    def write_columns(self, columns: Mapping[str, Sequence[Any]]) -> None:
+        """Buffer rows given by column, e.g. the results of a time step. The columns must have the same length."""
+        lengths = {len(columns[name]) for name in self._buffers}
+        if len(lengths) > 1:
+            raise ValueError(f"the columns have different lengths: {sorted(lengths)}")
+        length = len(next(iter(self._buffers.values()), ()))
+        try:
+            for name, buffer in self._buffers.items():
+                buffer.extend(columns[name])
+        except BaseException:
+            for buffer in self._buffers.values():
+                del buffer[length:]
+            raise
+        self._rows += lengths.pop() if lengths else 0
+        while self._buffers and len(next(iter(self._buffers.values()))) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Encode the buffered rows, up to row_group_size of them, as a row group and write it to the stream."""
+        buffers = self._buffers
+        length = len(next(iter(buffers.values()), ()))
+        if not length:
+            return
+        count = min(length, self.row_group_size)
+        # a slice is a copy, the buffers that are written whole are not copied
+        arrays = [
+            self._to_arrow(name, buffer if count == length else buffer[:count]) for name, buffer in buffers.items()
+        ]
+        batch = self._pyarrow.RecordBatch.from_arrays(arrays, schema=self._schema)
+        if self.format == "parquet":
+            self._writer.write_table(self._pyarrow.Table.from_batches([batch]), row_group_size=count)
+        else:
+            self._writer.write_batch(batch)
+        if count == length:
+            self._buffers = self._new_buffers()
+        else:
+            for buffer in buffers.values():
+                del buffer[:count]
+
+    def close(self) -> None:
+        """Write the buffered rows and the footer of the file, then close the stream, which publishes the output."""
+        try:
+            while self._buffers and len(next(iter(self._buffers.values()))):
+                self.flush()
+            self._writer.close()
+        except BaseException:
+            self.discard()
+            raise
+        self._sink.close()
+
+    def discard(self) -> None:
+        """Close the stream without publishing the output if it has a discard method (e.g. MultipartWriter)."""
+        # the pyarrow writer is closed first and its writes dropped, otherwise it would write its footer into the
+        # discarded stream when it is garbage collected
+        self._target.discarded = True
+        try:
+            self._writer.close()
+        except Exception:  # pylint: disable=broad-except
+            pass
+        discard = getattr(self._sink, "discard", None)
+        if discard is not None:
+            discard()
+        else:
+            self._sink.close()
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+    def _new_buffers(self) -> dict[str, array | list]:
+        return {
+            name: array(_TYPECODES[column_type]) if column_type in _TYPECODES else []
+            for name, column_type in self.columns.items()
+        }
+
+    def _to_arrow(self, name: str, values: array | list):
+        pyarrow = self._pyarrow
+        arrow_type = self._schema.field(name).type
+        if isinstance(values, array):
+            # the typed array is wrapped, not converted value by value
+            return pyarrow.Array.from_buffers(arrow_type, len(values), [None, pyarrow.py_buffer(values)])
+        return pyarrow.array(values, type=arrow_type)
+
+
+class _Unclosed(io.RawIOBase):
+    """Forwards the writes to a stream but not the close, drops them once the output is discarded."""
+
+    def __init__(self, stream: io.BufferedIOBase):
+        super().__init__()
+        self._stream = stream
+        self.discarded = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.discarded:
+            return len(memoryview(data))
+        return self._stream.write(data)
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+    def flush(self) -> None:
+        if not self.closed and not self.discarded:  # pylint: disable=using-constant-test
+            self._stream.flush()
+
+
+def _arrow_type(pyarrow, column_type: str):
+    if column_type == "bool":
+        return pyarrow.bool_()
+    return getattr(pyarrow, column_type)()
+
+
+def _import_pyarrow():
+    # pyarrow is optional and slow to import, only the plugins writing columnar outputs import it
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError("ColumnarWriter requires pyarrow, install cc_sdk[arrow]") from exc
+    return pyarrow
@@ -0,0 +1,96 @@
+import sys
+from array import array
+from collections.abc import Iterable, Sequence
+from itertools import accumulate, repeat
+from operator import itemgetter
+
+
+class CompactPathList(Sequence):
+    """
+    An immutable, memory compact sequence of paths.
+
+    Each path is split at its last '/' into a directory prefix and a file name.
+    Prefixes are stored once in a table of interned strings, shared by every
+    CompactPathList, and each path keeps only the index of its prefix. The file
+    names are concatenated into a single string and located by an offsets
+    array. A path costs a dozen bytes plus its file name instead of a full str
+    object and a list slot.
+
+    The class behaves like a read only list of str: it supports len(),
+    indexing (including negative indices and slices), iteration, `in`, and
+    compares equal to lists and tuples with the same paths.
+
+    Raises:
+    - ValueError:
+        If a path is not a str.
+    - IndexError:
+        If an index is out of range.
+    """
+
+    __slots__ = ("_prefixes", "_prefix_ids", "_names", "_offsets")
+
+    def __init__(self, paths: Iterable[str] = ()):
+        # built with map/itemgetter pipelines rather than a per path loop, decoding
+        # manifests with hundreds of thousands of paths is dominated by this
+        paths = paths if isinstance(paths, list) else list(paths)
+        if not set(map(type, paths)) <= {str}:
+            if not all(isinstance(path, str) for path in paths):
+                raise ValueError("paths must be a list of <class 'str'>")
+        parts = list(map(str.rpartition, paths, repeat("/")))
+        prefix_keys = list(map(itemgetter(0, 1), parts))
+        prefix_index = dict.fromkeys(prefix_keys)
+        for prefix_id, prefix_key in enumerate(prefix_index):
+            prefix_index[prefix_key] = prefix_id
+        names = list(map(itemgetter(2), parts))
+        self._prefixes = tuple(sys.intern(head + sep) for head, sep in prefix_index)
+        self._prefix_ids = array("I", map(prefix_index.__getitem__, prefix_keys))
+        self._names = "".join(names)
+        self._offsets = array("Q", [0])
+        self._offsets.extend(accumulate(map(len, names)))
+
+    def __len__(self) -> int:
+        return len(self._prefix_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._path(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("CompactPathList index out of range")
+        return self._path(index)
+
+    def _path(self, index: int) -> str:
+        return (
+            self._prefixes[self._prefix_ids[index]]
+            + self._names[self._offsets[index] : self._offsets[index + 1]]
+        )
+
+    def __iter__(self):
+        prefixes = self._prefixes
+        names = self._names
+        offsets = self._offsets
+        for i, prefix_id in enumerate(self._prefix_ids):
+            yield prefixes[prefix_id] + names[offsets[i] : offsets[i + 1]]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CompactPathList):
+            return list(self) == list(other)
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and all(
+                mine == theirs for mine, theirs in zip(self, other)
+            )
+        return NotImplemented
+
+    __hash__ = None  # equal to lists, which are not hashable
+
+    def __repr__(self) -> str:
+        return f"CompactPathList({list(self)!r})"
+
+    def __getstate__(self):
+        return (self._prefixes, self._prefix_ids, self._names, self._offsets)
+
+    def __setstate__(self, state):
+        self._prefixes, self._prefix_ids, self._names, self._offsets = state
+        # re-intern so unpickled lists share their prefixes again
+        self._prefixes = tuple(sys.intern(prefix) for prefix in self._prefixes)
@@ -1,6 +1,18 @@
 import json
 from attr import define, field, asdict, validators
 from .validators import validate_homogeneous_list
+from .compact_path_list import CompactPathList
+from .json_encoder import EnumEncoder
+
+
+def validate_path_list(instance, attribute, value):
+    """
+    A validator that ensures an attribute is a list of strings or a
+    CompactPathList, which only ever holds strings.
+    """
+    if isinstance(value, CompactPathList):
+        return
+    validate_homogeneous_list(instance, attribute, value, str)
 
 
 @define(auto_attribs=True, frozen=True)
@@ -15,9 +27,9 @@ class DataSource:
         The ID of the data source. readonly
     - store_name : str
         The name of the data store used by this data source. readonly
-    - paths : List[str]
+    - paths : List[str] | CompactPathList
         The paths to datasets in this data source. readonly
-    - data_paths : List[str]
+    - data_paths : List[str] | CompactPathList
         The 'data paths' (paths to data within a dataset) in this data source. readonly
 
     Methods:
@@ -37,20 +49,8 @@ class DataSource:
     store_name: str = field(
         validator=[validators.instance_of(str)],
     )
-    paths: list[str] = field(
-        validator=[
-            lambda instance, attribute, value: validate_homogeneous_list(
-                instance, attribute, value, str
-            )
-        ]
-    )
-    data_paths: list[str] = field(
-        validator=[
-            lambda instance, attribute, value: validate_homogeneous_list(
-                instance, attribute, value, str
-            )
-        ]
-    )
+    paths: list[str] | CompactPathList = field(validator=[validate_path_list])
+    data_paths: list[str] | CompactPathList = field(validator=[validate_path_list])
 
     def serialize(self) -> str:
         """
@@ -59,4 +59,4 @@ class DataSource:
         Returns:
         - str: JSON string representation of the attributes
         """
-        return json.dumps(asdict(self))
+        return json.dumps(asdict(self), cls=EnumEncoder)
@@ -0,0 +1,214 @@
+import errno
+import hashlib
+import mmap
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Callable
+from . import environment_variables
+
+try:
+    # POSIX only, the cache is shared by the processes and containers of a host
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class DiskCache:
+    """
+    A content addressed cache of S3 objects on a scratch volume, shared by the processes and containers of a host.
+
+    Objects are stored under a name derived from their ETag and size, so an object is downloaded once for the host
+    however many processes, stores or keys refer to it. Downloads are single flight: a process takes an exclusive
+    fcntl lock on the object before downloading it, and processes that want the same object meanwhile wait for the
+    lock and then use the downloaded file. Cached objects are used under a shared lock, so readers do not wait for
+    each other. Readers get a hard link to the cached file or a read only memory map of it, both
+    of which stay valid if the object is later evicted. Cached files are read only, since a hard link shares the
+    file with every other user of the object: a plugin must copy a linked input before changing it.
+
+    When the objects take more than `max_bytes`, the least recently used ones (by modification time, which every
+    use updates) are evicted. Objects locked by another process are skipped.
+
+    Attributes:
+    - directory : str
+        The directory of the cache, on a volume shared by the processes.
+    - max_bytes : int | None
+        The size budget of the cache, shared by all its users. None for no eviction.
+
+    Methods:
+    - from_env(): returns the cache configured by the CC_DISK_CACHE environment variables, or None.
+    - link(etag, size, fetch, dest_path): hard links (or copies, across file systems) the object to dest_path.
+    - open(etag, size, fetch): returns a read only memoryview of the object, backed by a memory map.
+    - read(etag, size, fetch): returns the content of the object.
+
+    Raises:
+    - NotImplementedError:
+        If the platform has no fcntl file locks.
+    """
+
+    def __init__(self, directory: str, max_bytes: int | None = None):
+        if fcntl is None:
+            raise NotImplementedError("DiskCache requires fcntl file locks")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        for subdirectory in ("objects", "locks", "tmp"):
+            os.makedirs(os.path.join(directory, subdirectory), exist_ok=True)
+
+    @staticmethod
+    def from_env() -> "DiskCache | None":
+        """
+        The cache in the directory given by CC_DISK_CACHE, with the size budget in bytes given by
+        CC_DISK_CACHE_MAX_BYTES (no eviction if not set). None if CC_DISK_CACHE is not set.
+        """
+        directory = os.getenv(environment_variables.CC_DISK_CACHE)
+        if not directory:
+            return None
+        max_bytes = os.getenv(environment_variables.CC_DISK_CACHE_MAX_BYTES)
+        return DiskCache(directory, int(max_bytes) if max_bytes else None)
+
+    def link(self, etag: str, size: int, fetch: Callable[[BinaryIO], None], dest_path: str) -> None:
+        """
+        Make dest_path a hard link to the cached object, downloading it first if needed. dest_path is replaced if it
+        exists. The object is copied instead if dest_path is on another file system.
+
+        Args:
+            etag (str): The ETag of the object.
+            size (int): The size of the object in bytes.
+            fetch (Callable): Downloads the object into the given binary file.
+            dest_path (str): Where to link the object.
+        """
+        directory = os.path.dirname(dest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        def link_to(path: str) -> None:
+            # of its own for each thread linking the same path
+            temp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                try:
+                    os.link(path, temp_path)
+                except OSError as exc:
+                    if exc.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                        raise
+                    shutil.copyfile(path, temp_path)
+                os.replace(temp_path, dest_path)
+            finally:
+                # a rename does nothing if dest_path already is a link to the object
+                if os.path.lexists(temp_path):
+                    os.remove(temp_path)
+
+        self._use(etag, size, fetch, link_to)
+
+    def open(self, etag: str, size: int, fetch: Callable[[BinaryIO], None]) -> memoryview:
+        """
+        Get a read only view of the cached object, downloading it first if needed. The view is backed by a memory
+        map, which is unmapped once the view and its slices are no longer referenced.
+        """
+
+        def map_file(path: str) -> memoryview:
+            if size == 0:
+                # empty files cannot be mapped
+                return memoryview(b"")
+            with open(path, "rb") as the_file:
+                return memoryview(mmap.mmap(the_file.fileno(), 0, access=mmap.ACCESS_READ))
+
+        return self._use(etag, size, fetch, map_file)
+
+    def read(self, etag: str, size: int, fetch: Callable[[BinaryIO], None]) -> bytes:
+        """Get the content of the cached object, downloading it first if needed."""
+
+        def read_file(path: str) -> bytes:
+            with open(path, "rb") as the_file:
+                return the_file.read()
+
+        return self._use(etag, size, fetch, read_file)
+
+    def _use(self, etag: str, size: int, fetch: Callable[[BinaryIO], None], use: Callable[[str], object]):
+        name = hashlib.sha256(f"{etag}:{size}".encode()).hexdigest()
+        path = os.path.join(self.directory, "objects", name)
+        # held while the object is used too, so it cannot be evicted between the check and the use
+        with self._locked(name, shared=True):
+            if os.path.exists(path):
+                # the modification time orders the objects for eviction
+                os.utime(path)
+                return use(path)
+        downloaded = False
+        # another process may have downloaded the object between the locks
+        with self._locked(name):
+            if os.path.exists(path):
+                # the modification time orders the objects for eviction
+                os.utime(path)
+            else:
+                temp_path = os.path.join(self.directory, "tmp", f"{name}.{os.getpid()}")
+                try:
+                    with open(temp_path, "wb") as temp_file:
+                        fetch(temp_file)
+                    # shared by the links of every process, which must not change it in place
+                    os.chmod(temp_path, 0o444)
+                    os.replace(temp_path, path)
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                downloaded = True
+            result = use(path)
+        if downloaded and self.max_bytes is not None:
+            self._evict(keep=name)
+        return result
+
+    def _evict(self, keep: str) -> None:
+        with self._locked("evict"):
+            objects_directory = os.path.join(self.directory, "objects")
+            entries = []
+            total = 0
+            with os.scandir(objects_directory) as scan:
+                for entry in scan:
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.name))
+                    total += stat.st_size
+            # least recently used first
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                with self._locked(name, blocking=False, remove=True) as locked:
+                    if not locked:
+                        continue
+                    try:
+                        os.remove(os.path.join(objects_directory, name))
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+    @contextmanager
+    def _locked(self, name: str, blocking: bool = True, remove: bool = False, shared: bool = False):
+        """
+        Hold the lock of a name, exclusively unless `shared`. With `remove`, the lock file is deleted before it is
+        released, e.g. with the object it locks.
+        """
+        path = os.path.join(self.directory, "locks", f"{name}.lock")
+        while True:
+            with open(path, "a+b") as lock_file:
+                try:
+                    mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+                    fcntl.flock(lock_file, mode if blocking else mode | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+                try:
+                    # the file may have been removed by its previous holder, whose lock then locks nothing
+                    try:
+                        current = os.stat(path).st_ino == os.fstat(lock_file.fileno()).st_ino
+                    except FileNotFoundError:
+                        current = False
+                    if not current:
+                        continue
+                    try:
+                        yield True
+                    finally:
+                        if remove:
+                            os.remove(path)
+                    return
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -7,6 +7,12 @@ CC_ROOT: Final[str] = "CC_ROOT"
 CC_PLUGIN_DEFINITION: Final[str] = "CC_PLUGIN_DEFINITION"
 CC_PROFILE: Final[str] = "CC"
 CC_PAYLOAD_FORMATTED: Final[str] = "CC_PAYLOAD_FORMATTED"
+CC_EAGER_STORE_SESSIONS: Final[str] = "CC_EAGER_STORE_SESSIONS"
+CC_PAYLOAD_COMPACT: Final[str] = "CC_PAYLOAD_COMPACT"
+CC_SHARED_MEMORY_CACHE: Final[str] = "CC_SHARED_MEMORY_CACHE"
+CC_DISK_CACHE: Final[str] = "CC_DISK_CACHE"
+CC_DISK_CACHE_MAX_BYTES: Final[str] = "CC_DISK_CACHE_MAX_BYTES"
+CC_OBJECT_CACHE_MAX_BYTES: Final[str] = "CC_OBJECT_CACHE_MAX_BYTES"
 AWS_ACCESS_KEY_ID: Final[str] = "AWS_ACCESS_KEY_ID"
 AWS_SECRET_ACCESS_KEY: Final[str] = "AWS_SECRET_ACCESS_KEY"
 AWS_DEFAULT_REGION: Final[str] = "AWS_DEFAULT_REGION"
@@ -1,6 +1,8 @@
 import abc
 import io
 from typing import Type
+from .archive_reader import ArchiveReader
+from .spooled_writer import SpooledWriter
 
 
 class FileDataStore(metaclass=abc.ABCMeta):
@@ -23,6 +25,27 @@ class FileDataStore(metaclass=abc.ABCMeta):
           store, returns true on success and false on failure
         - delete(path): deletes a file from the store, returns true on success
           and false on failure.
+        - get_buffer(path): retrieves a file from the store as a read only
+          memoryview, which stores may share between processes.
+        - release_buffer(path): releases a memoryview got with get_buffer.
+        - put_buffer(buffer, path): puts the bytes of a buffer, e.g. a NumPy
+          array, into a file in the store. Returns true on success and false
+          on failure.
+        - open_write(path): returns a writable stream that puts what was
+          written into a file in the store when it is closed.
+        - open_read(path): returns a seekable stream over a file in the
+          store, which stores may read lazily.
+        - get_range(path, offset, length): retrieves length bytes of a file
+          from offset.
+        - open_stream(path): returns a stream that reads a file sequentially,
+          which stores may read as it is downloaded.
+        - open_archive(path): returns a reader of the members of a zip or
+          tar archive in the store, which reads only the index of the archive
+          and the members that are read.
+        - list_paths(prefix): returns the paths of the files under a prefix.
+        - flush(): stores what the store buffers, e.g. the pending shard of
+          a PackedFileDataStore.
+        - rollback(): drops what the store buffered since the last flush.
     """
 
     @abc.abstractmethod
@@ -42,3 +65,36 @@ class FileDataStore(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def delete(self, path: str) -> bool:
         pass
+
+    def get_buffer(self, path: str) -> memoryview:
+        return self.get(path).getbuffer().toreadonly()
+
+    def release_buffer(self, path: str) -> None:
+        pass
+
+    def put_buffer(self, buffer, path: str) -> bool:
+        return self.put(io.BytesIO(buffer), path)
+
+    def open_write(self, path: str) -> io.BufferedIOBase:
+        return SpooledWriter(self, path)
+
+    def open_read(self, path: str) -> io.RawIOBase | io.BufferedIOBase:
+        return self.get(path)
+
+    def get_range(self, path: str, offset: int, length: int) -> bytes:
+        return self.get(path).getbuffer()[offset : offset + max(length, 0)].tobytes()
+
+    def open_stream(self, path: str) -> io.RawIOBase | io.BufferedIOBase:
+        return self.get(path)
+
+    def open_archive(self, path: str, **options) -> ArchiveReader:
+        return ArchiveReader(self, path, **options)
+
+    def list_paths(self, prefix: str) -> list[str]:
+        raise NotImplementedError(f"{type(self).__name__} cannot list its files")
+
+    def flush(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
@@ -1,13 +1,63 @@
 import io
 import os
+import atexit
+import threading
+from functools import partial
 from .file_data_store import FileDataStore
 from .store_type import StoreType
 from .aws_config import AWSConfig
 from .data_store import DataStore
 from .cc_store_s3 import CCStoreS3
+from .shared_memory_cache import SharedMemoryCache
+from .disk_cache import DiskCache
+from .object_cache import ObjectCache
+from .buffer_io import BufferReader, read_into
+from .multipart_writer import DEFAULT_PART_SIZE, MultipartWriter
+from .range_reader import DEFAULT_BLOCK_SIZE, DEFAULT_MAX_BLOCKS, RangeReader
+from . import environment_variables
 
+# the shared memory caches of this process, by namespace
+_shared_memory_caches: dict[str, SharedMemoryCache] = {}
+# the object cache shared by the stores of this process
+_object_cache: ObjectCache | None = None
+_caches_lock = threading.Lock()
+
+
+def _get_shared_memory_cache(namespace: str) -> SharedMemoryCache:
+    with _caches_lock:
+        cache = _shared_memory_caches.get(namespace)
+        if cache is None:
+            cache = SharedMemoryCache(namespace)
+            _shared_memory_caches[namespace] = cache
+            atexit.register(cache.close)
+        return cache
+
+
+def _get_object_cache(max_bytes: int) -> ObjectCache:
+    global _object_cache  # pylint: disable=global-statement
+    with _caches_lock:
+        if _object_cache is None or _object_cache.max_bytes != max_bytes:
+            _object_cache = ObjectCache(max_bytes)
+        return _object_cache
+
+
+class FileDataStoreS3(FileDataStore):  # pylint: disable=too-many-instance-attributes
+    """
+    A FileDataStore for objects in an S3 bucket, under the prefix given by the "root" parameter of the data store.
+
+    Set the CC_SHARED_MEMORY_CACHE environment variable to a name shared by the plugin processes of a node (e.g. the
+    job id) to share the objects read with get_buffer between them: the first process downloads an object into
+    shared memory and the others read it without a download or a copy (see SharedMemoryCache).
+
+    Set the CC_DISK_CACHE environment variable to a directory on a volume shared by the processes of the host to
+    cache the objects read with get and get_buffer there by ETag, so the host downloads each object once (see
+    DiskCache). get_buffer then returns a memory map of the cached file.
+
+    Set the CC_OBJECT_CACHE_MAX_BYTES environment variable to keep the objects read with get in memory, in an LRU
+    cache of that many bytes shared by the stores of the process (see ObjectCache). Threads getting the same object
+    at the same time share a single download. The hit and miss statistics are given by object_cache.stats().
+    """
 
-class FileDataStoreS3(FileDataStore):
     S3_ROOT = "root"
 
     def __init__(self, data_store: DataStore):
@@ -16,6 +66,9 @@ class FileDataStoreS3(FileDataStore):
         self.store_type = StoreType.S3
         self.aws_s3 = None
         self.config = AWSConfig
+        self.shared_memory_cache = None
+        self.disk_cache = None
+        self.object_cache = None
         self._initialize(data_store)
 
     def _initialize(self, data_store: DataStore):
@@ -28,7 +81,7 @@ class FileDataStoreS3(FileDataStore):
             env_prefix=data_store.ds_profile
         )
 
-        self.aws_s3 = CCStoreS3.create_s3_client(self.config)
+        self.aws_s3 = CCStoreS3.get_s3_client(self.config)
 
         self.store_type = StoreType.S3
         self.bucket = self.config.aws_bucket
@@ -38,11 +91,25 @@ class FileDataStoreS3(FileDataStore):
         except KeyError:
             # TODO, throw error?
             print("Missing S3 Root Paramter. Cannot create the store.")
+        namespace = os.getenv(environment_variables.CC_SHARED_MEMORY_CACHE)
+        if namespace:
+            self.shared_memory_cache = _get_shared_memory_cache(namespace)
+        self.disk_cache = DiskCache.from_env()
+        max_bytes = os.getenv(environment_variables.CC_OBJECT_CACHE_MAX_BYTES)
+        if max_bytes:
+            self.object_cache = _get_object_cache(int(max_bytes))
 
     def _get_object(self, path: str):
-        """Alias for _download_bytes_from_s3"""
+        """Alias for _download_bytes_from_s3, served from the disk cache if there is one"""
+        if self.disk_cache is not None:
+            return self.disk_cache.read(*self._cached_object(path))
         return self._download_bytes_from_s3(path)
 
+    def _cached_object(self, path: str) -> tuple:
+        # standard file separators, replace \ with /
+        key = os.path.join(self.post_fix, path).replace("\\", "/")
+        return CCStoreS3.cached_object(self.aws_s3, self.bucket, key)
+
     def _download_bytes_from_s3(self, object_key: str) -> bytes:
         # standard file separators, replace \ with /
         key = os.path.join(self.post_fix, object_key).replace("\\", "/")
@@ -52,26 +119,141 @@ class FileDataStoreS3(FileDataStore):
             return file_bytes
         raise RuntimeError("AWS config not set.")
 
-    def _upload_to_s3(self, object_key: str, file_bytes: bytes) -> bool:
+    def _download_into_buffer(self, object_key: str) -> bytearray:
+        """Download an object into a buffer allocated to its ContentLength, without intermediate copies"""
+        key = os.path.join(self.post_fix, object_key).replace("\\", "/")
+        if self.aws_s3 is None:
+            raise RuntimeError("AWS config not set.")
+        response = self.aws_s3.get_object(Bucket=self.bucket, Key=key)
+        buffer = bytearray(response["ContentLength"])
+        with response["Body"] as body:
+            count = read_into(body, buffer)
+        if count != len(buffer):
+            raise IOError(f"{key}: read {count} of {len(buffer)} bytes")
+        return buffer
+
+    def _upload_to_s3(self, object_key: str, file_bytes) -> bool:
         if self.aws_s3 is not None:
             self.aws_s3.put_object(Bucket=self.bucket, Key=object_key, Body=file_bytes)
             return True
         return False
 
+    def _read(self, path: str) -> bytes:
+        """_get_object through the object cache if there is one"""
+        if self.object_cache is not None:
+            return self.object_cache.get(self._cache_key(path), lambda: self._get_object(path))
+        return self._get_object(path)
+
     def copy(self, dest_store: FileDataStore, src_path: str, dest_path: str) -> bool:
-        data = self._get_object(src_path)
-        return dest_store.put(io.BytesIO(data), dest_path)
+        return dest_store.put_buffer(self._read(src_path), dest_path)
 
     def get(self, path: str) -> io.BytesIO:
-        return io.BytesIO(self._get_object(path))
+        return io.BytesIO(self._read(path))
+
+    def get_buffer(self, path: str) -> memoryview:
+        """
+        Get a read only view of an object. With a shared memory cache the view is of the node's shared copy, and it
+        is valid until release_buffer is called for the path.
+        """
+        if self.shared_memory_cache is not None:
+            return self.shared_memory_cache.get(self._cache_key(path), lambda: self._get_object(path))
+        if self.disk_cache is not None:
+            return self.disk_cache.open(*self._cached_object(path))
+        if self.object_cache is not None:
+            return memoryview(self._read(path)).toreadonly()
+        return memoryview(self._download_into_buffer(path)).toreadonly()
+
+    def release_buffer(self, path: str) -> None:
+        """Release the view got with get_buffer, the node's shared copy is freed once no process holds it."""
+        if self.shared_memory_cache is not None:
+            self.shared_memory_cache.release(self._cache_key(path))
+
+    def _cache_key(self, path: str) -> str:
+        key = os.path.join(self.post_fix, path).replace("\\", "/")
+        return f"{self.config.aws_endpoint or ''}/{self.bucket}/{key}"
 
     def put(self, data: io.BytesIO, path: str) -> bool:
-        return self._upload_to_s3(self.post_fix + "/" + path, data.getvalue())
+        # getvalue shares the buffer of the stream, other binary streams (e.g. files) are uploaded as they are read
+        body = data.getvalue() if isinstance(data, io.BytesIO) else data
+        uploaded = self._upload_to_s3(self.post_fix + "/" + path, body)
+        if self.object_cache is not None:
+            # after the upload, so a get racing with it does not cache the old object
+            self.object_cache.invalidate(self._cache_key(path))
+        return uploaded
+
+    def put_buffer(self, buffer, path: str) -> bool:
+        """Upload an object straight from a buffer (e.g. a NumPy array), which is not copied."""
+        # botocore sends bytes and bytearrays as they are, other buffers are read through a view
+        body = buffer if isinstance(buffer, (bytes, bytearray)) else BufferReader(buffer)
+        uploaded = self._upload_to_s3(self.post_fix + "/" + path, body)
+        if self.object_cache is not None:
+            self.object_cache.invalidate(self._cache_key(path))
+        return uploaded
+
+    def open_write(self, path: str, part_size: int = DEFAULT_PART_SIZE) -> MultipartWriter:
+        """
+        Open a stream that uploads the object while it is written, in parts of part_size bytes, and publishes it
+        when it is closed (see MultipartWriter).
+        """
+        if self.aws_s3 is None:
+            raise RuntimeError("AWS config not set.")
+        key = os.path.join(self.post_fix, path).replace("\\", "/")
+        on_publish = None
+        if self.object_cache is not None:
+            on_publish = partial(self.object_cache.invalidate, self._cache_key(path))
+        return MultipartWriter(self.aws_s3, self.bucket, key, part_size=part_size, on_publish=on_publish)
+
+    def open_read(
+        self, path: str, block_size: int = DEFAULT_BLOCK_SIZE, max_blocks: int = DEFAULT_MAX_BLOCKS
+    ) -> RangeReader:
+        """
+        Open a seekable stream over the object that downloads only the blocks that are read, with range requests
+        (see RangeReader).
+        """
+        if self.aws_s3 is None:
+            raise RuntimeError("AWS config not set.")
+        key = os.path.join(self.post_fix, path).replace("\\", "/")
+        return RangeReader(self.aws_s3, self.bucket, key, block_size=block_size, max_blocks=max_blocks)
+
+    def get_range(self, path: str, offset: int, length: int) -> bytes:
+        """Get length bytes of the object from offset with a single range request."""
+        if length <= 0:
+            return b""
+        if self.aws_s3 is None:
+            raise RuntimeError("AWS config not set.")
+        key = os.path.join(self.post_fix, path).replace("\\", "/")
+        response = self.aws_s3.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={offset}-{offset + length - 1}")
+        return response["Body"].read()
+
+    def open_stream(self, path: str):
+        """
+        Open the body of the object, which is read from the connection as it is consumed. The caches of the store
+        are not used.
+        """
+        if self.aws_s3 is None:
+            raise RuntimeError("AWS config not set.")
+        key = os.path.join(self.post_fix, path).replace("\\", "/")
+        return self.aws_s3.get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def list_paths(self, prefix: str) -> list[str]:
+        """List the paths of the objects under a prefix, relative to the root of the store."""
+        if self.aws_s3 is None:
+            raise RuntimeError("AWS config not set.")
+        root = os.path.join(self.post_fix, "").replace("\\", "/")
+        key = os.path.join(self.post_fix, prefix).replace("\\", "/")
+        paginator = self.aws_s3.get_paginator("list_objects_v2")
+        return [
+            content["Key"][len(root) :]
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=key)
+            for content in page.get("Contents", [])
+        ]
 
     def delete(self, path: str) -> bool:
         # standard file separators, replace \ with /
         key = os.path.join(self.post_fix, path).replace("\\", "/")
         if self.aws_s3 is not None:
             self.aws_s3.delete_object(Bucket=self.bucket, Key=key)
+            if self.object_cache is not None:
+                self.object_cache.invalidate(self._cache_key(path))
             return True
         return False
@@ -0,0 +1,233 @@
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from botocore.exceptions import ClientError
+from .plugin_manager import PluginManager
+
+try:
+    # optional, makes the filesystem usable by fsspec based libraries (xarray, zarr, pandas, dask)
+    from fsspec.spec import AbstractFileSystem
+except ImportError:
+    AbstractFileSystem = object
+
+
+# the methods take the keyword arguments of the fsspec interface they implement
+# pylint: disable=unused-argument
+class DataStoreFileSystem(AbstractFileSystem):
+    """
+    An fsspec filesystem over an S3 data store of the payload, so libraries built on fsspec read and write the
+    plugin's data with the SDK's credentials and shared S3 client.
+
+    Paths are relative to the root of the data store. With fsspec installed the filesystem is registered as the
+    "ccstore" protocol, e.g. xarray.open_zarr("ccstore://model/output.zarr", storage_options={"store_name": "s1"}).
+
+    Like fsspec's other filesystems, cat_file and cat_ranges return the bytes of a range up to the end of the file,
+    and b"" for a range that starts past it. cat_ranges reads many ranges at once: ranges of the same file that
+    overlap or are within `max_gap` bytes of each other are merged into one range request, and the requests are
+    made concurrently, e.g. for the chunks of a chunked array.
+
+    Attributes:
+    - store_name : str
+        The name of the data store in the payload.
+    - max_workers : int
+        The number of concurrent requests of cat_ranges and pipe.
+
+    Methods:
+    - ls(path, detail): lists a directory.
+    - info(path): describes a file or directory.
+    - cat_file(path, start, end): reads a file, or a range of it.
+    - cat_ranges(paths, starts, ends, max_gap, on_error): reads ranges of files concurrently.
+    - pipe(path, value): writes files, concurrently for a dict of paths to values.
+    - rm_file(path): deletes a file.
+
+    Raises:
+    - RuntimeError:
+        If the payload has no data store with the name.
+    """
+
+    protocol = ("ccstore",)
+    # the store of a name changes with the payload, e.g. between the events of run_events
+    cachable = False
+
+    def __init__(self, store_name: str, max_workers: int = 16, **storage_options):
+        super().__init__(**storage_options)
+        self.store_name = store_name
+        self.max_workers = max_workers
+        self._store = PluginManager.get_file_store(store_name)
+        self._client = self._store.aws_s3
+        self._bucket = self._store.bucket
+
+    @classmethod
+    def _strip_protocol(cls, path: str) -> str:
+        if path.startswith("ccstore://"):
+            path = path[len("ccstore://") :]
+        return path.strip("/")
+
+    def _key(self, path: str) -> str:
+        return posixpath.join(self._store.post_fix, self._strip_protocol(path))
+
+    def _prefix(self, path: str) -> str:
+        # the keys under a directory, "" rather than "/" for the root of a store at the root of the bucket
+        key = self._key(path).strip("/")
+        return key + "/" if key else ""
+
+    def _relative(self, key: str) -> str:
+        key = key.rstrip("/")
+        return posixpath.relpath(key, self._store.post_fix) if self._store.post_fix.strip("/") else key
+
+    def ls(self, path: str, detail: bool = True, **kwargs) -> list:  # pylint: disable=invalid-name
+        prefix = self._prefix(path)
+        entries = []
+        paginator = self._client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self._bucket, Prefix=prefix, Delimiter="/"):
+            for common_prefix in page.get("CommonPrefixes", []):
+                entries.append({"name": self._relative(common_prefix["Prefix"]), "size": 0, "type": "directory"})
+            for content in page.get("Contents", []):
+                entries.append(
+                    {
+                        "name": self._relative(content["Key"]),
+                        "size": content["Size"],
+                        "type": "file",
+                        "ETag": content["ETag"].strip('"'),
+                    }
+                )
+        if not entries:
+            # fsspec lists a file as itself
+            entries = [self.info(path)]
+        return entries if detail else [entry["name"] for entry in entries]
+
+    def info(self, path: str, **kwargs) -> dict[str, Any]:
+        key = self._key(path)
+        try:
+            head = self._client.head_object(Bucket=self._bucket, Key=key)
+            return {
+                "name": self._strip_protocol(path),
+                "size": head["ContentLength"],
+                "type": "file",
+                "ETag": head["ETag"].strip('"'),
+            }
+        except ClientError as exc:
+            if not isinstance(_translate(exc, path), FileNotFoundError):
+                raise
+        listing = self._client.list_objects_v2(Bucket=self._bucket, Prefix=self._prefix(path), MaxKeys=1)
+        if listing.get("KeyCount", 0):
+            return {"name": self._strip_protocol(path), "size": 0, "type": "directory"}
+        raise FileNotFoundError(path)
+
+    def cat_file(self, path: str, start: int | None = None, end: int | None = None, **kwargs) -> bytes:
+        if start is None and end is None:
+            try:
+                return self._store.get(self._strip_protocol(path)).getvalue()
+            except ClientError as exc:
+                raise _translate(exc, path) from exc
+        start, end = self._resolve_range(path, start, end)
+        return self._get_range(path, start, end)
+
+    def cat_ranges(  # pylint: disable=too-many-arguments,too-many-locals
+        self,
+        paths: list[str],
+        starts: list[int | None] | int | None,
+        ends: list[int | None] | int | None,
+        max_gap: int | None = None,
+        on_error: str = "return",
+        **kwargs,
+    ) -> list:
+        if not isinstance(starts, list):
+            starts = [starts] * len(paths)
+        if not isinstance(ends, list):
+            ends = [ends] * len(paths)
+        if not len(paths) == len(starts) == len(ends):
+            raise ValueError("paths, starts and ends must have the same length")
+        max_gap = max_gap or 0
+        results: list = [None] * len(paths)
+        resolved = {}
+        sizes = {}
+        by_path: dict[str, list[tuple[int, int, int]]] = {}
+        for index, (path, start, end) in enumerate(zip(paths, starts, ends)):
+            try:
+                resolved[index] = self._resolve_range(path, start, end, sizes)
+            except (ClientError, FileNotFoundError) as exc:
+                results[index] = exc
+                continue
+            by_path.setdefault(path, []).append((*resolved[index], index))
+        # the ranges of each file, sorted and merged when they overlap or are within max_gap bytes
+        requests = []
+        for path, ranges in by_path.items():
+            ranges.sort()
+            for start, end, index in ranges:
+                if requests and requests[-1][0] == path and start <= requests[-1][2] + max_gap:
+                    _, first, last, indexes = requests[-1]
+                    requests[-1] = (path, first, max(last, end), indexes + [index])
+                else:
+                    requests.append((path, start, end, [index]))
+
+        def fetch(request: tuple[str, int, int, list[int]]) -> None:
+            path, first, _, indexes = request
+            try:
+                data = memoryview(self._get_range(path, first, request[2]))
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                for index in indexes:
+                    results[index] = exc
+                return
+            for index in indexes:
+                start, end = resolved[index]
+                results[index] = data[start - first : end - first].tobytes()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(fetch, requests))
+        if on_error == "raise":
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+    def pipe(self, path: str | dict, value: bytes | None = None, **kwargs) -> None:
+        values = path if isinstance(path, dict) else {path: value}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(values) or 1)) as executor:
+            list(executor.map(lambda item: self.pipe_file(*item), values.items()))
+
+    def pipe_file(self, path: str, value: bytes, **kwargs) -> None:
+        if not self._store.put_buffer(value, self._strip_protocol(path)):
+            raise IOError(f"could not write {path}")
+
+    def rm_file(self, path: str) -> None:
+        self._store.delete(self._strip_protocol(path))
+
+    def _open(self, path: str, mode: str = "rb", **kwargs):
+        if "r" in mode:
+            return self._store.open_read(self._strip_protocol(path))
+        return self._store.open_write(self._strip_protocol(path))
+
+    def _resolve_range(
+        self, path: str, start: int | None, end: int | None, sizes: dict[str, int] | None = None
+    ) -> tuple[int, int]:
+        # fsspec ranges: None for the start or the end of the file, negative from the end of the file
+        start = start or 0
+        if end is None or end < 0 or start < 0:
+            sizes = {} if sizes is None else sizes
+            if path not in sizes:
+                sizes[path] = self.info(path)["size"]
+            size = sizes[path]
+            if end is None:
+                end = size
+            elif end < 0:
+                end += size
+            if start < 0:
+                start = max(start + size, 0)
+        return start, max(end, start)
+
+    def _get_range(self, path: str, start: int, end: int) -> bytes:
+        try:
+            return self._store.get_range(self._strip_protocol(path), start, end - start)
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in ("416", "InvalidRange"):
+                # the range starts at or past the end of the file
+                return b""
+            raise _translate(exc, path) from exc
+
+
+def _translate(exc: ClientError, path: str) -> Exception:
+    # fsspec users expect the built in exception of a missing file
+    if exc.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+        return FileNotFoundError(path)
+    return exc
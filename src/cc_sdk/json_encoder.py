@@ -1,5 +1,6 @@
 import json
 from enum import Enum
+from .compact_path_list import CompactPathList
 
 
 class EnumEncoder(json.JSONEncoder):
@@ -9,7 +10,7 @@ class EnumEncoder(json.JSONEncoder):
 
     It overrides the default() method of the JSONEncoder class to handle Enum objects by returning their name
     attribute instead of the object itself. This ensures that Enum objects are serialized to a JSON string that
-    represents their name.
+    represents their name. CompactPathList values are serialized as JSON arrays.
 
     Usage:
         To use this encoder, pass it as the cls argument when calling json.dumps(), as shown below:
@@ -30,4 +31,6 @@ class EnumEncoder(json.JSONEncoder):
     def default(self, o):
         if isinstance(o, Enum):
             return o.name
+        if isinstance(o, CompactPathList):
+            return list(o)
         return json.JSONEncoder.default(self, o)
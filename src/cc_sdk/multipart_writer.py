@@ -0,0 +1,175 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
+from typing import Callable
+from botocore.exceptions import ClientError
+from .output_writer import OutputWriter
+
+# the smallest part S3 accepts, except for the last part of an upload
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+# the most parts and the largest part of an upload S3 accepts
+MAX_PARTS = 10000
+MAX_PART_SIZE = 5 * 1024 * 1024 * 1024
+# the part size doubles every PARTS_PER_SIZE parts, so an upload of 8 MiB parts reaches the 5 TiB S3 allows for an
+# object before MAX_PARTS
+PARTS_PER_SIZE = 1000
+
+
+class MultipartWriter(OutputWriter):  # pylint: disable=too-many-instance-attributes
+    """
+    A writable binary stream that uploads to an S3 object while it is written.
+
+    Written bytes fill a part buffer. Each full part is uploaded as a part of an S3 multipart upload on a background
+    thread while the writer goes on filling the next one, so the upload overlaps the generation of the output and
+    at most `max_concurrency` parts plus the one being filled are held in memory. close() uploads the last part and
+    completes the upload, publishing the object. An output smaller than a part is uploaded with a single put.
+
+    If a part fails to upload, or the writer is discarded, garbage collected before it was closed, or left by a
+    with block that raised, the upload is aborted and nothing is published.
+
+    Attributes:
+    - bucket : str
+        The bucket of the object.
+    - key : str
+        The key of the object.
+    - part_size : int
+        The size of the first parts, at least 5 MiB. It doubles every 1,000 parts, up to 5 GiB, so that a large
+        output fits in the 10,000 parts of an upload.
+    - max_concurrency : int
+        The number of parts uploaded at the same time.
+
+    Methods:
+    - write(data): appends bytes-like data to the object.
+    - close(): uploads the rest of the object and publishes it.
+    - discard(): aborts the upload.
+
+    Raises:
+    - ValueError:
+        If part_size is less than 5 MiB.
+    - IOError:
+        From write, if the output needs more than 10,000 parts.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        client,
+        bucket: str,
+        key: str,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_concurrency: int = 2,
+        on_publish: Callable[[], None] | None = None,
+    ):
+        super().__init__()
+        self._client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self._on_publish = on_publish
+        self._part = bytearray()
+        self._part_size = part_size
+        self._size = 0
+        self._upload_id = None
+        self._executor = None
+        self._pending: deque[Future] = deque()
+        self._parts: list[dict] = []
+        self._part_count = 0
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+
+    def write(self, data) -> int:
+        if self.closed:  # pylint: disable=using-constant-test
+            raise ValueError("write to a closed MultipartWriter")
+        view = memoryview(data).cast("B")
+        position = 0
+        while position < len(view):
+            count = min(self._part_size - len(self._part), len(view) - position)
+            self._part += view[position : position + count]
+            position += count
+            if len(self._part) == self._part_size:
+                self._submit_part()
+        self._size += len(view)
+        return len(view)
+
+    def tell(self) -> int:
+        return self._size
+
+    def close(self) -> None:
+        if self.closed:  # pylint: disable=using-constant-test
+            return
+        try:
+            if self._upload_id is None:
+                self._client.put_object(Bucket=self.bucket, Key=self.key, Body=self._part)
+            else:
+                if self._part:
+                    self._submit_part()
+                while self._pending:
+                    self._parts.append(self._pending.popleft().result())
+                self._client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": sorted(self._parts, key=lambda part: part["PartNumber"])},
+                )
+        except BaseException:
+            self._abort()
+            raise
+        finally:
+            self._release()
+        if self._on_publish is not None:
+            self._on_publish()
+
+    def _discard(self) -> None:
+        # aborts the upload
+        try:
+            self._abort()
+        finally:
+            self._release()
+
+    def _submit_part(self) -> None:
+        try:
+            if self._upload_id is None:
+                response = self._client.create_multipart_upload(Bucket=self.bucket, Key=self.key)
+                self._upload_id = response["UploadId"]
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+            # bounds the memory held by the parts in flight
+            while len(self._pending) >= self.max_concurrency:
+                self._parts.append(self._pending.popleft().result())
+            if self._part_count == MAX_PARTS:
+                raise IOError(f"{self.key} needs more than the {MAX_PARTS} parts of an S3 multipart upload")
+            self._part_count += 1
+            if self._part_count % PARTS_PER_SIZE == 0:
+                # the next parts are larger, so that the upload fits in MAX_PARTS
+                self._part_size = min(2 * self._part_size, MAX_PART_SIZE)
+            # the part buffer is handed over, not copied, and a new one is filled
+            self._pending.append(self._executor.submit(self._upload_part, self._part_count, self._part))
+            self._part = bytearray()
+        except BaseException:
+            self._abort()
+            self._release()
+            raise
+
+    def _upload_part(self, part_number: int, data: bytearray) -> dict:
+        response = self._client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=part_number, Body=data
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def _abort(self) -> None:
+        for future in self._pending:
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._pending.clear()
+        if self._upload_id is not None:
+            # the upload is dropped by the bucket's lifecycle rules if this fails too
+            with suppress(ClientError):
+                self._client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+
+    def _release(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._part = bytearray()
+        super().close()
@@ -0,0 +1,162 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable
+from attr import define, field, validators
+
+
+@define(auto_attribs=True, frozen=True)
+class ObjectCacheStats:
+    """
+    A snapshot of the statistics of an ObjectCache.
+
+    Attributes:
+    - hits : int
+        The gets served from the cache. readonly
+    - misses : int
+        The gets that fetched the object. readonly
+    - coalesced : int
+        The gets that waited for the fetch of a concurrent miss instead of fetching. readonly
+    - evictions : int
+        The objects evicted to stay within the size budget. readonly
+    - entries : int
+        The number of objects in the cache. readonly
+    - size_bytes : int
+        The total size of the objects in the cache. readonly
+
+    Raises:
+    - FrozenInstanceError:
+        If any attribute is written to.
+    """
+
+    hits: int = field(validator=[validators.instance_of(int)])
+    misses: int = field(validator=[validators.instance_of(int)])
+    coalesced: int = field(validator=[validators.instance_of(int)])
+    evictions: int = field(validator=[validators.instance_of(int)])
+    entries: int = field(validator=[validators.instance_of(int)])
+    size_bytes: int = field(validator=[validators.instance_of(int)])
+
+    @property
+    def hit_ratio(self) -> float:
+        """The fraction of gets that did not fetch, 0 before the first get."""
+        gets = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / gets if gets else 0.0
+
+
+class ObjectCache:  # pylint: disable=too-many-instance-attributes
+    """
+    A thread safe, in memory LRU cache of objects, bounded by their total size in bytes.
+
+    Concurrent misses for the same key are collapsed into a single fetch: the first caller fetches the object and
+    the others wait for its result. A failed fetch is raised to every waiting caller and is not cached. Objects
+    larger than the whole budget are returned but not cached.
+
+    Attributes:
+    - max_bytes : int
+        The size budget of the cache.
+
+    Methods:
+    - get(key, fetch): returns the object, calling fetch on a miss.
+    - invalidate(key): drops the object, e.g. after it was overwritten.
+    - clear(): drops every object.
+    - stats(): returns an ObjectCacheStats snapshot.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._objects: OrderedDict[str, bytes] = OrderedDict()
+        self._in_flight: dict[str, Future] = {}
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, fetch: Callable[[], bytes]) -> bytes:
+        """
+        Get an object, fetching it on a miss.
+
+        Args:
+            key (str): Identifies the object, e.g. its bucket and key.
+            fetch (Callable): Fetches the object.
+
+        Returns:
+            bytes: The object.
+        """
+        fetch_here = False
+        with self._lock:
+            data = self._objects.get(key)
+            if data is not None:
+                self._objects.move_to_end(key)
+                self._hits += 1
+                return data
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._coalesced += 1
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                self._misses += 1
+                fetch_here = True
+        if not fetch_here:
+            return future.result()
+        try:
+            data = fetch()
+        except BaseException as exc:
+            with self._lock:
+                self._end_flight(key, future)
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            # not cached if the object was invalidated meanwhile
+            if self._end_flight(key, future):
+                self._store(key, data)
+        future.set_result(data)
+        return data
+
+    def invalidate(self, key: str) -> None:
+        """Drop an object. A fetch of the object in flight is not cached."""
+        with self._lock:
+            data = self._objects.pop(key, None)
+            if data is not None:
+                self._size -= len(data)
+            self._in_flight.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every object."""
+        with self._lock:
+            self._objects.clear()
+            self._in_flight.clear()
+            self._size = 0
+
+    def stats(self) -> ObjectCacheStats:
+        """A snapshot of the statistics of the cache."""
+        with self._lock:
+            return ObjectCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                coalesced=self._coalesced,
+                evictions=self._evictions,
+                entries=len(self._objects),
+                size_bytes=self._size,
+            )
+
+    def _end_flight(self, key: str, future: Future) -> bool:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+            return True
+        return False
+
+    def _store(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        previous = self._objects.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._objects[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            _, evicted = self._objects.popitem(last=False)
+            self._size -= len(evicted)
+            self._evictions += 1
@@ -0,0 +1,36 @@
+import io
+
+
+class OutputWriter(io.BufferedIOBase):
+    """
+    The base of the writable binary streams that publish an output when they are closed, and only then.
+
+    A with block that raises, discard(), or a writer garbage collected before it was closed do not publish
+    anything. Subclasses implement write, close, which publishes the output, and _discard, which releases what the
+    writer holds without publishing it.
+
+    Methods:
+    - close(): publishes the output.
+    - discard(): releases the output without publishing it.
+    """
+
+    def writable(self) -> bool:
+        return True
+
+    def discard(self) -> None:
+        """Release the output without publishing it."""
+        if not self.closed:  # pylint: disable=using-constant-test
+            self._discard()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+    def __del__(self) -> None:
+        # an output is only published by an explicit close
+        self.discard()
+
+    def _discard(self) -> None:
+        raise NotImplementedError
@@ -0,0 +1,315 @@
+import atexit
+import io
+import json
+import posixpath
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Type
+from .data_store import DataStore
+from .file_data_store import FileDataStore
+
+DEFAULT_SHARD_SIZE = 64 * 1024 * 1024
+DEFAULT_MAX_MEMBER_SIZE = 1024 * 1024
+DEFAULT_RELOAD_INTERVAL = 5.0
+
+_SHARD_SUFFIX = ".shard"
+_INDEX_SUFFIX = ".index.json"
+
+# the stores flushed at exit, a module level set so that the stores are not kept alive until then
+_stores = weakref.WeakSet()
+
+
+def _flush_all() -> None:
+    for store in list(_stores):
+        store.flush()
+
+
+atexit.register(_flush_all)
+
+
+class PackedFileDataStore(FileDataStore):  # pylint: disable=too-many-instance-attributes
+    """
+    A FileDataStore that packs small files into shard objects, so writing or reading tens of thousands of tiny
+    files costs a request per shard rather than one per file.
+
+    Files of up to `max_member_size` bytes written with put or put_buffer are appended to a shard in memory, which
+    is uploaded under `prefix` once it holds `shard_size` bytes, with an index recording the shard, offset and
+    length of each of its files. Larger files are written to the underlying store as usual. Reads of a packed file
+    (get, get_range, ...) are served by a range request of its bytes in its shard, and reads of any other path go
+    to the underlying store, so readers do not need to know which files were packed.
+
+    Each store instance writes its own shards and index, named after a random writer id, so processes may pack into
+    the same prefix at the same time. Each entry of an index records when the file was written, and a file written
+    unpacked leaves an entry without a shard, so the latest write of a path wins whichever writer made it. A reader
+    loads the indexes of all the writers of the prefix on its first read, and again when a path is not in them, at
+    most every `reload_interval` seconds.
+
+    The last shard is uploaded by flush, which PluginManager calls after each event of run_events that succeeds and
+    at exit. Call PluginManager.flush_outputs once the outputs of a plugin are written if they must be visible before
+    then. rollback drops the files packed since the last flush, which run_events calls when an event fails; the
+    files written unpacked to the underlying store stay.
+
+    Opt in by giving the data store in the payload a "pack" parameter, the prefix of the shards in the store, and
+    optionally "pack_shard_size" and "pack_max_member_size" in bytes. Readers of the outputs use the same
+    parameters.
+
+    Attributes:
+    - store : FileDataStore
+        The underlying store, which holds the shards, the indexes and the unpacked files.
+    - prefix : str
+        The path of the shards and indexes in the store.
+    - shard_size : int
+        The size from which a shard is uploaded.
+    - max_member_size : int
+        The size of the largest file that is packed.
+    - reload_interval : float
+        The minimum number of seconds between two loads of the indexes of the other writers.
+    - writer : str
+        The id naming the shards and the index of this store. readonly
+
+    Methods:
+    - flush(): uploads the pending shard and the index.
+    - rollback(): drops the files packed since the last flush.
+    - the other methods of FileDataStore.
+    """
+
+    PACK = "pack"
+    PACK_SHARD_SIZE = "pack_shard_size"
+    PACK_MAX_MEMBER_SIZE = "pack_max_member_size"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        store: FileDataStore,
+        prefix: str,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        max_member_size: int = DEFAULT_MAX_MEMBER_SIZE,
+        reload_interval: float = DEFAULT_RELOAD_INTERVAL,
+    ):
+        self.store = store
+        self.prefix = prefix.strip("/")
+        self.shard_size = shard_size
+        self.max_member_size = max_member_size
+        self.reload_interval = reload_interval
+        self._writer = uuid.uuid4().hex
+        self._lock = threading.RLock()
+        # the members written by this store, by path: (shard name, offset, length, time written), the shard is None
+        # if the file was written unpacked
+        self._members: dict[str, tuple[str | None, int, int, float]] = {}
+        # the members of the indexes of the other writers of the prefix, loaded on the first read
+        self._indexed: dict[str, tuple[str | None, int, int, float]] | None = None
+        self._loaded_at = 0.0
+        # the members as they were at the last flush, of the paths written since then (None if there was none)
+        self._journal: dict[str, tuple[str | None, int, int, float] | None] = {}
+        self._shard = bytearray()
+        self._shard_count = 0
+        self._index_changed = False
+        self._index_uploaded = False
+        _stores.add(self)
+
+    @classmethod
+    def from_data_store(cls, store: FileDataStore, data_store: DataStore) -> "PackedFileDataStore":
+        """Wrap the session of a data store, configured by the pack parameters of the data store."""
+        parameters = data_store.parameters
+        return cls(
+            store,
+            parameters[cls.PACK],
+            shard_size=int(parameters.get(cls.PACK_SHARD_SIZE, DEFAULT_SHARD_SIZE)),
+            max_member_size=int(parameters.get(cls.PACK_MAX_MEMBER_SIZE, DEFAULT_MAX_MEMBER_SIZE)),
+        )
+
+    @property
+    def writer(self) -> str:
+        return self._writer
+
+    def copy(self, dest_store: Type["FileDataStore"], src_path: str, dest_path: str) -> bool:
+        location = self._locate(src_path)
+        if location is None:
+            return self.store.copy(dest_store, src_path, dest_path)
+        return dest_store.put_buffer(self._read(location, 0, location[2]), dest_path)
+
+    def get(self, path: str) -> io.BytesIO:
+        location = self._locate(path)
+        if location is None:
+            return self.store.get(path)
+        return io.BytesIO(self._read(location, 0, location[2]))
+
+    def put(self, data: io.BytesIO, path: str) -> bool:
+        if isinstance(data, io.BytesIO):
+            return self.put_buffer(data.getbuffer(), path)
+        if data.seekable():
+            position = data.tell()
+            if data.seek(0, io.SEEK_END) - position <= self.max_member_size:
+                data.seek(position)
+                return self.put_buffer(data.read(), path)
+            data.seek(position)
+        self._forget(path)
+        return self.store.put(data, path)
+
+    def delete(self, path: str) -> bool:
+        # loads the indexes of the other writers if the path is not in them yet
+        location = self._locate(path)
+        if location is None:
+            return self.store.delete(path)
+        with self._lock:
+            if self._members.get(path) == location:
+                # the bytes stay in the shard, the index entry becomes an unpacked one of a missing file
+                self._set_member(path, (None, 0, 0, time.time()))
+                return True
+        # the member is in the shard of another writer
+        return False
+
+    def get_buffer(self, path: str) -> memoryview:
+        location = self._locate(path)
+        if location is None:
+            return self.store.get_buffer(path)
+        return memoryview(self._read(location, 0, location[2]))
+
+    def release_buffer(self, path: str) -> None:
+        if self._locate(path) is None:
+            self.store.release_buffer(path)
+
+    def put_buffer(self, buffer, path: str) -> bool:
+        view = memoryview(buffer).cast("B")
+        if len(view) > self.max_member_size:
+            self._forget(path)
+            return self.store.put_buffer(buffer, path)
+        with self._lock:
+            self._set_member(path, (self._shard_name(), len(self._shard), len(view), time.time()))
+            self._shard += view
+            if len(self._shard) >= self.shard_size:
+                self._upload_shard()
+        return True
+
+    def open_read(self, path: str) -> io.RawIOBase | io.BufferedIOBase:
+        if self._locate(path) is None:
+            return self.store.open_read(path)
+        return self.get(path)
+
+    def get_range(self, path: str, offset: int, length: int) -> bytes:
+        location = self._locate(path)
+        if location is None:
+            return self.store.get_range(path, offset, length)
+        return self._read(location, offset, length)
+
+    def open_stream(self, path: str) -> io.RawIOBase | io.BufferedIOBase:
+        if self._locate(path) is None:
+            return self.store.open_stream(path)
+        return self.get(path)
+
+    def open_write(self, path: str) -> io.BufferedIOBase:
+        # streamed files are not packed, so they keep the streaming of the underlying store, e.g. multipart uploads
+        self._forget(path)
+        return self.store.open_write(path)
+
+    def list_paths(self, prefix: str) -> list[str]:
+        return self.store.list_paths(prefix)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._shard:
+                self._upload_shard()
+            elif self._index_changed:
+                self._upload_index()
+            self._journal.clear()
+            self._index_uploaded = False
+
+    def rollback(self) -> None:
+        with self._lock:
+            # the pending shard holds only files packed since the last flush
+            self._shard = bytearray()
+            for path, location in self._journal.items():
+                if location is None:
+                    del self._members[path]
+                else:
+                    self._members[path] = location
+            self._journal.clear()
+            if self._index_uploaded:
+                # a shard filled up since the last flush, its index lists the files dropped
+                self._upload_index()
+                self._index_uploaded = False
+            else:
+                self._index_changed = False
+
+    def _shard_name(self) -> str:
+        return f"{self._writer}-{self._shard_count:05d}{_SHARD_SUFFIX}"
+
+    def _upload_shard(self) -> None:
+        shard = self._shard
+        if not self.store.put_buffer(shard, posixpath.join(self.prefix, self._shard_name())):
+            raise IOError(f"could not store the shard {self._shard_name()} in {self.prefix}")
+        self._shard = bytearray()
+        self._shard_count += 1
+        self._upload_index()
+
+    def _upload_index(self) -> None:
+        # the index lists the members of the uploaded shards only
+        pending = self._shard_name()
+        members = {path: location for path, location in self._members.items() if location[0] != pending}
+        index = json.dumps({"members": members}).encode()
+        if not self.store.put_buffer(index, posixpath.join(self.prefix, self._writer + _INDEX_SUFFIX)):
+            raise IOError(f"could not store the index of {self.prefix}")
+        self._index_changed = False
+        self._index_uploaded = True
+
+    def _set_member(self, path: str, location: tuple[str | None, int, int, float]) -> None:
+        if path not in self._journal:
+            self._journal[path] = self._members.get(path)
+        self._members[path] = location
+        self._index_changed = True
+
+    def _forget(self, path: str) -> None:
+        # a file written unpacked replaces a packed one of the same path, of this writer or any other
+        with self._lock:
+            self._set_member(path, (None, 0, 0, time.time()))
+
+    def _locate(self, path: str) -> tuple[str, int, int, float] | None:
+        with self._lock:
+            own = self._members.get(path)
+            indexed = self._indexed.get(path) if self._indexed is not None else None
+            reload = own is None and indexed is None and time.monotonic() - self._loaded_at >= self.reload_interval
+        if reload:
+            # the path may have been packed by another writer since the indexes were loaded, they are loaded
+            # without the lock so that the other threads keep writing and reading meanwhile
+            started_at = time.monotonic()
+            loaded = self._load_indexes()
+            with self._lock:
+                # a load started later by another thread is not replaced
+                if started_at >= self._loaded_at:
+                    self._indexed = loaded
+                    self._loaded_at = started_at
+                own = self._members.get(path)
+                indexed = self._indexed.get(path)
+        # the latest write wins
+        location = indexed if own is None or (indexed is not None and indexed[3] > own[3]) else own
+        return location if location is not None and location[0] is not None else None
+
+    def _load_indexes(self) -> dict[str, tuple[str | None, int, int, float]]:
+        own = self._writer + _INDEX_SUFFIX
+        # the trailing slash leaves out the sibling prefixes, e.g. packed2/ of packed
+        paths = [
+            path
+            for path in self.store.list_paths(posixpath.join(self.prefix, ""))
+            if path.endswith(_INDEX_SUFFIX) and posixpath.basename(path) != own
+        ]
+        if not paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(paths), 8)) as executor:
+            indexes = list(executor.map(lambda path: json.loads(self.store.get(path).getvalue()), paths))
+        members = {}
+        for index in indexes:
+            for path, location in index["members"].items():
+                # the latest write of a path wins, whichever writer made it
+                if path not in members or location[3] > members[path][3]:
+                    members[path] = tuple(location)
+        return members
+
+    def _read(self, location: tuple[str, int, int, float], offset: int, length: int) -> bytes:
+        shard, start, size, _ = location
+        length = max(min(length, size - offset), 0)
+        with self._lock:
+            if shard == self._shard_name():
+                return bytes(memoryview(self._shard)[start + offset : start + offset + length])
+        return self.store.get_range(posixpath.join(self.prefix, shard), start + offset, length)
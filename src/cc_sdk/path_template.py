@@ -0,0 +1,137 @@
+import re
+from functools import lru_cache
+from typing import Callable
+
+# the text inside a pair of curly braces, e.g. "ENV::CC_EVENT_NUMBER" in "{ENV::CC_EVENT_NUMBER}"
+_PLACEHOLDER = re.compile(r"\{([^{}\0]+)\}")
+
+# joins the paths rendered together by render_path_templates, it cannot appear in environment variables
+_SEPARATOR = "\0"
+
+# the placeholder prefixes that are substituted, others are left in the path as they are
+PLACEHOLDER_PREFIXES = frozenset(("ENV", "ATTR"))
+
+# longer templates are not memoized, the caches would keep them alive
+_MAX_CACHED_TEMPLATE_LENGTH = 4096
+
+
+@lru_cache(maxsize=4096)
+def compile_path_template(template: str) -> tuple:
+    """
+    Parse a path template into its segments.
+
+    The segments are returned in order. Literal text is returned as a str and each
+    placeholder as a (prefix, name) tuple, e.g. "{ATTR::scenario}/data.csv"
+    compiles to (("ATTR", "scenario"), "/data.csv"). Placeholders whose
+    prefix is not ENV or ATTR are kept as literal text. Templates are memoized,
+    so paths shared between data sources (or events) are parsed once.
+
+    Args:
+        template (str): The path template.
+
+    Returns:
+        tuple: The segments of the template.
+    """
+    segments = []
+    position = 0
+    for match in _PLACEHOLDER.finditer(template):
+        parts = match.group(1).split("::", 1)
+        if len(parts) != 2 or parts[0] not in PLACEHOLDER_PREFIXES:
+            # stays part of the surrounding literal text
+            continue
+        if match.start() > position:
+            segments.append(template[position : match.start()])
+        segments.append((parts[0], parts[1]))
+        position = match.end()
+    if position < len(template):
+        segments.append(template[position:])
+    return tuple(segments)
+
+
+@lru_cache(maxsize=4096)
+def compile_path_format(template: str) -> tuple[str, tuple]:
+    """
+    Compile a path template into a str.format string.
+
+    Literal braces are escaped and each distinct placeholder becomes a
+    positional field, so rendering the template is a single str.format call
+    however many placeholders it has, e.g. "{ATTR::a}/{ENV::B}/{ATTR::a}"
+    compiles to ("{0}/{1}/{0}", (("ATTR", "a"), ("ENV", "B"))).
+
+    Args:
+        template (str): The path template.
+
+    Returns:
+        tuple: The format string and the distinct placeholders, in the order of their fields.
+    """
+    return _path_format(compile_path_template(template))
+
+
+def _path_format(segments: tuple) -> tuple[str, tuple]:
+    placeholders = {}
+    parts = []
+    for segment in segments:
+        if isinstance(segment, str):
+            parts.append(segment.replace("{", "{{").replace("}", "}}"))
+        else:
+            parts.append("{" + str(placeholders.setdefault(segment, len(placeholders))) + "}")
+    return "".join(parts), tuple(placeholders)
+
+
+def render_path_template(template: str, resolve: Callable[[tuple[str, str]], str]) -> str:
+    """
+    Substitute the placeholders of a path template in a single pass.
+
+    Args:
+        template (str): The path template.
+        resolve (Callable): Returns the value of a (prefix, name) placeholder, called once per distinct placeholder.
+
+    Returns:
+        str: The rendered path. Values are not searched for further placeholders.
+    """
+    if "{" not in template:
+        return template
+    if len(template) > _MAX_CACHED_TEMPLATE_LENGTH:
+        path_format, placeholders = _path_format(compile_path_template.__wrapped__(template))
+    else:
+        path_format, placeholders = compile_path_format(template)
+    return path_format.format(*map(resolve, placeholders))
+
+
+def render_path_templates(templates: list[str], resolve: Callable[[tuple[str, str]], str]) -> list[str]:
+    """
+    Substitute the placeholders of many path templates at once.
+
+    The templates are joined and rendered by a single regular expression pass,
+    so the cost is linear in their total length and each distinct placeholder
+    is resolved once, however many paths use it.
+
+    Args:
+        templates (list[str]): The path templates.
+        resolve (Callable): Returns the value of a (prefix, name) placeholder.
+
+    Returns:
+        list[str]: The rendered paths, in the order of `templates`.
+    """
+    joined = _SEPARATOR.join(templates)
+    if "{" not in joined:
+        return list(templates)
+    values = {}
+
+    def substitute(match) -> str:
+        text = match.group(0)
+        value = values.get(text)
+        if value is None:
+            parts = match.group(1).split("::", 1)
+            if len(parts) != 2 or parts[0] not in PLACEHOLDER_PREFIXES:
+                value = text
+            else:
+                value = resolve((parts[0], parts[1]))
+            values[text] = value
+        return value
+
+    rendered = _PLACEHOLDER.sub(substitute, joined).split(_SEPARATOR)
+    if len(rendered) != len(templates):
+        # a template or a value contained the separator, render the paths one by one
+        return [render_path_template(template, resolve) for template in templates]
+    return rendered
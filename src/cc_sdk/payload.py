@@ -2,9 +2,20 @@ import json
 from typing import Any
 from attr import define, field, setters, asdict, validators, filters, fields
 from .data_source import DataSource
+from .compact_path_list import CompactPathList
 from .data_store import DataStore
 from .json_encoder import EnumEncoder
-from .validators import validate_homogeneous_list, validate_serializable
+from .validators import (
+    validate_homogeneous_list,
+    validate_serializable,
+    construct_unvalidated,
+)
+
+try:
+    # optional, decodes large payloads faster than the standard library
+    import orjson
+except ImportError:
+    orjson = None
 
 
 @define(auto_attribs=True)
@@ -84,28 +95,76 @@ class Payload:
         )
 
     @staticmethod
-    def from_json(json_str: str):
+    def from_json(json_str: str | bytes, validate: bool = True, compact: bool = False):
         """
         Converts a JSON string to a Payload object.
 
+        The JSON is decoded with orjson when it is installed, and with the
+        standard library if orjson rejects it (NaN, infinities and integers
+        wider than 64 bits are valid for json.loads). Every decoded
+        value is validated once; decoded attributes are JSON by definition, so
+        they are not serialized again to check that they are serializable.
+        Set `validate` to False to skip validation altogether for payloads
+        from a trusted source, such as the output of `serialize`.
+
+        Set `compact` to store the paths and data paths of the data sources as
+        CompactPathList objects, which take a fraction of the memory of lists
+        for manifests with many paths.
+
         Args:
-            json_str (str): The JSON string to convert.
+            json_str (str | bytes): The JSON string to convert.
+            validate (bool): Whether to type check the decoded values.
+            compact (bool): Whether to store paths as CompactPathList objects.
 
         Returns:
             Payload: The deserialized Payload object.
 
         Raises:
             JSONDecodeError: If the JSON string cannot be decoded.
+            TypeError: If a value has the wrong type.
+            ValueError: If a list has elements of the wrong type.
 
         """
         # TODO should we expect camelCase for attribute names?
-        json_dict = json.loads(json_str)
-        stores = [DataStore(**store) for store in json_dict["stores"]]
-        inputs = [DataSource(**input) for input in json_dict["inputs"]]
-        outputs = [DataSource(**output) for output in json_dict["outputs"]]
-        return Payload(
-            attributes=json_dict["attributes"],
-            stores=stores,
-            inputs=inputs,
-            outputs=outputs,
+        # pylint can't inspect the orjson extension module
+        # pylint: disable=no-member
+        if orjson is not None:
+            try:
+                json_dict = orjson.loads(json_str)
+            except orjson.JSONDecodeError:
+                # orjson rejects NaN, infinities and integers wider than 64 bits, which serialize emits
+                json_dict = json.loads(json_str)
+        else:
+            json_dict = json.loads(json_str)
+        if compact:
+            for data_source in json_dict["inputs"] + json_dict["outputs"]:
+                # CompactPathList checks that every path is a str
+                data_source["paths"] = CompactPathList(data_source["paths"])
+                data_source["data_paths"] = CompactPathList(data_source["data_paths"])
+        if validate:
+            if not isinstance(json_dict["attributes"], dict):
+                raise TypeError("attributes must be a dict")
+            stores = [DataStore(**store) for store in json_dict["stores"]]
+            inputs = [DataSource(**input) for input in json_dict["inputs"]]
+            outputs = [DataSource(**output) for output in json_dict["outputs"]]
+        else:
+            stores = [
+                construct_unvalidated(DataStore, store) for store in json_dict["stores"]
+            ]
+            inputs = [
+                construct_unvalidated(DataSource, input) for input in json_dict["inputs"]
+            ]
+            outputs = [
+                construct_unvalidated(DataSource, output)
+                for output in json_dict["outputs"]
+            ]
+        # the lists are built above, only their elements needed checking
+        return construct_unvalidated(
+            Payload,
+            {
+                "attributes": json_dict["attributes"],
+                "stores": stores,
+                "inputs": inputs,
+                "outputs": outputs,
+            },
         )
@@ -1,6 +1,12 @@
-import re
 import os
 import io
+import sys
+import threading
+import operator
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, Type
 from botocore.exceptions import ClientError
 from .cc_store_s3 import CCStoreS3
 from .payload import Payload
@@ -12,6 +18,12 @@ from .file_data_store import FileDataStore
 from . import environment_variables
 from .data_store import DataStore
 from .data_source import DataSource
+from .compact_path_list import CompactPathList
+from .path_template import render_path_template, render_path_templates
+from .records import iter_records
+from .archive_reader import ArchiveReader
+from .packed_store import PackedFileDataStore
+from .columnar_writer import ColumnarWriter
 from .message import Message
 from .error import Error
 from .status import Status
@@ -23,6 +35,17 @@ class PluginManager:
     a payload that defines the input and output data sources and data stores to be used by a plugin. It also provides
     methods to retrieve files from and store files in the data stores.
 
+    The payload is read from the CC_PAYLOAD_FORMATTED environment variable (the payload JSON or the path to a local
+    file) when it is set, and from S3 otherwise.
+
+    Set the CC_PAYLOAD_COMPACT environment variable to hold the paths of the payload in CompactPathList objects,
+    which saves memory for payloads with many paths.
+
+    The session objects of the data stores are created the first time a store is used. Set the
+    CC_EAGER_STORE_SESSIONS environment variable to create all of them concurrently at start up instead.
+
+    A single process can compute many events with run_events, which keeps the S3 clients, store sessions and the
+    plugin's own state warm between events.
 
     Methods:
         get_payload(cls) -> Payload:
@@ -50,11 +73,45 @@ class PluginManager:
         Returns the content of a file associated with the specified data source and path index.
 
         put_file(cls, data: bytes, data_source: DataSource, path_index: int) -> bool:
-        Stores the given data in the file associated with the specified data source and path index.
+        Stores the given data, bytes or any bytes-like object, in the file associated with the specified data source and
+        path index.
 
         file_writer(cls, input_stream: io.BytesIO, dest_data_source: DataSource, dest_path_index: int) -> bool:
         Stores data from the given input stream in the file associated with the specified data source and path index.
 
+        get_file_buffer(cls, data_source: DataSource, path_index: int) -> memoryview:
+        Returns a read only view of the content of a file, shared with the other processes of the node when the
+        CC_SHARED_MEMORY_CACHE environment variable is set. Release it with release_file_buffer.
+
+        get_array(cls, data_source: DataSource, path_index: int, dtype, shape) -> numpy.ndarray:
+        Returns a read only NumPy array over the buffer of get_file_buffer, without copying it.
+
+        put_array(cls, array: numpy.ndarray, data_source: DataSource, path_index: int) -> bool:
+        Stores the bytes of a NumPy array, uploaded straight from its memory.
+
+        open_writer(cls, dest_data_source: DataSource, dest_path_index: int) -> io.BufferedIOBase:
+        Returns a writable stream that stores what was written in the file associated with the specified data source
+        and path index when it is closed, spilling to a temporary file past a memory threshold.
+
+        open_columnar_writer(cls, dest_data_source: DataSource, dest_path_index: int, columns: dict) -> ColumnarWriter:
+        Returns a writer of rows to a Parquet or Arrow IPC file, encoded and uploaded a row group at a time.
+
+        open_reader(cls, data_source: DataSource, path_index: int) -> io.RawIOBase | io.BufferedIOBase:
+        Returns a seekable stream over the file associated with the specified data source and path index, which
+        downloads only the parts of the file that are read.
+
+        iter_records(cls, data_source: DataSource, path_index: int, format: str | None, **options) -> Iterator:
+        Returns an iterator over the lines, CSV rows or JSON lines of a file, decoded as the file is downloaded.
+
+        open_archive(cls, data_source: DataSource, path_index: int, **options) -> ArchiveReader:
+        Returns a reader of the members of a zip or tar archive, which downloads only the members it reads.
+
+        flush_outputs(cls) -> None:
+        Stores what the store sessions buffer, e.g. the pending shard of the stores that pack small files.
+
+        rollback_outputs(cls) -> None:
+        Drops what the store sessions buffered since the last flush_outputs, e.g. the outputs of a failed event.
+
         file_reader(cls, data_source: DataSource, path_index: int) -> io.BytesIO:
         Returns a stream object that can be used to read the contents of the file associated with the specified data
         source and path index.
@@ -77,10 +134,17 @@ class PluginManager:
 
         event_number(cls) -> int:
         Returns the event number associated with the current instance.
+
+        run_events(cls, handler: Callable[[int], Any], events: Iterable[int] | None, prefetch: bool) -> dict:
+        Runs the handler for each event number, loading the payload of each event in turn.
+
+        map_paths(cls, func: Callable[[str, bytes | None], Any], data_source: DataSource, processes: int) -> Iterator:
+        Calls func on every path of the data source, and its content, in a pool of worker processes.
     """
 
     _instance = None  # the instance of this singleton class
     _has_updated_paths = False  # have the paths been updated? this happens the first time the payload is requested with get_payload()
+    _session_lock = threading.Lock()  # guards the lazy creation of data store sessions
 
     def __new__(cls):
         if not cls._instance:
@@ -88,44 +152,35 @@ class PluginManager:
             cls._init()
         return cls._instance
 
+    @classmethod
+    def _after_fork_in_child(cls) -> None:
+        """
+        Reset the singleton in a child forked to compute its own event (see zygote and map_paths), which must load
+        its own payload. The shared S3 clients are kept (see cc_store_s3), so the child skips creating them. Other
+        forks, e.g. the plugin's own process pools, keep the state of the parent.
+        """
+        cls._instance = None
+        cls._session_lock = threading.Lock()
+
     @classmethod
     def _init(cls):
-        cls._pattern = re.compile(
-            r"(?<=\{).+?(?=\})"
-        )  # matchs first string inside curly braces
         sender = os.getenv(environment_variables.CC_PLUGIN_DEFINITION)
         if sender is None:
             raise EnvironmentError(
                 f"{environment_variables.CC_PLUGIN_DEFINITION} environment variable not set"
             )
         cls._logger = Logger(ErrorLevel.DEBUG, sender)
-        cls._cc_store = CCStoreS3()
         try:
-            cls._payload: Payload = cls._cc_store.get_payload()
-            # pylint can't determine stores type
-            # pylint: disable=not-an-iterable
-            for store in cls._payload.stores:
-                match store.store_type:
-                    case StoreType.S3:
-                        # store is a reference so this updates the payload object
-                        store.session = FileDataStoreS3(store)
-                    case StoreType.WS:
-                        # TODO
-                        raise NotImplementedError(
-                            "Payload StoreType 'WS' not implemented"
-                        )
-                    case StoreType.RDBMS:
-                        # TODO
-                        raise NotImplementedError(
-                            "Payload StoreType 'RDBMS' not implemented"
-                        )
-                    case StoreType.EBS:
-                        # TODO
-                        raise NotImplementedError(
-                            "Payload StoreType 'EBS' not implemented"
-                        )
-                    case _:
-                        raise RuntimeError("Payload contains invalid StoreType.")
+            # a payload handed over by the orchestrator saves creating the S3 client and the GET
+            cls._cc_store = None
+            cls._compact = bool(os.getenv(environment_variables.CC_PAYLOAD_COMPACT))
+            payload = CCStoreS3.get_local_payload(cls._compact)
+            if payload is None:
+                cls._cc_store = CCStoreS3()
+                payload = cls._cc_store.get_payload(cls._compact)
+            cls._install_payload(payload)
+            if os.getenv(environment_variables.CC_EAGER_STORE_SESSIONS):
+                cls._open_sessions(cls._payload.stores)
         except EnvironmentError as exc:
             raise exc
         except NotImplementedError as exc:
@@ -135,59 +190,143 @@ class PluginManager:
                 f"Could not acquire payload file. ERROR: {str(exc)}"
             ) from exc
 
+    @classmethod
+    def _install_payload(cls, payload: Payload, previous: Payload | None = None) -> None:
+        """
+        Make `payload` the current payload, with its paths not substituted yet. The sessions of the stores of the
+        `previous` payload are kept for the identical stores of the new one.
+        """
+        # fail fast on unsupported store types, but defer creating the sessions
+        # pylint can't determine stores type
+        # pylint: disable=not-an-iterable
+        for store in payload.stores:
+            cls._session_type(store.store_type)
+        if previous is not None:
+            sessions = {
+                (store.name, store.store_type, store.ds_profile, repr(store.parameters)): store.session
+                for store in previous.stores
+                if store.session is not None
+            }
+            for store in payload.stores:
+                key = (store.name, store.store_type, store.ds_profile, repr(store.parameters))
+                if store.session is None and key in sessions:
+                    store.session = sessions[key]
+        cls._payload: Payload = payload
+        # the data sources before substitution, restored for every event by run_events
+        cls._source_templates = (list(payload.inputs), list(payload.outputs))
+        cls._has_updated_paths = False
+        cls._build_indexes()
+
+    @classmethod
+    def _reset_paths(cls) -> None:
+        """Restore the data sources of the payload to their templates so they are substituted again."""
+        inputs, outputs = cls._source_templates
+        cls._payload.inputs[:] = inputs
+        cls._payload.outputs[:] = outputs
+        cls._has_updated_paths = False
+        cls._build_indexes()
+
+    @staticmethod
+    def _session_type(store_type: StoreType) -> Type[FileDataStore]:
+        """
+        Get the session class used for data stores of the given type.
+
+        Raises:
+            NotImplementedError: If the store type is not supported yet.
+            RuntimeError: If the store type is invalid.
+        """
+        match store_type:
+            case StoreType.S3:
+                return FileDataStoreS3
+            case StoreType.WS:
+                # TODO
+                raise NotImplementedError("Payload StoreType 'WS' not implemented")
+            case StoreType.RDBMS:
+                # TODO
+                raise NotImplementedError("Payload StoreType 'RDBMS' not implemented")
+            case StoreType.EBS:
+                # TODO
+                raise NotImplementedError("Payload StoreType 'EBS' not implemented")
+            case _:
+                raise RuntimeError("Payload contains invalid StoreType.")
+
+    @classmethod
+    def _open_session(cls, store: DataStore) -> None:
+        """
+        Create the session object of a data store if it does not have one yet. Sessions are created on first use
+        because most plugins only touch a few of the stores in their payload.
+        """
+        with cls._session_lock:
+            cls._create_session(store)
+
+    @classmethod
+    def _open_sessions(cls, stores: list[DataStore]) -> None:
+        """Create the session objects of all the given data stores concurrently."""
+        if len(stores) == 0:
+            return
+        with ThreadPoolExecutor(max_workers=min(len(stores), 8)) as executor:
+            # consume the results so that errors are raised here
+            list(executor.map(cls._create_session, stores))
+
+    @classmethod
+    def _create_session(cls, store: DataStore) -> None:
+        if store.session is None:
+            session = cls._session_type(store.store_type)(store)
+            if store.parameters.get(PackedFileDataStore.PACK):
+                # opt in packing of small files into shards
+                session = PackedFileDataStore.from_data_store(session, store)
+            # store is a reference so this updates the payload object
+            store.session = session
+
     @classmethod
     def _substitute_path_variables(cls) -> None:
         """
         Substitute placeholders in all input and output paths of the payload.
 
-        For each input and output path in the payload, this function calls the
-        `_substitute_data_source_path` method to substitute any placeholders
-        found in the path with their corresponding values.
+        Each data source is replaced by a copy with the placeholders in its name, paths and data paths substituted.
+        Every distinct ENV and ATTR placeholder is resolved once for the whole payload.
 
-        This function modifies the input and output paths in-place.
+        This function modifies the input and output lists in-place.
 
         Returns:
             None
         """
-        # pylint can't determine types from Payload
-        # pylint: disable=unsubscriptable-object
-        for i, _ in enumerate(cls._payload.inputs):
-            existing_data_source = cls._payload.inputs[i]
-            updated_data_source = DataSource(
-                name=cls.substitute_paths(existing_data_source.name),
-                id=existing_data_source.id,
-                store_name=existing_data_source.store_name,
-                paths=[
-                    cls.substitute_paths(path) for path in existing_data_source.paths
-                ],
-                data_paths=[
-                    cls.substitute_paths(path)
-                    for path in existing_data_source.data_paths
-                ],
-            )
-            cls._payload.inputs[i] = updated_data_source
-        for i, _ in enumerate(cls._payload.outputs):
-            existing_data_source = cls._payload.outputs[i]
-            updated_data_source = DataSource(
-                name=cls.substitute_paths(existing_data_source.name),
-                id=existing_data_source.id,
-                store_name=existing_data_source.store_name,
-                paths=[
-                    cls.substitute_paths(path) for path in existing_data_source.paths
-                ],
-                data_paths=[
-                    cls.substitute_paths(path)
-                    for path in existing_data_source.data_paths
-                ],
-            )
-            cls._payload.outputs[i] = updated_data_source
+        resolved = {}
+        for data_sources in (cls._payload.inputs, cls._payload.outputs):
+            for i, existing_data_source in enumerate(data_sources):
+                # assignment op does work, pylint just doesn't know it
+                # pylint: disable=unsupported-assignment-operation
+                data_sources[i] = DataSource(
+                    name=cls._render_path(existing_data_source.name, resolved),
+                    id=existing_data_source.id,
+                    store_name=existing_data_source.store_name,
+                    paths=cls._substitute_path_list(existing_data_source.paths, resolved),
+                    data_paths=cls._substitute_path_list(existing_data_source.data_paths, resolved),
+                )
         # TODO: substitute paths for actions once they are implemented
+        cls._build_indexes()
+
+    @classmethod
+    def _substitute_path_list(
+        cls, paths: list[str] | CompactPathList, resolved: dict
+    ) -> list[str] | CompactPathList:
+        """Substitute placeholders in every path of a list, keeping compact lists compact."""
+        substituted = render_path_templates(
+            list(paths), lambda placeholder: cls._resolve_cached(placeholder, resolved)
+        )
+        if isinstance(paths, CompactPathList):
+            return CompactPathList(substituted)
+        return substituted
 
     @classmethod
     def substitute_paths(cls, path) -> str:
         """
         Substitute placeholders in a data source path with their corresponding values.
 
+        Placeholders have the form {ENV::<environment variable name>} or {ATTR::<payload attribute name>}. The path is
+        parsed once into literal text and placeholders (see path_template.compile_path_template) and rendered in a
+        single pass, so values are not searched for further placeholders.
+
         Args:
             path (str): A string containing placeholders to substitute.
 
@@ -195,30 +334,40 @@ class PluginManager:
             str: The `path` string with all placeholders substituted with their values.
 
         Raises:
+            EnvironmentError: If a placeholder refers to an environment variable that is not set.
             RuntimeError: If a placeholder refers to a missing attribute in the payload's `attributes` dictionary.
         """
-        the_match = cls._pattern.search(path)
-        while the_match:
-            result = the_match.group()
-            parts = result.split("::", 1)
-            prefix = parts[0]
-            if prefix == "ENV":
-                val = os.getenv(parts[1])
-                if val is None:
-                    raise EnvironmentError(f"Environment variable {parts[1]} is not set but required for path '{path}'")
-                path = path.replace("{" + result + "}", val)
-            elif prefix == "ATTR":
-                try:
-                    # pylint can't determine attributes type
-                    # pylint: disable=unsubscriptable-object
-                    valattr = str(cls._payload.attributes[parts[1]])
-                    path = path.replace("{" + result + "}", valattr)
-                except KeyError as exc:
-                    raise RuntimeError(
-                        f"Payload attributes has no key {parts[1]}."
-                    ) from exc
-            the_match = cls._pattern.search(path)
-        return path
+        return cls._render_path(path, {})
+
+    @classmethod
+    def _render_path(cls, path: str, resolved: dict) -> str:
+        return render_path_template(
+            path, lambda placeholder: cls._resolve_cached(placeholder, resolved)
+        )
+
+    @classmethod
+    def _resolve_cached(cls, placeholder: tuple[str, str], resolved: dict) -> str:
+        """Resolve a placeholder once per substitution pass, `resolved` holds the values of the pass."""
+        value = resolved.get(placeholder)
+        if value is None:
+            value = cls._resolve_placeholder(placeholder)
+            resolved[placeholder] = value
+        return value
+
+    @classmethod
+    def _resolve_placeholder(cls, placeholder: tuple[str, str]) -> str:
+        prefix, name = placeholder
+        if prefix == "ENV":
+            val = os.getenv(name)
+            if val is None:
+                raise EnvironmentError(f"Environment variable {name} is not set but required for the payload paths")
+            return val
+        try:
+            # pylint can't determine attributes type
+            # pylint: disable=unsubscriptable-object
+            return str(cls._payload.attributes[name])
+        except KeyError as exc:
+            raise RuntimeError(f"Payload attributes has no key {name}.") from exc
 
     @classmethod
     def get_payload(cls) -> Payload:
@@ -232,6 +381,8 @@ class PluginManager:
         data_store = cls._find_data_store(store_name)
         if data_store is None:
             raise RuntimeError(f"DataStore with name '{store_name}' was not found.")
+        if data_store.session is None:
+            cls._open_session(data_store)
         if isinstance(data_store.session, FileDataStore):
             return data_store.session
         raise RuntimeError("DataStore session object is invalid.")
@@ -277,10 +428,60 @@ class PluginManager:
         except IndexError:
             return None
 
+    @classmethod
+    def get_file_buffer(cls, data_source: DataSource, path_index: int) -> memoryview:
+        store = cls.get_file_store(data_source.store_name)
+        return store.get_buffer(data_source.paths[path_index])
+
+    @classmethod
+    def release_file_buffer(cls, data_source: DataSource, path_index: int) -> None:
+        store = cls.get_file_store(data_source.store_name)
+        store.release_buffer(data_source.paths[path_index])
+
+    @classmethod
+    def get_array(cls, data_source: DataSource, path_index: int, dtype, shape: tuple | None = None):
+        """
+        Get the content of a file as a NumPy array, without copying it.
+
+        The file is downloaded into a buffer allocated to its size, or shared through the caches of the store (see
+        get_file_buffer), and the array is a read only view of that buffer. With a shared memory cache, call
+        release_file_buffer once the array is no longer used.
+
+        Args:
+            data_source (DataSource): The data source of the file.
+            path_index (int): The index of the path of the file.
+            dtype: The NumPy data type of the elements, e.g. "<f8".
+            shape (tuple): The shape of the array. If None, the array is flat.
+
+        Returns:
+            numpy.ndarray: The read only array.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+            ValueError: If the size of the file does not match the dtype and shape.
+        """
+        numpy = _import_numpy()
+        array = numpy.frombuffer(cls.get_file_buffer(data_source, path_index), dtype=dtype)
+        return array if shape is None else array.reshape(shape)
+
+    @classmethod
+    def put_array(cls, array, data_source: DataSource, path_index: int) -> bool:
+        """
+        Store the bytes of a NumPy array in C order. Contiguous arrays are uploaded straight from their memory,
+        others are copied once into a contiguous array first.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        numpy = _import_numpy()
+        store = cls.get_file_store(data_source.store_name)
+        return store.put_buffer(numpy.ascontiguousarray(array), data_source.paths[path_index])
+
     @classmethod
     def put_file(cls, data: bytes, data_source: DataSource, path_index: int) -> bool:
         store = cls.get_file_store(data_source.store_name)
-        return store.put(io.BytesIO(data), data_source.paths[path_index])
+        # any bytes-like data, it is not copied on the way to the store
+        return store.put_buffer(data, data_source.paths[path_index])
 
     @classmethod
     def file_writer(
@@ -292,6 +493,94 @@ class PluginManager:
         store = cls.get_file_store(dest_data_source.store_name)
         return store.put(input_stream, dest_data_source.paths[dest_path_index])
 
+    @classmethod
+    def open_writer(cls, dest_data_source: DataSource, dest_path_index: int) -> io.BufferedIOBase:
+        """
+        Open a writable stream for an output, so it does not have to be built in memory first. Use it in a with
+        block: the output is stored when the block ends, and discarded if the block raises.
+        """
+        store = cls.get_file_store(dest_data_source.store_name)
+        return store.open_write(dest_data_source.paths[dest_path_index])
+
+    @classmethod
+    def open_columnar_writer(
+        cls,
+        dest_data_source: DataSource,
+        dest_path_index: int,
+        columns: dict[str, str],
+        format: str = "parquet",  # pylint: disable=redefined-builtin
+        **options,
+    ) -> ColumnarWriter:
+        """
+        Open a writer of rows to a Parquet or Arrow IPC output (see ColumnarWriter), which requires pyarrow. Use it
+        in a with block: the output is stored when the block ends, and discarded if the block raises.
+        """
+        sink = cls.open_writer(dest_data_source, dest_path_index)
+        try:
+            return ColumnarWriter(sink, columns, format, **options)
+        except BaseException:
+            sink.discard()
+            raise
+
+    @classmethod
+    def open_reader(cls, data_source: DataSource, path_index: int) -> io.RawIOBase | io.BufferedIOBase:
+        """
+        Open a seekable stream over a file that reads only what is needed, e.g. to hand to h5py to read the
+        dataset of one of the data source's data_paths without downloading the whole file.
+        """
+        store = cls.get_file_store(data_source.store_name)
+        return store.open_read(data_source.paths[path_index])
+
+    @classmethod
+    def open_archive(cls, data_source: DataSource, path_index: int, **options) -> ArchiveReader:
+        """
+        Open a zip or uncompressed tar archive to read some of its members by range, e.g. a few files of a large
+        archive published by another plugin. See ArchiveReader for the options.
+        """
+        store = cls.get_file_store(data_source.store_name)
+        return store.open_archive(data_source.paths[path_index], **options)
+
+    @classmethod
+    def iter_records(
+        cls,
+        data_source: DataSource,
+        path_index: int,
+        format: str | None = None,  # pylint: disable=redefined-builtin
+        **options,
+    ) -> Iterator[Any]:
+        """
+        Iterate over the records of a file as it is downloaded, decompressing .gz and .zst files on the fly, so
+        processing starts with the first bytes and memory stays bounded however large the file is. See
+        records.iter_records for the formats and the options, e.g. batch_size to get lists of records.
+        """
+        store = cls.get_file_store(data_source.store_name)
+        path = data_source.paths[path_index]
+        # opened by the first record, an iterator that is never started holds no connection
+        return iter_records(partial(store.open_stream, path), path, format, **options)
+
+    @classmethod
+    def flush_outputs(cls) -> None:
+        """
+        Store what the sessions of the data stores buffer, e.g. the small files of the stores with a "pack"
+        parameter (see PackedFileDataStore), so other plugins can read them. Called after each event of run_events
+        that succeeds.
+        """
+        # pylint: disable=not-an-iterable
+        for store in cls._payload.stores:
+            if isinstance(store.session, FileDataStore):
+                store.session.flush()
+
+    @classmethod
+    def rollback_outputs(cls) -> None:
+        """
+        Drop what the sessions of the data stores buffered since the last flush_outputs, so the partial outputs of a
+        failed event are not stored with the next one. Called after each event of run_events that fails.
+        """
+        # pylint: disable=not-an-iterable
+        for store in cls._payload.stores:
+            if isinstance(store.session, FileDataStore):
+                store.session.rollback()
+
     @classmethod
     def file_reader(cls, data_source: DataSource, path_index: int) -> io.BytesIO:
         store = cls.get_file_store(data_source.store_name)
@@ -334,10 +623,194 @@ class PluginManager:
         event_number = int(val)
         return event_number
 
+    @classmethod
+    def run_events(  # pylint: disable=too-many-locals
+        cls,
+        handler: Callable[[int], Any],
+        events: Iterable[int] | None = None,
+        prefetch: bool = True,
+    ) -> dict[int, Exception]:
+        """
+        Compute many events in this process, keeping clients, store sessions and the plugin's state warm.
+
+        For each event number, CC_EVENT_NUMBER is set, the payload of the event becomes the current payload (its
+        paths are substituted again on the next get_payload) and `handler` is called with the event number. The
+        handler uses the PluginManager as it would for a single event.
+
+        A payload supplied through CC_PAYLOAD_FORMATTED serves every event. Otherwise each event's payload is read
+        from S3 at s3://<CC_AWS_S3_BUCKET>/<CC_ROOT>/<event number>/payload, and with `prefetch` the next event's
+        payload is read while the handler computes the current one.
+
+        Args:
+            handler (Callable): Computes an event, called with its event number.
+            events (Iterable[int]): The event numbers, e.g. a range, or iter(queue.get, None) to drain a local queue.
+                If None, event numbers are read from stdin, one per line, a line that is not a number fails as an
+                event of its own.
+            prefetch (bool): Read the next event and its payload in the background.
+
+        Returns:
+            dict: The exception raised for each event that failed, empty if every event succeeded. A failed event is
+            logged and does not stop the others, and what the store sessions buffered for it is dropped (see
+            rollback_outputs).
+        """
+        from_stdin = events is None
+        if from_stdin:
+            # parsed by fetch_next, so that a malformed line fails as its event
+            events = (line.strip() for line in sys.stdin if line.strip())
+        events_iterator = iter(events)
+        store = cls._cc_store
+        initial_event = os.getenv(environment_variables.CC_EVENT_NUMBER)
+        # the payload loaded at start up is the one of the initial event
+        loaded = {initial_event: cls._payload}
+
+        def fetch_next() -> tuple[Any, Payload | None, Exception | None]:
+            event = next(events_iterator, None)
+            if event is None:
+                return None, None, None
+            if from_stdin:
+                try:
+                    event = int(event)
+                except ValueError as exc:
+                    return event, None, exc
+            if store is None:
+                return event, loaded[initial_event], None
+            payload = loaded.pop(str(event), None)
+            if payload is not None:
+                return event, payload, None
+            try:
+                return event, store.get_payload(cls._compact, manifest_id=str(event)), None
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                return event, None, exc
+
+        failures = {}
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            upcoming = executor.submit(fetch_next) if executor is not None else None
+            while True:
+                event, payload, exc = upcoming.result() if upcoming is not None else fetch_next()
+                if event is None:
+                    break
+                if executor is not None:
+                    upcoming = executor.submit(fetch_next)
+                try:
+                    if exc is not None:
+                        raise exc
+                    cls._start_event(event, payload)
+                    handler(event)
+                    cls.flush_outputs()
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    failures[event] = exc
+                    cls.log_error(Error(f"Event {event} failed: {exc}", ErrorLevel.ERROR))
+                    try:
+                        cls.rollback_outputs()
+                    except Exception as rollback_exc:  # pylint: disable=broad-exception-caught
+                        cls.log_error(Error(f"Event {event} outputs not rolled back: {rollback_exc}", ErrorLevel.ERROR))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            if initial_event is None:
+                os.environ.pop(environment_variables.CC_EVENT_NUMBER, None)
+            else:
+                os.environ[environment_variables.CC_EVENT_NUMBER] = initial_event
+        return failures
+
+    # pylint: disable=too-many-arguments
+    @classmethod
+    def map_paths(
+        cls,
+        func: Callable[[str, bytes | None], Any],
+        data_source: DataSource,
+        processes: int | None = None,
+        fetch: bool = True,
+        chunksize: int = 1,
+    ) -> Iterator[Any]:
+        """
+        Call `func` on every path of a data source in a pool of worker processes, so CPU bound plugins use all the
+        cores of the node.
+
+        Each worker starts its own PluginManager on the substituted payload of this one, handed over through
+        CC_PAYLOAD_FORMATTED, so workers do not read the payload from S3. A worker reads the content of a path from
+        the data source's store and calls `func(path, data)`. `func` may itself use the PluginManager of the worker,
+        e.g. to put its output directly.
+
+        `func` is sent to the workers by reference, so it must be defined at the top level of a module.
+
+        Args:
+            func (Callable): Called in a worker with a path and its content, its result is sent back.
+            data_source (DataSource): The data source whose paths are processed.
+            processes (int): The number of worker processes, the number of CPUs by default.
+            fetch (bool): Read the content of each path for `func`. If False, `func` is called with None and reads
+                what it needs itself, e.g. with file_reader.
+            chunksize (int): The number of paths sent to a worker at a time, larger chunks suit many small files.
+
+        Returns:
+            Iterator: The results of `func`, in the order of the paths, as they become available. The pool is
+            closed when the iterator is exhausted or closed.
+
+        Raises:
+            Exception: The exception raised by `func` for a path, when its result is reached.
+        """
+        payload_json = cls.get_payload().serialize()
+        with multiprocessing.Pool(
+            processes, initializer=_init_map_worker, initargs=(payload_json,)
+        ) as pool:
+            yield from pool.imap(
+                partial(_map_path, func, data_source.store_name, fetch),
+                data_source.paths,
+                chunksize,
+            )
+
+    @classmethod
+    def _start_event(cls, event: int, payload: Payload) -> None:
+        os.environ[environment_variables.CC_EVENT_NUMBER] = str(event)
+        if payload is cls._payload:
+            cls._reset_paths()
+        else:
+            cls._install_payload(payload, previous=cls._payload)
+
+    @classmethod
+    def _build_indexes(cls) -> None:
+        """
+        Index the payload inputs, outputs and stores by their lower cased names so that lookups by name do not scan
+        the lists. Called when the payload is loaded and again after its paths are substituted.
+        """
+        cls._indexes = {
+            kind: cls._index_by_name(getattr(cls._payload, kind)) for kind in ("inputs", "outputs", "stores")
+        }
+
+    @staticmethod
+    def _index_by_name(items: list) -> tuple[dict[str, int], tuple]:
+        index = {}
+        for position, item in enumerate(items):
+            # the first item with a name wins, like a scan would
+            index.setdefault(item.name.lower(), position)
+        # the items indexed, to tell whether the list changed since
+        return index, tuple(items)
+
+    @classmethod
+    def _find_indexed(cls, name: str, kind: str):
+        items = getattr(cls._payload, kind)
+        index, indexed_items = cls._indexes[kind]
+        key = name.lower()
+        position = index.get(key)
+        if position is not None and position < len(items) and items[position].name.lower() == key:
+            return items[position]
+        if len(items) == len(indexed_items) and all(map(operator.is_, items, indexed_items)):
+            # the list did not change, the name is not in it
+            return None
+        # the list was modified since it was indexed, e.g. through Payload.set_store
+        index, _ = cls._indexes[kind] = cls._index_by_name(items)
+        position = index.get(key)
+        return None if position is None else items[position]
+
     @classmethod
     def _find_data_source(
         cls, name: str, data_sources: list[DataSource]
     ) -> DataSource | None:
+        if data_sources is cls._payload.inputs:
+            return cls._find_indexed(name, "inputs")
+        if data_sources is cls._payload.outputs:
+            return cls._find_indexed(name, "outputs")
         for data_source in data_sources:
             if data_source.name.lower() == name.lower():
                 return data_source
@@ -345,9 +818,26 @@ class PluginManager:
 
     @classmethod
     def _find_data_store(cls, name: str) -> DataStore | None:
-        # pylint can't determine attributes type
-        # pylint: disable=not-an-iterable
-        for data_store in cls._payload.stores:
-            if data_store.name.lower() == name.lower():
-                return data_store
-        return None
+        return cls._find_indexed(name, "stores")
+
+
+def _import_numpy():
+    # numpy is optional and slow to import, only the plugins using arrays import it
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError("get_array and put_array require numpy, install cc_sdk[numpy]") from exc
+    return numpy
+
+
+def _init_map_worker(payload_json: str) -> None:
+    """Start the PluginManager of a map_paths worker."""
+    os.environ[environment_variables.CC_PAYLOAD_FORMATTED] = payload_json
+    # a forked worker inherits the PluginManager of the parent, a spawned one has none
+    PluginManager._after_fork_in_child()  # pylint: disable=protected-access
+    PluginManager()
+
+
+def _map_path(func: Callable[[str, bytes | None], Any], store_name: str, fetch: bool, path: str) -> Any:
+    data = PluginManager.get_file_store(store_name).get(path).getvalue() if fetch else None
+    return func(path, data)
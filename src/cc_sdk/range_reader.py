@@ -0,0 +1,134 @@
+import io
+from collections import OrderedDict
+from .buffer_io import read_into, seek_position
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+DEFAULT_MAX_BLOCKS = 64
+
+
+class RangeReader(io.RawIOBase):  # pylint: disable=too-many-instance-attributes
+    """
+    A seekable, read only binary stream over an S3 object that downloads only the bytes that are read.
+
+    The object is read in aligned blocks of `block_size` bytes with range GETs, and the blocks are kept in an LRU
+    cache of `max_blocks` blocks, so libraries that seek around a file (e.g. h5py reading one dataset of an HDF5
+    file) download only the blocks they touch, each once. The missing blocks of a read are coalesced into
+    contiguous runs, each fetched with a single request.
+
+    Like a file, a reader is not safe to share between threads.
+
+    Attributes:
+    - bucket : str
+        The bucket of the object.
+    - key : str
+        The key of the object.
+    - size : int
+        The size of the object in bytes.
+    - block_size : int
+        The size of the blocks.
+    - max_blocks : int
+        The number of blocks kept in the cache.
+    - requests : int
+        The number of range GETs made so far. readonly
+
+    Methods:
+    - readinto(buffer), read(size), seek(offset, whence), tell(): the io.RawIOBase interface.
+
+    Raises:
+    - ClientError:
+        If the object does not exist.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        client,
+        bucket: str,
+        key: str,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_blocks: int = DEFAULT_MAX_BLOCKS,
+        size: int | None = None,
+    ):
+        super().__init__()
+        self._client = client
+        self.bucket = bucket
+        self.key = key
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        if size is None:
+            size = client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        self.size = size
+        self._position = 0
+        self._blocks: OrderedDict[int, bytearray] = OrderedDict()
+        self._requests = 0
+
+    @property
+    def requests(self) -> int:
+        return self._requests
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        target = memoryview(buffer).cast("B")
+        end = min(self._position + len(target), self.size)
+        if end <= self._position:
+            return 0
+        first = self._position // self.block_size
+        last = (end - 1) // self.block_size
+        blocks = self._get_blocks(first, last)
+        written = 0
+        for index in range(first, last + 1):
+            block = memoryview(blocks[index])
+            start = self._position + written - index * self.block_size
+            count = min(len(block) - start, end - self._position - written)
+            target[written : written + count] = block[start : start + count]
+            written += count
+        self._position = end
+        return written
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._position = seek_position(offset, whence, self._position, self.size)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def _get_blocks(self, first: int, last: int) -> dict[int, bytearray]:
+        blocks = {}
+        missing = []
+        for index in range(first, last + 1):
+            block = self._blocks.get(index)
+            if block is None:
+                missing.append(index)
+            else:
+                self._blocks.move_to_end(index)
+                blocks[index] = block
+        # one request per run of consecutive missing blocks
+        run_start = 0
+        for position in range(1, len(missing) + 1):
+            if position == len(missing) or missing[position] != missing[position - 1] + 1:
+                blocks.update(self._fetch(missing[run_start], missing[position - 1]))
+                run_start = position
+        for index in missing:
+            self._blocks[index] = blocks[index]
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        return blocks
+
+    def _fetch(self, first: int, last: int) -> dict[int, bytearray]:
+        start = first * self.block_size
+        end = min((last + 1) * self.block_size, self.size)
+        response = self._client.get_object(Bucket=self.bucket, Key=self.key, Range=f"bytes={start}-{end - 1}")
+        self._requests += 1
+        blocks = {}
+        with response["Body"] as body:
+            # straight into the block buffers
+            for index in range(first, last + 1):
+                block = bytearray(min(self.block_size, self.size - index * self.block_size))
+                if read_into(body, block) != len(block):
+                    raise IOError(f"{self.key}: short read of the range bytes={start}-{end - 1}")
+                blocks[index] = block
+        return blocks
@@ -0,0 +1,117 @@
+import csv
+import gzip
+import io
+import json
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Iterator
+
+try:
+    # optional, decodes JSON lines faster than the standard library
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # optional, for .zst inputs
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RECORD_FORMATS = ("lines", "csv", "jsonl")
+
+_FORMAT_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+_COMPRESSION_EXTENSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+
+def iter_records(  # pylint: disable=too-many-arguments
+    stream: BinaryIO | Callable[[], BinaryIO],
+    path: str = "",
+    format: str | None = None,  # pylint: disable=redefined-builtin
+    compression: str | None = "infer",
+    batch_size: int | None = None,
+    encoding: str = "utf-8",
+    header: bool = True,
+    **csv_options,
+) -> Iterator[Any]:
+    """
+    Decode the records of a binary stream as it is read, with bounded memory.
+
+    Args:
+        stream (BinaryIO | Callable): The stream, e.g. the body of an S3 response, or a function opening it, which
+            is called on the first record, so an iterator that is never started holds no stream. Read
+            sequentially, never as a whole, and closed once the records are exhausted or the iterator is closed.
+        path (str): The path of the stream, used to infer the format and the compression from its extensions.
+        format (str): "lines" for the lines of a text, "csv" for the rows of a CSV file, "jsonl" for the values
+            of a JSON lines file. Inferred from the path if None: .csv, .jsonl and .ndjson, "lines" otherwise.
+        compression (str): "gzip", "zstd" or None, decompressed on the fly. Inferred from the path if "infer":
+            .gz and .zst.
+        batch_size (int): If given, lists of up to that many records are yielded instead of single records.
+        encoding (str): The text encoding.
+        header (bool): For CSV, whether the first row names the columns. Rows are dicts (see csv.DictReader) if
+            so, lists otherwise.
+        csv_options: Parameters of csv.reader or csv.DictReader, e.g. delimiter.
+
+    Returns:
+        Iterator: The records: str lines without their line ending, CSV rows, or decoded JSON values. Blank JSON
+        lines are skipped.
+
+    Raises:
+        ValueError: If the format or the compression is unknown.
+        ImportError: If the stream is zstd compressed and zstandard is not installed, on the first record.
+    """
+    name = path.lower()
+    if compression not in ("infer", None, *_COMPRESSION_EXTENSIONS.values()):
+        raise ValueError(f"unknown compression {compression!r}, expected gzip, zstd or None")
+    if compression == "infer":
+        compression = None
+        for extension, a_compression in _COMPRESSION_EXTENSIONS.items():
+            if name.endswith(extension):
+                compression = a_compression
+                name = name[: -len(extension)]
+                break
+    if format is None:
+        format = next((fmt for ext, fmt in _FORMAT_EXTENSIONS.items() if name.endswith(ext)), "lines")
+    if format not in RECORD_FORMATS:
+        raise ValueError(f"unknown record format {format!r}, expected one of {RECORD_FORMATS}")
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    return _records(stream, format, compression, batch_size, encoding, header, csv_options)
+
+
+def _records(  # pylint: disable=too-many-arguments
+    stream: BinaryIO | Callable[[], BinaryIO],
+    record_format: str,
+    compression: str | None,
+    batch_size: int | None,
+    encoding: str,
+    header: bool,
+    csv_options: dict,
+) -> Iterator[Any]:
+    if callable(stream):
+        stream = stream()
+    try:
+        text = io.TextIOWrapper(_decompressed(stream, compression), encoding=encoding, newline="")
+        if record_format == "csv":
+            records = csv.DictReader(text, **csv_options) if header else csv.reader(text, **csv_options)
+        elif record_format == "jsonl":
+            loads = orjson.loads if orjson is not None else json.loads  # pylint: disable=no-member
+            records = (loads(line) for line in text if line.strip())
+        else:
+            records = (line.rstrip("\r\n") for line in text)
+        if batch_size is None:
+            yield from records
+        else:
+            while batch := list(islice(records, batch_size)):
+                yield batch
+    finally:
+        stream.close()
+
+
+def _decompressed(stream: BinaryIO, compression: str | None) -> BinaryIO:
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd compressed records require zstandard, install cc_sdk[zstd]")
+        return zstandard.ZstdDecompressor().stream_reader(stream, closefd=False)
+    return stream
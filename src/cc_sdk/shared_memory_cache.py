@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import uuid
+import weakref
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable
+
+try:
+    # POSIX only, the cache is for the processes of a Linux node
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# every cache of the process, for the fork hook
+_caches = weakref.WeakSet()
+
+
+class SharedMemoryCache:  # pylint: disable=too-many-instance-attributes
+    """
+    A node local cache of objects in shared memory, for plugin processes that read the same inputs.
+
+    The first process to get an object downloads it into a multiprocessing.shared_memory segment, and the other
+    processes attach to the segment and read it through a zero copy memoryview. A small JSON index, guarded by a
+    file lock, maps each key to its segment and to the caches holding it. A segment is unlinked when the last
+    cache holding it releases it; caches whose process exited without releasing are dropped from the index.
+
+    Each cache that holds objects keeps an exclusive file lock on a holder file of its own, which the kernel drops
+    when its process exits, so a holder is alive while its file is locked. Unlike process ids, which containers
+    sharing /dev/shm see in different namespaces, the lock is visible to every process of the node.
+
+    Segments are unregistered from the multiprocessing resource tracker, which would otherwise unlink them when the
+    process that created them exits, while other processes still hold them.
+
+    Attributes:
+    - namespace : str
+        Prefixes the segment names and names the index, caches with the same namespace share objects.
+    - directory : str
+        The directory of the index and lock files, /dev/shm when it exists.
+
+    Methods:
+    - get(key, fetch): returns a memoryview of the object, calling fetch to download it if no process has it yet.
+    - release(key): releases the object got with get, once per get; it may not be used after the last release.
+    - close(): releases every object got with get.
+
+    Raises:
+    - NotImplementedError:
+        If the platform has no fcntl file locks.
+    """
+
+    def __init__(self, namespace: str = "cc_sdk", directory: str | None = None):
+        if fcntl is None:
+            raise NotImplementedError("SharedMemoryCache requires fcntl file locks")
+        self.namespace = namespace
+        if directory is None:
+            directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        self.directory = directory
+        self._index_path = os.path.join(directory, f"{namespace}.index")
+        # the segments this process holds and the sizes of their objects
+        self._attached: dict[str, tuple[shared_memory.SharedMemory, int]] = {}
+        # how many gets of each attached segment were not released yet
+        self._references: dict[str, int] = {}
+        # released segments that still had views, closed once the views are gone
+        self._closing: list[shared_memory.SharedMemory] = []
+        # guards the attributes, a download holds only the lock of its key
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        # the id of this cache in the index and its locked holder file, created by the first get
+        self._holder = uuid.uuid4().hex
+        self._holder_file = None
+        _caches.add(self)
+
+    def _after_fork_in_child(self) -> None:
+        # the child holds none of the parent's objects, the inherited mappings are left alone
+        self._attached = {}
+        self._references = {}
+        self._closing = []
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        if self._holder_file is not None:
+            # the parent's lock stays with the parent
+            self._holder_file.close()
+        self._holder = uuid.uuid4().hex
+        self._holder_file = None
+
+    def get(self, key: str, fetch: Callable[[], bytes]) -> memoryview:
+        """
+        Get an object from the cache.
+
+        Args:
+            key (str): Identifies the object on the node, e.g. its bucket and key.
+            fetch (Callable): Downloads the object, called if no process holds it.
+
+        Returns:
+            memoryview: A read only view of the object in shared memory, valid until release(key) is called.
+        """
+        with self._lock:
+            attached = self._attached.get(key)
+            if attached is not None:
+                self._references[key] += 1
+            else:
+                self._hold()
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+        if attached is None:
+            # other threads get other keys meanwhile
+            with key_lock:
+                with self._lock:
+                    attached = self._attached.get(key)
+                    if attached is not None:
+                        self._references[key] += 1
+                if attached is None:
+                    attached = self._attach_or_create(key, fetch)
+                    with self._lock:
+                        self._attached[key] = attached
+                        self._references[key] = 1
+        segment, size = attached
+        return segment.buf[:size].toreadonly()
+
+    def release(self, key: str) -> None:
+        """
+        Release an object got with get, once per get. Its memoryviews must not be used after the last release,
+        which drops the object from the index and unlinks its segment if no other cache holds it.
+
+        Raises:
+            KeyError: If the object was not got with get.
+        """
+        with self._lock:
+            self._references[key] -= 1
+            if self._references[key] > 0:
+                return
+            del self._references[key]
+            segment, _ = self._attached.pop(key)
+            with self._locked("index"):
+                index = self._read_index()
+                entry = index.get(key)
+                if entry is not None:
+                    entry["holders"] = [holder for holder in entry["holders"] if holder != self._holder]
+                    if not entry["holders"]:
+                        del index[key]
+                        self._unlink(segment)
+                    self._write_index(index)
+            self._close(segment)
+
+    def close(self) -> None:
+        """Release every object got with get."""
+        for key in list(self._attached):
+            while key in self._attached:
+                self.release(key)
+        with self._lock:
+            if self._holder_file is not None:
+                # not in the index any more, nobody checks the file
+                try:
+                    os.remove(self._holder_path(self._holder))
+                except FileNotFoundError:
+                    pass
+                self._holder_file.close()
+                self._holder_file = None
+
+    def _hold(self) -> None:
+        if self._holder_file is None:
+            holder_file = open(self._holder_path(self._holder), "a+b")  # pylint: disable=consider-using-with
+            fcntl.flock(holder_file, fcntl.LOCK_EX)
+            self._holder_file = holder_file
+
+    def _holder_path(self, holder: str) -> str:
+        return os.path.join(self.directory, f"{self.namespace}.holder.{holder}.lock")
+
+    def _is_holding(self, holder: str) -> bool:
+        if holder == self._holder:
+            return True
+        try:
+            holder_fd = os.open(self._holder_path(holder), os.O_RDWR)
+        except FileNotFoundError:
+            return False
+        try:
+            fcntl.flock(holder_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        else:
+            # the process of the holder exited and the kernel dropped its lock
+            os.remove(self._holder_path(holder))
+            return False
+        finally:
+            os.close(holder_fd)
+
+    def _attach_or_create(
+        self, key: str, fetch: Callable[[], bytes]
+    ) -> tuple[shared_memory.SharedMemory, int]:
+        # one process downloads a key at a time, the others wait for it and attach
+        with self._locked(hashlib.sha1(key.encode()).hexdigest()):
+            with self._locked("index"):
+                index = self._read_index()
+                entry = index.get(key)
+                if entry is not None:
+                    segment = self._open(entry["name"])
+                    if segment is not None:
+                        entry["holders"].append(self._holder)
+                        self._write_index(index)
+                        return segment, entry["size"]
+            data = fetch()
+            name = f"{self.namespace}_{hashlib.sha1(key.encode()).hexdigest()[:16]}_{self._holder[:12]}"
+            # a segment cannot be empty
+            segment = shared_memory.SharedMemory(name=name, create=True, size=max(len(data), 1))
+            resource_tracker.unregister(segment._name, "shared_memory")  # pylint: disable=protected-access
+            segment.buf[: len(data)] = data
+            with self._locked("index"):
+                index = self._read_index()
+                index[key] = {"name": name, "size": len(data), "holders": [self._holder]}
+                self._write_index(index)
+            return segment, len(data)
+
+    @staticmethod
+    def _open(name: str) -> shared_memory.SharedMemory | None:
+        try:
+            segment = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return None
+        resource_tracker.unregister(segment._name, "shared_memory")  # pylint: disable=protected-access
+        return segment
+
+    @staticmethod
+    def _unlink(segment: shared_memory.SharedMemory) -> None:
+        # SharedMemory.unlink unregisters the segment from the resource tracker, it must be registered for that
+        resource_tracker.register(segment._name, "shared_memory")  # pylint: disable=protected-access
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _close(self, segment: shared_memory.SharedMemory) -> None:
+        closing = self._closing + [segment]
+        self._closing = []
+        for a_segment in closing:
+            try:
+                a_segment.close()
+            except BufferError:
+                # views of the segment are still referenced, try again on the next release
+                self._closing.append(a_segment)
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as index_file:
+                index = json.load(index_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        # forget the caches whose process exited without releasing their objects
+        holding = {}
+        for key, entry in list(index.items()):
+            for holder in entry["holders"]:
+                if holder not in holding:
+                    holding[holder] = self._is_holding(holder)
+            entry["holders"] = [holder for holder in entry["holders"] if holding[holder]]
+            if not entry["holders"]:
+                segment = self._open(entry["name"])
+                if segment is not None:
+                    self._unlink(segment)
+                    self._close(segment)
+                del index[key]
+        return index
+
+    def _write_index(self, index: dict) -> None:
+        temp_path = f"{self._index_path}.{os.getpid()}"
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump(index, index_file)
+        os.replace(temp_path, self._index_path)
+
+    @contextmanager
+    def _locked(self, name: str):
+        with open(os.path.join(self.directory, f"{self.namespace}.{name}.lock"), "a+b") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _after_fork_in_child() -> None:
+    for cache in list(_caches):
+        # pylint: disable=protected-access
+        cache._after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,93 @@
+import io
+import os
+import shutil
+import tempfile
+from typing import BinaryIO
+from . import constants
+from .buffer_io import READ_CHUNK_SIZE
+from .output_writer import OutputWriter
+
+# the default size of the outputs kept in memory, larger ones spill to a temporary file
+SPOOL_MAX_MEMORY = 64 * 1024 * 1024
+
+
+class SpooledWriter(OutputWriter):
+    """
+    A writable binary stream that publishes what was written to a file data store path when it is closed.
+
+    What is written is buffered in memory up to `max_memory` bytes, then moved to a temporary file that takes the
+    rest, so outputs larger than memory can be written with a bounded amount of it. The temporary file is created in
+    the local data directory (/data) when it exists, and in the system's temporary directory otherwise.
+
+    The output is published by close(), or at the end of a with block that did not raise. A with block that raises,
+    discard(), or a writer garbage collected before it was closed do not publish anything.
+
+    Attributes:
+    - path : str
+        The path the output is published to.
+    - max_memory : int
+        The number of bytes buffered in memory before spilling to a temporary file.
+    - spilled : bool
+        Whether the output was moved to a temporary file. readonly
+
+    Methods:
+    - write(data): appends bytes-like data to the output.
+    - close(): publishes the output, then releases the buffer.
+    - discard(): releases the buffer without publishing the output.
+
+    Raises:
+    - IOError:
+        From close(), if the store did not accept the output.
+    """
+
+    def __init__(self, store, path: str, max_memory: int = SPOOL_MAX_MEMORY, directory: str | None = None):
+        super().__init__()
+        self._store = store
+        self.path = path
+        self.max_memory = max_memory
+        if directory is None and os.path.isdir(constants.LOCAL_ROOT_PATH):
+            directory = constants.LOCAL_ROOT_PATH
+        self._directory = directory
+        self._buffer: BinaryIO = io.BytesIO()
+        self._spilled = False
+
+    @property
+    def spilled(self) -> bool:
+        return self._spilled
+
+    def write(self, data) -> int:
+        if self.closed:  # pylint: disable=using-constant-test
+            raise ValueError("write to a closed SpooledWriter")
+        count = memoryview(data).nbytes
+        if not self._spilled and self._buffer.tell() + count > self.max_memory:
+            self._spill()
+        self._buffer.write(data)
+        return count
+
+    def tell(self) -> int:
+        return self._buffer.tell()
+
+    def close(self) -> None:
+        if self.closed:  # pylint: disable=using-constant-test
+            return
+        try:
+            self._buffer.seek(0)
+            if not self._store.put(self._buffer, self.path):
+                raise IOError(f"could not write the output {self.path}")
+        finally:
+            self._release()
+
+    def _discard(self) -> None:
+        self._release()
+
+    def _spill(self) -> None:
+        temp_file = tempfile.TemporaryFile(dir=self._directory)  # pylint: disable=consider-using-with
+        self._buffer.seek(0)
+        shutil.copyfileobj(self._buffer, temp_file, READ_CHUNK_SIZE)
+        self._buffer.close()
+        self._buffer = temp_file
+        self._spilled = True
+
+    def _release(self) -> None:
+        self._buffer.close()
+        super().close()
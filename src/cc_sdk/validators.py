@@ -1,4 +1,5 @@
 import json
+from attr import fields, NOTHING, Factory
 
 
 def validate_serializable(_instance, _attribute, value):
@@ -74,5 +75,58 @@ def validate_homogeneous_list(_instance, attribute, value, the_type):
     """
     if not isinstance(value, list):
         raise ValueError(f"{str(attribute)} must be a list of {str(the_type)}")
+    # collecting the element types runs at C speed, fall back to isinstance for subclasses
+    if set(map(type, value)) <= {the_type}:
+        return
     if not all(isinstance(path, the_type) for path in value):
         raise ValueError(f"{str(attribute)} must be a list of {str(the_type)}")
+
+
+def construct_unvalidated(the_class, values: dict):
+    """
+    Constructs an attrs class without running its validators. Converters and
+    defaults are still applied, and keys that are not attributes are
+    rejected, as by the class's own __init__.
+    Only use it for values that are known to be valid, e.g. values that have
+    already been checked or were produced by the SDK itself.
+
+    Parameters:
+    -----------
+    the_class : Type
+        The attrs class to construct.
+    values : dict
+        The attribute values by attribute name.
+
+    Raises:
+    -------
+    TypeError:
+        If a value is missing for an attribute without a default, or a key is
+        not an attribute.
+    """
+    instance = object.__new__(the_class)
+    used = 0
+    # pylint can't determine the type returned by fields
+    # pylint: disable=not-an-iterable
+    for attribute in fields(the_class):
+        if attribute.name in values:
+            value = values[attribute.name]
+            used += 1
+        elif attribute.default is NOTHING:
+            raise TypeError(
+                f"{the_class.__name__} missing required argument: '{attribute.name}'"
+            )
+        elif isinstance(attribute.default, Factory):
+            value = attribute.default.factory()
+        else:
+            value = attribute.default
+        if attribute.converter is not None:
+            value = attribute.converter(value)
+        # bypasses frozen attributes, the same way attrs' own __init__ does
+        object.__setattr__(instance, attribute.name, value)
+    if used < len(values):
+        names = {attribute.name for attribute in fields(the_class)}
+        unexpected = next(key for key in values if key not in names)
+        raise TypeError(
+            f"{the_class.__name__} got an unexpected argument: '{unexpected}'"
+        )
+    return instance
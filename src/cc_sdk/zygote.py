@@ -0,0 +1,126 @@
+import gc
+import importlib
+import os
+import sys
+import traceback
+from typing import Any, Callable, Iterable, Iterator
+from . import environment_variables
+from .cc_store_s3 import CCStoreS3
+from .error import Error, ErrorLevel
+from .logger import Logger
+from .plugin_manager import PluginManager
+
+_logger = Logger(ErrorLevel.WARN, "zygote")
+
+
+def run_zygote(
+    handler: Callable[[int], Any] | str,
+    events: Iterable[int] | None = None,
+    max_children: int = 1,
+    preload: Iterable[str] = (),
+    profiles: Iterable[str] = (environment_variables.CC_PROFILE,),
+) -> dict[int, int]:
+    """
+    Run each event in a clean process forked from a warm zygote process.
+
+    The zygote imports the handler, the `preload` modules and boto3 once, creates the S3 clients of `profiles`, and
+    then forks a child per event. A child starts in milliseconds with everything already imported, shares the
+    zygote's memory copy-on-write, and exits when its event is done. The SDK's fork hooks give each child fresh
+    connection pools for the shared clients and a reset PluginManager, which the handler constructs as usual to
+    load the payload of its event.
+
+    Args:
+        handler (Callable | str): Computes an event, called in the child with its event number. May be given as
+            "package.module:function" to import it in the zygote.
+        events (Iterable[int]): The event numbers. If None, event numbers are read from stdin, one per line;
+            malformed lines are logged and skipped.
+        max_children (int): The number of events computed at the same time.
+        preload (Iterable[str]): Modules to import in the zygote, e.g. the plugin's heavy dependencies.
+        profiles (Iterable[str]): The data store profiles whose S3 clients are created in the zygote. Profiles
+            without credentials in the environment are skipped.
+
+    Returns:
+        dict[int, int]: The exit code of the child of each event: 0 if the handler returned, 1 if it raised and
+        negative if the child was killed by a signal.
+
+    Raises:
+        NotImplementedError: If the platform cannot fork.
+    """
+    if not hasattr(os, "fork"):
+        raise NotImplementedError("run_zygote requires os.fork")
+    if isinstance(handler, str):
+        module_name, _, function_name = handler.partition(":")
+        handler = getattr(importlib.import_module(module_name), function_name)
+    _warm_up(preload, profiles)
+    if events is None:
+        events = _read_events(sys.stdin)
+    # objects that exist now are never collected, so the collector does not write to their pages in the children
+    gc.collect()
+    gc.freeze()
+
+    exit_codes = {}
+    children = {}
+    try:
+        for event in events:
+            while len(children) >= max_children:
+                _reap_child(children, exit_codes)
+            # buffered output would be written again by the child
+            sys.stdout.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:
+                _run_child(handler, event)
+            children[pid] = event
+    finally:
+        # the running children are waited for even if the events failed, they would be left as zombies
+        try:
+            while children:
+                _reap_child(children, exit_codes)
+        finally:
+            gc.unfreeze()
+    return exit_codes
+
+
+def _warm_up(preload: Iterable[str], profiles: Iterable[str]) -> None:
+    for module_name in preload:
+        importlib.import_module(module_name)
+    for profile in profiles:
+        try:
+            CCStoreS3.get_s3_client(CCStoreS3.create_aws_config_from_env(profile))
+        except EnvironmentError:
+            continue
+
+
+def _read_events(lines: Iterable[str]) -> Iterator[int]:
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield int(line)
+        except ValueError:
+            _logger.log_error(Error(f"Skipped the malformed event number {line!r}", ErrorLevel.ERROR))
+
+
+def _run_child(handler: Callable[[int], Any], event: int) -> None:
+    exit_code = 1
+    try:
+        # the child loads the payload of its event, not the zygote's
+        PluginManager._after_fork_in_child()  # pylint: disable=protected-access
+        os.environ[environment_variables.CC_EVENT_NUMBER] = str(event)
+        handler(event)
+        exit_code = 0
+    except BaseException:  # pylint: disable=broad-exception-caught
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # skip the zygote's exit handlers and finalizers, they belong to the zygote
+        os._exit(exit_code)  # pylint: disable=protected-access
+
+
+def _reap_child(children: dict[int, int], exit_codes: dict[int, int]) -> None:
+    pid, status = os.wait()
+    event = children.pop(pid, None)
+    if event is not None:
+        exit_codes[event] = os.waitstatus_to_exitcode(status)
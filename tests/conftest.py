@@ -0,0 +1,54 @@
+import io
+import pytest
+from cc_sdk.file_data_store import FileDataStore
+
+
+class MemoryStore(FileDataStore):
+    """
+    Keeps files in memory, counts the requests and the bytes of the range reads, and records the streams put into
+    it. Puts are refused, after reading them, if accept is False.
+    """
+
+    def __init__(self, accept: bool = True):
+        self.accept = accept
+        self.files = {}
+        self.streams = []
+        self.requests = 0
+        self.range_bytes = 0
+
+    def copy(self, dest_store, src_path, dest_path):
+        return dest_store.put(self.get(src_path), dest_path)
+
+    def get(self, path):
+        self.requests += 1
+        return io.BytesIO(self.files[path])
+
+    def put(self, data, path):
+        self.requests += 1
+        self.streams.append(data)
+        self.files[path] = data.read()
+        return self.accept
+
+    def put_buffer(self, buffer, path):
+        self.requests += 1
+        self.files[path] = bytes(buffer)
+        return self.accept
+
+    def delete(self, path):
+        self.requests += 1
+        return self.files.pop(path, None) is not None
+
+    def get_range(self, path, offset, length):
+        self.requests += 1
+        data = self.files[path][offset : offset + max(length, 0)]
+        self.range_bytes += len(data)
+        return data
+
+    def list_paths(self, prefix):
+        self.requests += 1
+        return [path for path in self.files if path.startswith(prefix)]
+
+
+@pytest.fixture
+def memory_store():
+    return MemoryStore()
@@ -0,0 +1,73 @@
+import io
+import tarfile
+import zipfile
+import pytest
+from cc_sdk.archive_reader import ArchiveReader
+
+
+MEMBERS = {f"dir/file{i}.txt": f"content {i}\n".encode() * (i * 1000 + 1) for i in range(5)}
+
+
+def zip_archive(compression=zipfile.ZIP_DEFLATED) -> bytes:
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w", compression=compression) as archive:
+        archive.writestr("dir/", b"")
+        for name, content in MEMBERS.items():
+            archive.writestr(name, content)
+    return data.getvalue()
+
+
+def tar_archive(mode="w") -> bytes:
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode=mode) as archive:
+        for name, content in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2])
+def test_zip(compression, memory_store):
+    store = memory_store
+    store.files["archive.zip"] = zip_archive(compression)
+    reader = store.open_archive("archive.zip")
+    assert reader.format == "zip"
+    assert reader.names() == list(MEMBERS)
+    assert reader.size("dir/file3.txt") == len(MEMBERS["dir/file3.txt"])
+    assert reader.read("dir/file3.txt") == MEMBERS["dir/file3.txt"]
+    assert reader.open("dir/file0.txt").read() == MEMBERS["dir/file0.txt"]
+
+
+def test_tar(memory_store):
+    store = memory_store
+    store.files["archive.tar"] = tar_archive()
+    reader = store.open_archive("archive.tar")
+    assert reader.format == "tar"
+    assert reader.names() == list(MEMBERS)
+    assert reader.read("dir/file2.txt") == MEMBERS["dir/file2.txt"]
+
+
+def test_read_many_reads_only_the_members(memory_store):
+    store = memory_store
+    store.files["archive.zip"] = zip_archive(zipfile.ZIP_STORED)
+    reader = ArchiveReader(store, "archive.zip", max_workers=2)
+    names = ["dir/file1.txt", "dir/file4.txt", "dir/file1.txt"]
+    assert reader.read_many(names) == {name: MEMBERS[name] for name in names}
+    assert store.range_bytes < len(MEMBERS["dir/file1.txt"]) + len(MEMBERS["dir/file4.txt"]) + 1024
+
+
+def test_errors(memory_store):
+    store = memory_store
+    store.files["archive.zip"] = zip_archive()
+    store.files["archive.tar.gz"] = tar_archive("w:gz")
+    with pytest.raises(KeyError):
+        store.open_archive("archive.zip").read("dir/")
+    with pytest.raises(KeyError):
+        store.open_archive("archive.zip").read_many(["dir/file0.txt", "missing"])
+    with pytest.raises(ValueError):
+        store.open_archive("archive.tar.gz", format="tar")
+    with pytest.raises(ValueError):
+        store.open_archive("archive.tar.gz")
+    with pytest.raises(ValueError):
+        store.open_archive("archive.zip", format="rar")
@@ -0,0 +1,70 @@
+import io
+import pytest
+from cc_sdk import BufferReader
+from cc_sdk.buffer_io import read_into
+
+
+def test_buffer_reader_read():
+    data = bytearray(b"0123456789")
+    reader = BufferReader(data)
+    assert reader.readable() and reader.seekable()
+    assert reader.read(4) == b"0123"
+    assert reader.tell() == 4
+    assert reader.read() == b"456789"
+    assert reader.read(1) == b""
+
+
+def test_buffer_reader_seek():
+    reader = BufferReader(b"0123456789")
+    assert reader.seek(0, io.SEEK_END) == 10
+    assert reader.seek(-3, io.SEEK_CUR) == 7
+    assert reader.read() == b"789"
+    assert reader.seek(2) == 2
+    assert reader.read(3) == b"234"
+    with pytest.raises(ValueError):
+        reader.seek(-1)
+
+
+def test_buffer_reader_readinto():
+    reader = BufferReader(memoryview(b"0123456789"))
+    target = bytearray(4)
+    assert reader.readinto(target) == 4
+    assert target == b"0123"
+    reader.seek(8)
+    assert reader.readinto(target) == 2
+    assert target[:2] == b"89"
+
+
+def test_buffer_reader_does_not_copy():
+    data = bytearray(b"abc")
+    reader = BufferReader(data)
+    data[0:1] = b"x"
+    assert reader.read() == b"xbc"
+
+
+def test_buffer_reader_non_contiguous():
+    with pytest.raises(TypeError):
+        BufferReader(memoryview(b"0123456789")[::2])
+
+
+class _ChunkedStream:
+    """A stream without readinto, like botocore's StreamingBody"""
+
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(min(size, 3))
+
+
+@pytest.mark.parametrize("stream_type", [io.BytesIO, _ChunkedStream])
+def test_read_into(stream_type):
+    buffer = bytearray(10)
+    assert read_into(stream_type(b"0123456789"), buffer) == 10
+    assert buffer == b"0123456789"
+
+
+def test_read_into_short_stream():
+    buffer = bytearray(10)
+    assert read_into(io.BytesIO(b"0123"), buffer) == 4
+    assert buffer[:4] == b"0123"
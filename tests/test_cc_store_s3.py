@@ -1,3 +1,5 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock
 import tempfile
 import os
@@ -6,6 +8,7 @@ from moto import mock_s3
 import boto3
 from botocore.exceptions import ClientError
 import pytest
+from cc_sdk import cc_store_s3
 from cc_sdk import (
     CCStoreS3,
     AWSConfig,
@@ -19,6 +22,7 @@ from cc_sdk import (
     Payload,
     DataSource,
     DataStore,
+    DiskCache,
 )
 
 # pylint: disable=redefined-outer-name
@@ -53,7 +57,8 @@ def test_initialize(monkeypatch):
         environment_variables.CC_PROFILE + "_" + environment_variables.S3_MOCK, "True"
     )
 
-    # Set up mock for create_s3_client
+    # Set up mock for create_s3_client, without caching it as the shared client of the config
+    monkeypatch.setattr(cc_store_s3, "_shared_clients", {})
     mock_create_s3_client = Mock()
     monkeypatch.setattr(CCStoreS3, "create_s3_client", mock_create_s3_client)
     store = CCStoreS3()
@@ -141,6 +146,16 @@ def store(monkeypatch):
         s3_client.delete_bucket(Bucket="my_bucket")
 
 
+def test_get_s3_client(monkeypatch):
+    mock_create_s3_client = Mock(side_effect=lambda config: object())
+    monkeypatch.setattr(CCStoreS3, "create_s3_client", mock_create_s3_client)
+    config = AWSConfig(aws_config_name="shared", aws_region="us-west-2")
+    client = CCStoreS3.get_s3_client(config)
+    assert CCStoreS3.get_s3_client(AWSConfig(aws_config_name="shared", aws_region="us-west-2")) is client
+    assert CCStoreS3.get_s3_client(AWSConfig(aws_config_name="other", aws_region="us-west-2")) is not client
+    assert mock_create_s3_client.call_count == 2
+
+
 def test_handles_data_store_type(store):
     assert store.handles_data_store_type(StoreType.S3) is True
 
@@ -278,6 +293,77 @@ def test_pull_object_success(store, temp_dir):
     ), f"File at '{pulled_filepath}' has unexpected contents"
 
 
+def test_pull_object_concurrently(store, temp_dir):
+    assert store.put_object(
+        PutObjectInput(
+            file_name="shared",
+            file_extension="",
+            dest_store_type=StoreType.S3,
+            object_state=ObjectState.MEMORY,
+            data=b"Hello, world!" * 1000,
+            source_root_path="",
+            dest_root_path="place/to/put/file",
+        )
+    )
+    input_data = PullObjectInput(
+        file_name="shared",
+        file_extension="",
+        source_store_type=StoreType.S3,
+        source_root_path="place/to/put/file",
+        dest_root_path=temp_dir,
+    )
+    # threads pulling the same object each write their own temporary file
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(lambda _: store.pull_object(input_data), range(16)))
+    assert os.listdir(temp_dir) == ["shared"]
+    with open(os.path.join(temp_dir, "shared"), "rb") as the_file:
+        assert the_file.read() == b"Hello, world!" * 1000
+
+
+def test_pull_object_disk_cache(store, temp_dir):
+    store.disk_cache = DiskCache(os.path.join(temp_dir, "cache"))
+    store.put_object(
+        PutObjectInput(
+            file_name="cached",
+            file_extension="bin",
+            dest_store_type=StoreType.S3,
+            object_state=ObjectState.MEMORY,
+            data=b"Hello, world!",
+            source_root_path="",
+            dest_root_path="place/to/put/file",
+        )
+    )
+    for dest in ("first", "second"):
+        input_data = {
+            "file_name": "cached",
+            "file_extension": "bin",
+            "source_store_type": StoreType.S3,
+            "source_root_path": "place/to/put/file",
+            "dest_root_path": os.path.join(temp_dir, dest),
+        }
+        assert store.pull_object(PullObjectInput(**input_data)) is True
+    first = os.path.join(temp_dir, "first", "cached.bin")
+    second = os.path.join(temp_dir, "second", "cached.bin")
+    with open(second, "rb") as the_file:
+        assert the_file.read() == b"Hello, world!"
+    # both are links to the single cached copy
+    assert os.stat(first).st_ino == os.stat(second).st_ino
+    assert os.stat(first).st_nlink == 3
+    input_data["file_name"] = "not_a_real_file"
+    assert store.pull_object(PullObjectInput(**input_data)) is False
+
+
+def test_cached_object_changed(store):
+    store.aws_s3.put_object(Bucket="my_bucket", Key="changing", Body=b"first")
+    etag, size, fetch = CCStoreS3.cached_object(store.aws_s3, "my_bucket", "changing")
+    assert size == 5
+    store.aws_s3.put_object(Bucket="my_bucket", Key="changing", Body=b"second")
+    # the new content must not be cached under the ETag of the old one
+    with pytest.raises(ClientError):
+        fetch(io.BytesIO())
+    assert etag != CCStoreS3.cached_object(store.aws_s3, "my_bucket", "changing")[0]
+
+
 def test_pull_object_error(store, temp_dir):
     # pull the object that doesn't exist
     input_data = {
@@ -288,6 +374,7 @@ def test_pull_object_error(store, temp_dir):
         "dest_root_path": temp_dir,
     }
     assert store.pull_object(PullObjectInput(**input_data)) is False
+    assert os.listdir(temp_dir) == []
 
 
 def test_get_object_success(store):
@@ -396,6 +483,49 @@ def test_set_payload(payload, store):
     assert store.set_payload(payload) is True
 
 
+def test_set_payloads(payload, store):
+    payload.inputs[0].paths[0] = "/{ATTR::scenario}/event_{ENV::CC_EVENT_NUMBER}/data_{ATTR::seed}"
+    progress = []
+    failures = store.set_payloads(
+        payload,
+        range(20),
+        attributes=lambda event: {"seed": event * 10, "scenario": 'a"b'},
+        max_workers=4,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+    assert not failures
+    assert progress == [(done, 20) for done in range(1, 21)]
+    for event in range(20):
+        body = store._download_bytes_from_s3(store._payload_key(str(event)))
+        event_payload = Payload.from_json(body)
+        assert event_payload.attributes == {"attr1": "value1", "attr2": 2, "seed": event * 10, "scenario": 'a"b'}
+        assert event_payload.stores == payload.stores
+        assert event_payload.inputs == payload.inputs
+        assert event_payload.outputs == payload.outputs
+
+
+def test_set_payloads_expand_paths(payload, store):
+    payload.inputs[0].paths[0] = "/{ATTR::scenario}/event_{ENV::CC_EVENT_NUMBER}/data_{ATTR::seed}"
+    # only the names and paths of the data sources are substituted
+    payload.stores[0].parameters["root"] = "root_{ATTR::seed}"
+    failures = store.set_payloads(
+        payload,
+        (event for event in range(5)),
+        attributes=lambda event: {"seed": event, "scenario": 'a"b'} if event != 3 else {},
+        expand_paths=True,
+        manifest_id=lambda event: f"manifest_{event}",
+    )
+    # event 3 has no seed attribute to substitute
+    assert list(failures) == [3]
+    assert isinstance(failures[3], RuntimeError)
+    for event in (0, 1, 2, 4):
+        body = store._download_bytes_from_s3(store._payload_key(f"manifest_{event}"))
+        event_payload = Payload.from_json(body)
+        assert event_payload.inputs[0].paths[0] == f'/a"b/event_{{ENV::CC_EVENT_NUMBER}}/data_{event}'
+        assert event_payload.inputs[1] == payload.inputs[1]
+        assert event_payload.stores[0].parameters["root"] == "root_{ATTR::seed}"
+
+
 def test_get_payload(payload, store):
     # Create a temporary file for the payload and put on S3
     path = store.root + "/" + store.manifest_id
@@ -410,3 +540,24 @@ def test_get_payload(payload, store):
     }
     assert store.put_object(PutObjectInput(**input_data)) is True
     assert store.get_payload() == payload
+
+
+def test_get_payload_formatted(payload, store, monkeypatch):
+    # nothing is on S3, the payload must come from the environment variable
+    monkeypatch.setenv(environment_variables.CC_PAYLOAD_FORMATTED, payload.serialize())
+    assert store.get_payload() == payload
+
+
+def test_get_local_payload(payload, monkeypatch, temp_dir):
+    monkeypatch.delenv(environment_variables.CC_PAYLOAD_FORMATTED, raising=False)
+    assert CCStoreS3.get_local_payload() is None
+    payload_path = os.path.join(temp_dir, "payload.json")
+    with open(payload_path, "w", encoding="utf-8") as payload_file:
+        payload_file.write(payload.serialize())
+    monkeypatch.setenv(environment_variables.CC_PAYLOAD_FORMATTED, payload_path)
+    assert CCStoreS3.get_local_payload() == payload
+    monkeypatch.setenv(
+        environment_variables.CC_PAYLOAD_FORMATTED, os.path.join(temp_dir, "missing")
+    )
+    with pytest.raises(EnvironmentError):
+        CCStoreS3.get_local_payload()
@@ -0,0 +1,106 @@
+import io
+import pytest
+from cc_sdk.columnar_writer import ColumnarWriter
+
+
+class DiscardableStream(io.BytesIO):
+    """Keeps its value once closed, and records whether it was discarded"""
+
+    def __init__(self):
+        super().__init__()
+        self.value = None
+        self.discarded = False
+
+    def close(self):
+        if not self.closed:
+            self.value = self.getvalue()
+        super().close()
+
+    def discard(self):
+        self.discarded = True
+        super().close()
+
+
+COLUMNS = {"time": "int64", "depth": "float32", "wet": "bool", "site": "string"}
+
+
+def rows(count: int):
+    return [{"time": i, "depth": i / 2, "wet": i % 2 == 0, "site": f"s{i % 3}"} for i in range(count)]
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        ColumnarWriter(io.BytesIO(), {"time": "datetime"})
+    with pytest.raises(ValueError):
+        ColumnarWriter(io.BytesIO(), COLUMNS, format="csv")
+
+
+def test_missing_pyarrow():
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        with pytest.raises(ImportError):
+            ColumnarWriter(io.BytesIO(), COLUMNS)
+    else:
+        pytest.skip("pyarrow is installed")
+
+
+def test_parquet_row_groups():
+    pytest.importorskip("pyarrow")
+    parquet = pytest.importorskip("pyarrow.parquet")
+    sink = DiscardableStream()
+    with ColumnarWriter(sink, COLUMNS, row_group_size=40) as writer:
+        writer.write_rows(rows(50))
+        writer.write_columns({"time": [50, 51], "depth": [25.0, 25.5], "wet": [True, False], "site": ["s2", "s0"]})
+        assert writer.rows == 52
+    file = parquet.ParquetFile(io.BytesIO(sink.value))
+    assert [file.metadata.row_group(i).num_rows for i in range(file.num_row_groups)] == [40, 12]
+    assert file.read().to_pylist() == rows(52)
+
+
+def test_arrow():
+    pyarrow = pytest.importorskip("pyarrow")
+    sink = DiscardableStream()
+    with ColumnarWriter(sink, COLUMNS, format="arrow", row_group_size=10) as writer:
+        writer.write_rows(rows(25))
+    reader = pyarrow.ipc.open_file(pyarrow.py_buffer(sink.value))
+    assert reader.num_record_batches == 3
+    assert reader.read_all().to_pylist() == rows(25)
+
+
+def test_discard():
+    pytest.importorskip("pyarrow")
+    sink = DiscardableStream()
+    with pytest.raises(KeyError):
+        with ColumnarWriter(sink, COLUMNS) as writer:
+            writer.write_row({"time": 0})
+    assert sink.discarded
+    with pytest.raises(ValueError):
+        ColumnarWriter(DiscardableStream(), COLUMNS).write_columns({"time": [0], "depth": [], "wet": [], "site": []})
+
+
+def test_invalid_row():
+    pytest.importorskip("pyarrow")
+    sink = DiscardableStream()
+    with ColumnarWriter(sink, COLUMNS) as writer:
+        writer.write_rows(rows(2))
+        with pytest.raises(KeyError):
+            writer.write_row({"time": 2, "depth": 1.0, "wet": True})
+        with pytest.raises(TypeError):
+            writer.write_row({"time": 2, "depth": "deep", "wet": True, "site": "s2"})
+        with pytest.raises(TypeError):
+            writer.write_columns({"time": [2, 3], "depth": [1.0, "deep"], "wet": [True, False], "site": ["s2", "s0"]})
+        assert writer.rows == 2
+    assert pytest.importorskip("pyarrow.parquet").read_table(io.BytesIO(sink.value)).to_pylist() == rows(2)
+
+
+def test_discard_closes_the_pyarrow_writer():
+    pytest.importorskip("pyarrow")
+    sink = DiscardableStream()
+    writer = ColumnarWriter(sink, COLUMNS)
+    writer.write_rows(rows(3))
+    writer.flush()
+    writer.discard()
+    del writer
+    # the footer was not written into the discarded stream
+    assert sink.discarded and sink.closed
@@ -0,0 +1,72 @@
+import json
+import pickle
+import pytest
+from cc_sdk import CompactPathList, DataSource
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def paths():
+    return ["a/b/file1.tif", "a/b/file2.tif", "a/c/file1.tif", "no_prefix", "", "d/"]
+
+
+@pytest.fixture
+def compact_paths(paths):
+    return CompactPathList(paths)
+
+
+def test_indexing(compact_paths, paths):
+    assert len(compact_paths) == len(paths)
+    for i, path in enumerate(paths):
+        assert compact_paths[i] == path
+    assert compact_paths[-1] == "d/"
+    assert compact_paths[1:3] == paths[1:3]
+    assert compact_paths[::-1] == paths[::-1]
+    with pytest.raises(IndexError):
+        _ = compact_paths[len(paths)]
+    with pytest.raises(IndexError):
+        _ = compact_paths[-len(paths) - 1]
+
+
+def test_sequence(compact_paths, paths):
+    assert list(compact_paths) == paths
+    assert "a/c/file1.tif" in compact_paths
+    assert "a/c/file2.tif" not in compact_paths
+    assert compact_paths.index("no_prefix") == 3
+    assert compact_paths == paths
+    assert paths == compact_paths
+    assert compact_paths == tuple(paths)
+    assert compact_paths == CompactPathList(paths)
+    assert compact_paths != paths[:-1]
+    assert CompactPathList() == []
+
+
+def test_shared_prefixes(compact_paths):
+    # pylint: disable=protected-access
+    assert len(compact_paths._prefixes) == 4
+    other = CompactPathList(["a/b/other.tif"])
+    assert other._prefixes[0] is compact_paths._prefixes[0]
+
+
+def test_invalid_path():
+    with pytest.raises(ValueError):
+        CompactPathList(["a", 1])
+
+
+def test_pickle(compact_paths):
+    assert pickle.loads(pickle.dumps(compact_paths)) == compact_paths
+
+
+def test_data_source(compact_paths, paths):
+    data_source = DataSource(
+        name="test",
+        id="123",
+        store_name="test_store",
+        paths=compact_paths,
+        data_paths=CompactPathList(),
+    )
+    assert data_source == DataSource(
+        name="test", id="123", store_name="test_store", paths=paths, data_paths=[]
+    )
+    assert json.loads(data_source.serialize())["paths"] == paths
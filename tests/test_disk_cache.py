@@ -0,0 +1,149 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+import pytest
+from cc_sdk import DiskCache, environment_variables
+
+# pylint: disable=redefined-outer-name
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork and fcntl")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path / "cache"))
+
+
+def writer(data, calls=None):
+    def fetch(the_file):
+        if calls is not None:
+            calls.append(1)
+        the_file.write(data)
+
+    return fetch
+
+
+def _read_slowly(directory, counter_path):
+    def fetch(the_file):
+        with open(counter_path, "ab") as counter:
+            counter.write(b"x")
+        time.sleep(0.2)
+        the_file.write(b"shared")
+
+    assert DiskCache(directory).read("etag", 6, fetch) == b"shared"
+
+
+def test_read(cache):
+    calls = []
+    assert cache.read("etag1", 5, writer(b"hello", calls)) == b"hello"
+    assert cache.read("etag1", 5, writer(b"hello", calls)) == b"hello"
+    assert calls == [1]
+    # the ETag and the size identify the content
+    assert cache.read("etag2", 5, writer(b"world", calls)) == b"world"
+    assert len(calls) == 2
+
+
+def test_open(cache):
+    view = cache.open("etag1", 5, writer(b"hello"))
+    assert view.readonly
+    assert bytes(view[1:3]) == b"el"
+    assert bytes(cache.open("empty", 0, writer(b""))) == b""
+
+
+def test_link(cache, tmp_path):
+    dest = tmp_path / "out" / "file"
+    cache.link("etag1", 5, writer(b"hello"), str(dest))
+    cache.link("etag1", 5, writer(b"hello"), str(tmp_path / "other"))
+    assert dest.read_bytes() == b"hello"
+    assert os.stat(dest).st_ino == os.stat(tmp_path / "other").st_ino
+    # the links share the cached file, which must not be changed in place
+    assert os.stat(dest).st_mode & 0o777 == 0o444
+    # an existing destination is replaced
+    cache.link("etag2", 5, writer(b"world"), str(dest))
+    assert dest.read_bytes() == b"world"
+
+
+def test_link_concurrently(cache, tmp_path):
+    dest = tmp_path / "out" / "file"
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: cache.link("etag1", 5, writer(b"hello"), str(dest)), range(16)))
+    assert dest.read_bytes() == b"hello"
+    assert os.listdir(tmp_path / "out") == ["file"]
+
+
+def test_failed_download(cache):
+    def fail(the_file):
+        the_file.write(b"part")
+        raise ConnectionError("lost")
+
+    with pytest.raises(ConnectionError):
+        cache.read("etag1", 5, fail)
+    assert not os.listdir(os.path.join(cache.directory, "objects"))
+    assert not os.listdir(os.path.join(cache.directory, "tmp"))
+    assert cache.read("etag1", 5, writer(b"hello")) == b"hello"
+
+
+def test_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache"), max_bytes=10)
+    view = cache.open("old", 6, writer(b"old..."))
+    cache.link("old", 6, writer(b"old..."), str(tmp_path / "linked"))
+    objects = os.path.join(cache.directory, "objects")
+    (old_name,) = os.listdir(objects)
+    os.utime(os.path.join(objects, old_name), (0, 0))
+    calls = []
+    cache.read("new", 6, writer(b"new...", calls))
+    # the least recently used object made room for the new one
+    assert len(os.listdir(objects)) == 1
+    assert old_name not in os.listdir(objects)
+    # and its lock file
+    assert sorted(os.listdir(os.path.join(cache.directory, "locks"))) == sorted(
+        [f"{name}.lock" for name in os.listdir(objects)] + ["evict.lock"]
+    )
+    # views and links of an evicted object stay valid
+    assert bytes(view) == b"old..."
+    assert (tmp_path / "linked").read_bytes() == b"old..."
+    assert cache.read("new", 6, writer(b"new...", calls)) == b"new..."
+    assert calls == [1]
+
+
+def test_hits_share_the_lock(cache):
+    cache.read("etag", 6, writer(b"shared"))
+    (name,) = os.listdir(os.path.join(cache.directory, "objects"))
+
+    def use(path):
+        # other readers of the object are not blocked, eviction is
+        with cache._locked(name, blocking=False, shared=True) as locked:  # pylint: disable=protected-access
+            assert locked
+        with cache._locked(name, blocking=False) as locked:  # pylint: disable=protected-access
+            assert not locked
+        with open(path, "rb") as the_file:
+            return the_file.read()
+
+    assert cache._use("etag", 6, writer(b""), use) == b"shared"  # pylint: disable=protected-access
+
+
+def test_single_flight(cache, tmp_path):
+    counter_path = str(tmp_path / "downloads")
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_read_slowly, args=(cache.directory, counter_path))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * 4
+    with open(counter_path, "rb") as counter:
+        assert counter.read() == b"x"
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv(environment_variables.CC_DISK_CACHE, raising=False)
+    assert DiskCache.from_env() is None
+    monkeypatch.setenv(environment_variables.CC_DISK_CACHE, str(tmp_path))
+    monkeypatch.setenv(environment_variables.CC_DISK_CACHE_MAX_BYTES, "1000")
+    cache = DiskCache.from_env()
+    assert cache.directory == str(tmp_path)
+    assert cache.max_bytes == 1000
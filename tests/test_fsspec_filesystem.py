@@ -0,0 +1,138 @@
+import pytest
+from moto import mock_s3
+from cc_sdk import (
+    DataSource,
+    DataStore,
+    DataStoreFileSystem,
+    Payload,
+    PluginManager,
+    StoreType,
+    environment_variables,
+)
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def filesystem(monkeypatch):
+    payload = Payload(
+        attributes={},
+        stores=[
+            DataStore(
+                name="store1",
+                id="store_id1",
+                parameters={"root": "my_root"},
+                store_type=StoreType.S3,
+                ds_profile="profile1",
+            )
+        ],
+        inputs=[DataSource(name="input1", id="input_id1", store_name="store1", paths=["a.bin"], data_paths=[])],
+        outputs=[],
+    )
+    monkeypatch.setenv(environment_variables.CC_PAYLOAD_FORMATTED, payload.serialize())
+    monkeypatch.setenv(environment_variables.CC_EVENT_NUMBER, "1")
+    monkeypatch.setenv(environment_variables.CC_PLUGIN_DEFINITION, "test_plugin")
+    for name, value in (
+        (environment_variables.AWS_ACCESS_KEY_ID, "my_access_key"),
+        (environment_variables.AWS_SECRET_ACCESS_KEY, "my_secret_key"),
+        (environment_variables.AWS_DEFAULT_REGION, "us-west-2"),
+        (environment_variables.AWS_S3_BUCKET, "my_bucket"),
+        (environment_variables.S3_MOCK, "True"),
+    ):
+        monkeypatch.setenv("profile1_" + name, value)
+    with mock_s3():
+        PluginManager._instance = None  # don't do this in real code, PluginManager is a singleton
+        PluginManager()
+        the_filesystem = DataStoreFileSystem("store1")
+        the_filesystem._client.create_bucket(  # pylint: disable=protected-access
+            Bucket="my_bucket", CreateBucketConfiguration={"LocationConstraint": "us-west-2"}
+        )
+        yield the_filesystem
+    PluginManager._instance = None
+
+
+def test_pipe_and_cat_file(filesystem):
+    filesystem.pipe("dir/a.bin", b"0123456789")
+    filesystem.pipe({"dir/b.bin": b"abcdef", "dir/sub/c.bin": b"xyz"})
+    assert filesystem.cat_file("dir/a.bin") == b"0123456789"
+    assert filesystem.cat_file("ccstore://dir/b.bin") == b"abcdef"
+    assert filesystem.cat_file("dir/a.bin", start=2, end=5) == b"234"
+    assert filesystem.cat_file("dir/a.bin", start=-3) == b"789"
+    assert filesystem.cat_file("dir/a.bin", end=-8) == b"01"
+    # ranges past the end of the file are clamped to it
+    assert filesystem.cat_file("dir/a.bin", start=8, end=20) == b"89"
+    assert filesystem.cat_file("dir/a.bin", start=10, end=20) == b""
+    assert filesystem.cat_file("dir/a.bin", start=30, end=40) == b""
+    with pytest.raises(FileNotFoundError):
+        filesystem.cat_file("dir/missing.bin")
+
+
+def test_ls_and_info(filesystem):
+    filesystem.pipe({"dir/a.bin": b"0123456789", "dir/sub/c.bin": b"xyz"})
+    entries = filesystem.ls("dir")
+    assert {(entry["name"], entry["type"], entry["size"]) for entry in entries} == {
+        ("dir/a.bin", "file", 10),
+        ("dir/sub", "directory", 0),
+    }
+    assert filesystem.ls("/dir/sub/", detail=False) == ["dir/sub/c.bin"]
+    assert filesystem.ls("dir/a.bin", detail=False) == ["dir/a.bin"]
+    assert filesystem.info("dir/a.bin")["size"] == 10
+    assert filesystem.info("dir/sub")["type"] == "directory"
+    with pytest.raises(FileNotFoundError):
+        filesystem.info("nothing")
+
+
+def test_ls_root(filesystem, monkeypatch):
+    filesystem.pipe({"a.bin": b"a", "dir/b.bin": b"b"})
+    assert sorted(filesystem.ls("", detail=False)) == ["a.bin", "dir"]
+    # a store at the root of the bucket
+    monkeypatch.setattr(filesystem._store, "post_fix", "")  # pylint: disable=protected-access
+    assert filesystem.ls("", detail=False) == ["my_root"]
+    assert filesystem.ls("my_root/dir", detail=False) == ["my_root/dir/b.bin"]
+    assert filesystem.info("my_root")["type"] == "directory"
+
+
+def test_cat_ranges(filesystem, monkeypatch):
+    filesystem.pipe({"a.bin": bytes(range(100)), "b.bin": b"abcdef"})
+    requests = []
+    get_range = filesystem._store.get_range  # pylint: disable=protected-access
+    monkeypatch.setattr(
+        filesystem._store,  # pylint: disable=protected-access
+        "get_range",
+        lambda path, offset, length: requests.append((path, offset, length)) or get_range(path, offset, length),
+    )
+    results = filesystem.cat_ranges(
+        ["a.bin", "a.bin", "b.bin", "a.bin", "missing.bin"],
+        [10, 0, 1, 50, 0],
+        [20, 10, None, 60, 5],
+    )
+    assert results[:4] == [bytes(range(10, 20)), bytes(range(10)), b"bcdef", bytes(range(50, 60))]
+    assert isinstance(results[4], FileNotFoundError)
+    # the adjacent ranges of a.bin are merged
+    assert sorted(requests) == [("a.bin", 0, 20), ("a.bin", 50, 10), ("b.bin", 1, 5), ("missing.bin", 0, 5)]
+    requests.clear()
+    filesystem.cat_ranges(["a.bin", "a.bin"], [0, 50], [10, 60], max_gap=40)
+    assert requests == [("a.bin", 0, 60)]
+    with pytest.raises(FileNotFoundError):
+        filesystem.cat_ranges(["missing.bin"], [0], [5], on_error="raise")
+    assert filesystem.cat_ranges(["b.bin", "b.bin", "b.bin"], [4, 6, 10], [10, 8, 20]) == [b"ef", b"", b""]
+
+
+def test_open_and_rm(filesystem):
+    with filesystem._open("out.bin", "wb") as writer:  # pylint: disable=protected-access
+        writer.write(b"written")
+    reader = filesystem._open("out.bin", "rb")  # pylint: disable=protected-access
+    reader.seek(1)
+    assert reader.read() == b"ritten"
+    filesystem.rm_file("out.bin")
+    with pytest.raises(FileNotFoundError):
+        filesystem.info("out.bin")
+
+
+def test_fsspec_registry(filesystem):
+    fsspec = pytest.importorskip("fsspec")
+    # registered by the package's entry point once installed
+    fsspec.register_implementation("ccstore", DataStoreFileSystem, clobber=True)
+    with fsspec.open("ccstore://x.bin", "wb", store_name="store1") as the_file:
+        the_file.write(b"x")
+    assert filesystem.cat_file("x.bin") == b"x"
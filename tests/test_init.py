@@ -0,0 +1,38 @@
+import subprocess
+import sys
+import pytest
+import cc_sdk
+
+
+def test_lazy_attributes():
+    from cc_sdk.payload import Payload  # pylint: disable=import-outside-toplevel
+
+    assert cc_sdk.Payload is Payload
+    assert "Payload" in dir(cc_sdk)
+    for name in cc_sdk.__all__:
+        assert getattr(cc_sdk, name) is not None
+
+
+def test_missing_attribute():
+    with pytest.raises(AttributeError):
+        _ = cc_sdk.NotAnAttribute
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import cc_sdk",
+        "from cc_sdk import Payload, Status, DataSource, DataStore",
+        "from cc_sdk import PluginManager, FileDataStoreS3",
+    ],
+)
+def test_import_does_not_load_boto3(code):
+    # run in a fresh interpreter, boto3 is already loaded in this one
+    result = subprocess.run(
+        [sys.executable, "-c", code + "; import sys; print('boto3' in sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PYTHONPATH": ":".join(sys.path)},
+    )
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,119 @@
+import os
+import pytest
+from moto import mock_s3
+import boto3
+from cc_sdk import multipart_writer
+from cc_sdk.multipart_writer import MIN_PART_SIZE, MultipartWriter
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "my_access_key")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "my_secret_key")
+    with mock_s3():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="my_bucket")
+        yield client
+
+
+def read(client, key: str) -> bytes:
+    return client.get_object(Bucket="my_bucket", Key=key)["Body"].read()
+
+
+def test_multipart_upload(s3_client):
+    data = os.urandom(2 * MIN_PART_SIZE + 1234)
+    published = []
+    writer = MultipartWriter(s3_client, "my_bucket", "out.bin", MIN_PART_SIZE, on_publish=lambda: published.append(1))
+    with writer:
+        for start in range(0, len(data), 1000000):
+            writer.write(data[start : start + 1000000])
+        assert writer.tell() == len(data)
+        # parts are uploaded while writing, the object is published on close
+        assert s3_client.list_multipart_uploads(Bucket="my_bucket")["Uploads"]
+        assert "Contents" not in s3_client.list_objects_v2(Bucket="my_bucket")
+        assert not published
+    assert read(s3_client, "out.bin") == data
+    assert published == [1]
+    assert "Uploads" not in s3_client.list_multipart_uploads(Bucket="my_bucket")
+
+
+def test_small_output_single_put(s3_client):
+    with MultipartWriter(s3_client, "my_bucket", "small.txt") as writer:
+        writer.write(b"Hello, world!")
+    assert read(s3_client, "small.txt") == b"Hello, world!"
+    assert "Uploads" not in s3_client.list_multipart_uploads(Bucket="my_bucket")
+
+
+def test_abort_on_exception(s3_client):
+    with pytest.raises(KeyError):
+        with MultipartWriter(s3_client, "my_bucket", "out.bin", MIN_PART_SIZE) as writer:
+            writer.write(os.urandom(MIN_PART_SIZE + 10))
+            raise KeyError("failed")
+    assert writer.closed
+    assert "Uploads" not in s3_client.list_multipart_uploads(Bucket="my_bucket")
+    assert "Contents" not in s3_client.list_objects_v2(Bucket="my_bucket")
+
+
+def test_part_size_too_small(s3_client):
+    with pytest.raises(ValueError):
+        MultipartWriter(s3_client, "my_bucket", "out.bin", part_size=1024)
+
+
+class FailingClient:
+    """Fails the uploads of parts and records the aborted uploads"""
+
+    def __init__(self):
+        self.aborted = []
+
+    def create_multipart_upload(self, **_):
+        return {"UploadId": "upload"}
+
+    def upload_part(self, **_):
+        raise IOError("connection reset")
+
+    def abort_multipart_upload(self, **kwargs):
+        self.aborted.append(kwargs["UploadId"])
+
+
+def test_abort_on_failed_part():
+    client = FailingClient()
+    writer = MultipartWriter(client, "my_bucket", "out.bin", MIN_PART_SIZE, max_concurrency=1)
+    with pytest.raises(IOError):
+        for _ in range(3):
+            writer.write(bytes(MIN_PART_SIZE))
+    assert writer.closed
+    assert client.aborted == ["upload"]
+
+
+class RecordingClient:
+    """Records the sizes of the uploaded parts"""
+
+    def __init__(self):
+        self.part_sizes = []
+        self.aborted = []
+
+    def create_multipart_upload(self, **_):
+        return {"UploadId": "upload"}
+
+    def upload_part(self, **kwargs):
+        self.part_sizes.append(len(kwargs["Body"]))
+        return {"ETag": str(kwargs["PartNumber"])}
+
+    def abort_multipart_upload(self, **kwargs):
+        self.aborted.append(kwargs["UploadId"])
+
+
+def test_part_limit(monkeypatch):
+    monkeypatch.setattr(multipart_writer, "PARTS_PER_SIZE", 2)
+    monkeypatch.setattr(multipart_writer, "MAX_PARTS", 5)
+    client = RecordingClient()
+    writer = MultipartWriter(client, "my_bucket", "out.bin", MIN_PART_SIZE, max_concurrency=1)
+    with pytest.raises(IOError):
+        for _ in range(20):
+            writer.write(bytes(MIN_PART_SIZE))
+    # the part size doubles every 2 parts, and the sixth part is refused before it is uploaded
+    assert client.part_sizes == [MIN_PART_SIZE] * 2 + [2 * MIN_PART_SIZE] * 2 + [4 * MIN_PART_SIZE]
+    assert writer.closed
+    assert client.aborted == ["upload"]
@@ -0,0 +1,102 @@
+import threading
+import time
+import pytest
+from cc_sdk import ObjectCache, ObjectCacheStats
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def cache():
+    return ObjectCache(max_bytes=10)
+
+
+def test_get(cache):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return b"hello"
+
+    assert cache.get("a", fetch) == b"hello"
+    assert cache.get("a", fetch) == b"hello"
+    assert calls == [1]
+    assert cache.stats() == ObjectCacheStats(
+        hits=1, misses=1, coalesced=0, evictions=0, entries=1, size_bytes=5
+    )
+    assert cache.stats().hit_ratio == 0.5
+
+
+def test_lru_eviction(cache):
+    cache.get("a", lambda: b"aaaa")
+    cache.get("b", lambda: b"bbbb")
+    # a is now the most recently used
+    cache.get("a", lambda: b"")
+    cache.get("c", lambda: b"cccc")
+    # b was the least recently used
+    assert cache.stats().evictions == 1
+    assert cache.get("a", lambda: b"refetched") == b"aaaa"
+    assert cache.get("b", lambda: b"refetched") == b"refetched"
+    assert cache.stats().size_bytes <= 10
+    # too large to cache
+    assert cache.get("big", lambda: b"x" * 11) == b"x" * 11
+    assert cache.get("big", lambda: b"y") == b"y"
+
+
+def test_single_flight(cache):
+    started = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return b"shared"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("a", fetch))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [b"shared"] * 8
+    assert calls == [1]
+    stats = cache.stats()
+    assert stats.misses == 1
+    assert stats.hits + stats.coalesced == 7
+
+
+def test_failed_fetch(cache):
+    release = threading.Event()
+
+    def fail():
+        release.wait()
+        raise ConnectionError("lost")
+
+    errors = []
+
+    def get():
+        try:
+            cache.get("a", fail)
+        except ConnectionError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=get) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    # every caller waiting on the failed fetch sees its error, and nothing is cached
+    assert len(errors) == 3
+    assert cache.get("a", lambda: b"ok") == b"ok"
+
+
+def test_invalidate(cache):
+    cache.get("a", lambda: b"old")
+    cache.invalidate("a")
+    assert cache.get("a", lambda: b"new") == b"new"
+    cache.clear()
+    assert cache.stats().entries == 0
+    assert cache.stats().size_bytes == 0
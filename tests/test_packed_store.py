@@ -0,0 +1,193 @@
+import gc
+import io
+import threading
+import pytest
+from cc_sdk import packed_store
+from cc_sdk.packed_store import PackedFileDataStore
+
+
+FILES = {f"out/{i:04d}.txt": f"result {i}\n".encode() * (i % 7 + 1) for i in range(1000)}
+
+
+@pytest.fixture
+def store(memory_store):
+    return memory_store
+
+
+def write_all(packed: PackedFileDataStore) -> None:
+    for path, content in FILES.items():
+        assert packed.put_buffer(content, path)
+    packed.flush()
+
+
+def test_packs_small_files(store):
+    packed = PackedFileDataStore(store, "packed", shard_size=16 * 1024)
+    write_all(packed)
+    shards = [path for path in store.files if path.endswith(".shard")]
+    assert len(shards) == store.requests - len(shards)
+    assert 1 < len(shards) < 10
+    assert not any(path.startswith("out/") for path in store.files)
+    assert packed.get("out/0042.txt").getvalue() == FILES["out/0042.txt"]
+
+
+def test_reader(store):
+    write_all(PackedFileDataStore(store, "packed", shard_size=16 * 1024))
+    store.files["out/plain.txt"] = b"not packed"
+    store.requests = 0
+    reader = PackedFileDataStore(store, "/packed/")
+    assert reader.get("out/0005.txt").getvalue() == FILES["out/0005.txt"]
+    # the listing and the index, then a request per file
+    assert store.requests == 3
+    assert reader.get_range("out/0006.txt", 7, 1) == FILES["out/0006.txt"][7:8]
+    assert bytes(reader.get_buffer("out/0007.txt")) == FILES["out/0007.txt"]
+    assert reader.open_read("out/0008.txt").read() == FILES["out/0008.txt"]
+    assert reader.get("out/plain.txt").getvalue() == b"not packed"
+    assert store.requests == 7
+    with pytest.raises(KeyError):
+        reader.get("out/missing.txt")
+    assert reader.delete("out/0005.txt") is False
+
+
+def test_pending_and_large_files(store):
+    packed = PackedFileDataStore(store, "packed", max_member_size=100)
+    assert packed.put(io.BytesIO(b"small"), "small")
+    assert packed.put(io.BytesIO(b"x" * 101), "large")
+    assert packed.put(io.BufferedReader(io.BytesIO(b"y" * 200)), "large stream")
+    assert store.files == {"large": b"x" * 101, "large stream": b"y" * 200}
+    # served from the pending shard
+    assert packed.get("small").getvalue() == b"small"
+    assert packed.get_range("small", 1, 10) == b"mall"
+    # a packed file replaced by a large one
+    packed.put_buffer(b"z" * 200, "small")
+    assert packed.get("small").getvalue() == b"z" * 200
+    packed.flush()
+    assert PackedFileDataStore(store, "packed").get("small").getvalue() == b"z" * 200
+
+
+def test_delete(store):
+    packed = PackedFileDataStore(store, "packed")
+    packed.put_buffer(b"a", "a")
+    packed.put_buffer(b"b", "b")
+    packed.flush()
+    assert packed.delete("a") is True
+    packed.flush()
+    reader = PackedFileDataStore(store, "packed")
+    with pytest.raises(KeyError):
+        reader.get("a")
+    assert reader.get("b").getvalue() == b"b"
+    # a file packed by another writer is not deleted, even before the indexes were loaded, nor is the file of
+    # the same path in the underlying store
+    store.files["b"] = b"unpacked"
+    assert PackedFileDataStore(store, "packed").delete("b") is False
+    assert store.files["b"] == b"unpacked"
+    assert reader.get("b").getvalue() == b"b"
+
+
+def test_copy(store):
+    packed = PackedFileDataStore(store, "packed")
+    packed.put_buffer(b"content", "a")
+    destination = type(store)()
+    assert packed.copy(destination, "a", "b")
+    assert destination.files == {"b": b"content"}
+
+
+def test_rollback(store):
+    packed = PackedFileDataStore(store, "packed", shard_size=16)
+    packed.put_buffer(b"kept", "kept")
+    packed.flush()
+    # a failed event: a shard fills up and is uploaded, another file is pending and one is deleted
+    packed.put_buffer(b"x" * 16, "full")
+    packed.put_buffer(b"pending", "pending")
+    packed.put_buffer(b"replaced", "kept")
+    packed.rollback()
+    assert packed.get("kept").getvalue() == b"kept"
+    with pytest.raises(KeyError):
+        packed.get("full")
+    packed.flush()
+    reader = PackedFileDataStore(store, "packed")
+    assert reader.get("kept").getvalue() == b"kept"
+    for path in ("full", "pending"):
+        with pytest.raises(KeyError):
+            reader.get(path)
+
+
+def test_sibling_prefix(store):
+    packed = PackedFileDataStore(store, "packed")
+    packed.put_buffer(b"a", "a")
+    packed.flush()
+    sibling = PackedFileDataStore(store, "packed2")
+    sibling.put_buffer(b"b", "b")
+    sibling.flush()
+    with pytest.raises(KeyError):
+        PackedFileDataStore(store, "packed").get("b")
+
+
+def test_reload_on_miss(store):
+    reader = PackedFileDataStore(store, "packed", reload_interval=0)
+    with pytest.raises(KeyError):
+        reader.get("a")
+    packed = PackedFileDataStore(store, "packed")
+    packed.put_buffer(b"a", "a")
+    packed.flush()
+    assert reader.get("a").getvalue() == b"a"
+    # not reloaded before the interval
+    reader.reload_interval = 60
+    packed.put_buffer(b"b", "b")
+    packed.flush()
+    with pytest.raises(KeyError):
+        reader.get("b")
+
+
+def test_indexes_loaded_without_the_lock(store, monkeypatch):
+    packed = PackedFileDataStore(store, "packed")
+    listing = threading.Event()
+    written = threading.Event()
+    waits = []
+    list_paths = store.list_paths
+
+    def slow_list_paths(prefix):
+        listing.set()
+        waits.append(written.wait(5))
+        return list_paths(prefix)
+
+    monkeypatch.setattr(store, "list_paths", slow_list_paths)
+    reader = threading.Thread(target=lambda: pytest.raises(KeyError, packed.get, "missing"))
+    reader.start()
+    assert listing.wait(5)
+    # written while the indexes are loaded
+    assert packed.put_buffer(b"a", "a")
+    written.set()
+    reader.join()
+    assert waits == [True]
+    assert packed.get("a").getvalue() == b"a"
+
+
+def test_latest_write_wins(store):
+    first = PackedFileDataStore(store, "packed")
+    first.put_buffer(b"packed", "a")
+    first.flush()
+    # another writer rewrites the file unpacked
+    second = PackedFileDataStore(store, "packed", max_member_size=1)
+    second.put_buffer(b"unpacked", "a")
+    second.flush()
+    assert PackedFileDataStore(store, "packed").get("a").getvalue() == b"unpacked"
+
+
+def test_open_write(store):
+    packed = PackedFileDataStore(store, "packed")
+    packed.put_buffer(b"packed", "a")
+    with packed.open_write("a") as stream:
+        stream.write(b"streamed")
+    assert store.files["a"] == b"streamed"
+    assert packed.get("a").getvalue() == b"streamed"
+
+
+def test_flushed_at_exit(store):
+    packed = PackedFileDataStore(store, "packed")
+    packed.put_buffer(b"a", "a")
+    packed_store._flush_all()  # pylint: disable=protected-access
+    assert PackedFileDataStore(store, "packed").get("a").getvalue() == b"a"
+    count = len(packed_store._stores)  # pylint: disable=protected-access
+    del packed
+    gc.collect()
+    assert len(packed_store._stores) < count  # pylint: disable=protected-access
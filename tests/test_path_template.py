@@ -0,0 +1,74 @@
+import pytest
+from cc_sdk.path_template import (
+    compile_path_format,
+    compile_path_template,
+    render_path_template,
+    render_path_templates,
+)
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def values():
+    return {("ENV", "EVENT"): "7", ("ATTR", "model"): "hms"}
+
+
+def test_compile_path_template():
+    assert compile_path_template("a/b.tif") == ("a/b.tif",)
+    assert compile_path_template("{ATTR::model}/event_{ENV::EVENT}.tif") == (
+        ("ATTR", "model"),
+        "/event_",
+        ("ENV", "EVENT"),
+        ".tif",
+    )
+    # unknown prefixes and plain braces stay literal
+    assert compile_path_template("{X::y}/{z}/{ENV::A}") == ("{X::y}/{z}/", ("ENV", "A"))
+    assert compile_path_template("{ENV::A::B}") == (("ENV", "A::B"),)
+    assert compile_path_template("a/b.tif") is compile_path_template("a/b.tif")
+
+
+def test_compile_path_format():
+    assert compile_path_format("{ATTR::a}/{ENV::B}/{ATTR::a}") == (
+        "{0}/{1}/{0}",
+        (("ATTR", "a"), ("ENV", "B")),
+    )
+    assert compile_path_format("{x}/{ENV::B}}") == ("{{x}}/{0}}}", (("ENV", "B"),))
+
+
+def test_render_path_template(values):
+    assert render_path_template("{ATTR::model}/{ENV::EVENT}/{ENV::EVENT}", values.get) == "hms/7/7"
+    assert render_path_template("{X::y}/{ATTR::model}", values.get) == "{X::y}/hms"
+
+
+def test_render_path_templates(values):
+    templates = [f"{{ATTR::model}}/file_{i}_{{ENV::EVENT}}.tif" for i in range(1000)]
+    templates += ["plain", "", "{X::y}", "{unclosed/{ENV::EVENT}"]
+    calls = []
+
+    def resolve(placeholder):
+        calls.append(placeholder)
+        return values[placeholder]
+
+    rendered = render_path_templates(templates, resolve)
+    assert rendered == [render_path_template(template, values.get) for template in templates]
+    assert rendered[-1] == "{unclosed/7"
+    # each distinct placeholder is resolved once
+    assert sorted(calls) == sorted(values)
+    assert render_path_templates([], resolve) == []
+
+
+def test_render_path_templates_separator(values):
+    # values containing the separator fall back to rendering path by path
+    templates = ["{ATTR::model}/a", "b"]
+    assert render_path_templates(templates, lambda _: "x\0y") == ["x\0y/a", "b"]
+    assert render_path_templates(["a\0{ENV::EVENT}", "b"], values.get) == ["a\x007", "b"]
+
+
+def test_long_templates_not_cached():
+    template = "x" * 5000 + "/{ATTR::a}"
+    compile_path_template.cache_clear()
+    compile_path_format.cache_clear()
+    assert render_path_template(template, lambda placeholder: "v") == "x" * 5000 + "/v"
+    assert compile_path_template.cache_info().currsize == 0
+    assert compile_path_format.cache_info().currsize == 0
@@ -1,6 +1,7 @@
 import json
+import math
 import pytest
-from cc_sdk import Payload, DataSource, DataStore, StoreType
+from cc_sdk import Payload, DataSource, DataStore, StoreType, CompactPathList
 
 # pylint: disable=redefined-outer-name
 
@@ -121,3 +122,46 @@ def test_from_json(payload):
                             "id": "output_id1", "store_name": "store1", "paths": ["/path/to/output1"], "data_paths": []}, {"name": \
                                 "output2", "id": "output_id2", "store_name": "store2", "paths": ["/path/to/output2"], "data_paths": []}]}'
     assert payload == Payload.from_json(payload_str)
+
+
+def test_from_json_unvalidated(payload):
+    assert Payload.from_json(payload.serialize(), validate=False) == payload
+    assert Payload.from_json(payload.serialize().encode(), validate=False) == payload
+    # unknown keys are rejected, as by the validated construction
+    data = json.loads(payload.serialize())
+    data["stores"][0]["unknown"] = 1
+    for validate in (True, False):
+        with pytest.raises(TypeError):
+            Payload.from_json(json.dumps(data), validate=validate)
+
+
+def test_from_json_beyond_orjson(payload):
+    # NaN and integers wider than 64 bits are written by json.dumps but rejected by orjson
+    payload = Payload({"nan": float("nan"), "big": 2**70}, payload.stores, payload.inputs, payload.outputs)
+    for validate in (True, False):
+        loaded = Payload.from_json(payload.serialize(), validate=validate)
+        assert math.isnan(loaded.attributes["nan"])
+        assert loaded.attributes["big"] == 2**70
+
+
+def test_from_json_invalid(payload):
+    payload_dict = json.loads(payload.serialize())
+    payload_dict["inputs"][0]["paths"] = ["/path/to/data1", 2]
+    with pytest.raises(ValueError):
+        Payload.from_json(json.dumps(payload_dict))
+    payload_dict = json.loads(payload.serialize())
+    payload_dict["attributes"] = ["attr1"]
+    with pytest.raises(TypeError):
+        Payload.from_json(json.dumps(payload_dict))
+    payload_dict = json.loads(payload.serialize())
+    payload_dict["stores"][0]["store_type"] = "NOT_A_STORE_TYPE"
+    with pytest.raises(KeyError):
+        Payload.from_json(json.dumps(payload_dict))
+
+
+def test_from_json_compact(payload):
+    compact_payload = Payload.from_json(payload.serialize(), compact=True)
+    assert isinstance(compact_payload.inputs[0].paths, CompactPathList)
+    assert compact_payload.inputs[0].paths[0] == "/path/to/data1"
+    assert compact_payload == payload
+    assert compact_payload.serialize() == payload.serialize()
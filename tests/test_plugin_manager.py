@@ -1,5 +1,6 @@
 import io
 import os
+import zipfile
 import pytest
 import boto3
 from moto import mock_s3
@@ -14,6 +15,8 @@ from cc_sdk import (
     FileDataStoreS3,
     PutObjectInput,
     ObjectState,
+    CompactPathList,
+    PackedFileDataStore,
 )
 
 # pylint: disable=redefined-outer-name
@@ -174,6 +177,10 @@ def plugin_manager(payload, monkeypatch):
         )
         store.put_object(data1_input)
         store.put_object(data2_input)
+        # pylint: disable=protected-access
+        PluginManager._instance = (
+            None  # don't do this in real code, it defeats the purpose of a singleton.
+        )
         yield PluginManager()
         # cleanup mock s3 bucket
         response = s3_client.list_objects_v2(Bucket="my_bucket")
@@ -230,6 +237,13 @@ def test_put_file(plugin_manager):
     assert plugin_manager.put_file(b"output data 1", data_source, 0) is True
 
 
+@pytest.mark.parametrize("data_type", [bytearray, memoryview])
+def test_put_file_bytes_like(plugin_manager, data_type):
+    data_source = plugin_manager.get_output_data_source("output1")
+    assert plugin_manager.put_file(data_type(b"output data 1"), data_source, 0) is True
+    assert plugin_manager.get_file(data_source, 0) == b"output data 1"
+
+
 def test_file_writer(plugin_manager):
     data_source = plugin_manager.get_output_data_source("output2")
     assert (
@@ -237,6 +251,105 @@ def test_file_writer(plugin_manager):
     )
 
 
+def test_get_file_buffer(plugin_manager):
+    data_source = plugin_manager.get_input_data_source("input1")
+    assert bytes(plugin_manager.get_file_buffer(data_source, 0)) == b"test data 1"
+    plugin_manager.release_file_buffer(data_source, 0)
+
+
+def test_array(plugin_manager):
+    numpy = pytest.importorskip("numpy")
+    data_source = plugin_manager.get_output_data_source("output1")
+    array = numpy.arange(12, dtype="<f8").reshape(3, 4)
+    assert plugin_manager.put_array(array, data_source, 0) is True
+    result = plugin_manager.get_array(data_source, 0, "<f8", (3, 4))
+    assert not result.flags.writeable
+    assert numpy.array_equal(result, array)
+    with pytest.raises(ValueError):
+        plugin_manager.get_array(data_source, 0, "<f8", (5, 5))
+    # a non contiguous array is uploaded in C order
+    assert plugin_manager.put_array(array.T, data_source, 0) is True
+    assert numpy.array_equal(plugin_manager.get_array(data_source, 0, "<f8", (4, 3)), array.T)
+
+
+def test_open_writer(plugin_manager):
+    data_source = plugin_manager.get_output_data_source("output2")
+    with plugin_manager.open_writer(data_source, 0) as writer:
+        for i in range(3):
+            writer.write(f"line {i}\n".encode())
+    assert plugin_manager.file_reader(data_source, 0).getvalue() == b"line 0\nline 1\nline 2\n"
+
+
+def test_open_columnar_writer(plugin_manager):
+    data_source = plugin_manager.get_output_data_source("output2")
+    with pytest.raises(ValueError):
+        plugin_manager.open_columnar_writer(data_source, 0, {"time": "int64"}, format="csv")
+    parquet = pytest.importorskip("pyarrow.parquet")
+    with plugin_manager.open_columnar_writer(data_source, 0, {"time": "int64", "value": "float64"}) as writer:
+        writer.write_rows({"time": i, "value": i / 2} for i in range(3))
+    table = parquet.read_table(plugin_manager.file_reader(data_source, 0))
+    assert table.to_pylist() == [{"time": i, "value": i / 2} for i in range(3)]
+
+
+def test_open_reader(plugin_manager):
+    data_source = plugin_manager.get_output_data_source("output2")
+    plugin_manager.put_file(b"output data 2", data_source, 0)
+    reader = plugin_manager.open_reader(data_source, 0)
+    assert reader.seekable()
+    reader.seek(7)
+    assert reader.read() == b"data 2"
+
+
+def test_open_archive(plugin_manager):
+    data_source = plugin_manager.get_output_data_source("output2")
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("a.txt", b"member a")
+        archive.writestr("b.txt", b"member b")
+    plugin_manager.put_file(data.getvalue(), data_source, 0)
+    reader = plugin_manager.open_archive(data_source, 0, format="zip")
+    assert reader.read("b.txt") == b"member b"
+
+
+def test_packed_outputs(plugin_manager):
+    data_store = plugin_manager.get_store("store2")
+    packed = PackedFileDataStore(FileDataStoreS3(data_store), "packed", shard_size=256)
+    data_store.session = packed
+    data_source = DataSource(
+        name="many", id="many", store_name="store2", paths=[f"out/{i}" for i in range(100)], data_paths=[]
+    )
+    for i in range(100):
+        assert plugin_manager.put_file(b"output %d" % i, data_source, i)
+    plugin_manager.flush_outputs()
+    # a PUT per shard of 256 bytes and one for the index
+    assert len(packed.list_paths("packed/")) == 5
+    assert not packed.list_paths("out/")
+    # a downstream plugin's session
+    data_store.session = PackedFileDataStore(FileDataStoreS3(data_store), "packed")
+    assert plugin_manager.get_file(data_source, 42) == b"output 42"
+    assert plugin_manager.file_reader(data_source, 7).getvalue() == b"output 7"
+
+
+def test_packed_session(plugin_manager):
+    data_store = DataStore(
+        name="packed",
+        id="packed",
+        parameters={"root": "store2_root", "pack": "packed", "pack_max_member_size": "10"},
+        store_type=StoreType.S3,
+        ds_profile="profile2",
+    )
+    plugin_manager._create_session(data_store)  # pylint: disable=protected-access
+    assert isinstance(data_store.session, PackedFileDataStore)
+    assert data_store.session.max_member_size == 10
+
+
+def test_iter_records(plugin_manager):
+    data_source = plugin_manager.get_output_data_source("output2")
+    plugin_manager.put_file(b"time,value\n0,1.5\n1,2.5\n", data_source, 0)
+    records = plugin_manager.iter_records(data_source, 0, format="csv", batch_size=1)
+    assert list(records) == [[{"time": "0", "value": "1.5"}], [{"time": "1", "value": "2.5"}]]
+
+
 def test_file_reader(plugin_manager):
     data_source = plugin_manager.get_output_data_source("output2")
     plugin_manager.file_writer(io.BytesIO(b"output data 2"), data_source, 0)
@@ -266,6 +379,227 @@ def test_find_data_store(plugin_manager):
     assert plugin_manager._find_data_store("store1").name == "store1"
 
 
+def test_find_is_case_insensitive(plugin_manager):
+    assert plugin_manager.get_input_data_source("INPUT2").name == "input2"
+    assert plugin_manager.get_output_data_source("Output2").name == "output2"
+    assert plugin_manager.get_store("STORE2").name == "store2"
+    assert plugin_manager._find_data_source("input3", plugin_manager.get_input_data_sources()) is None
+    # lists that are not part of the payload are searched too
+    assert plugin_manager._find_data_source(
+        "OUTPUT1", list(plugin_manager.get_output_data_sources())
+    ).name == "output1"
+
+
+def test_find_after_payload_change(plugin_manager):
+    new_store = DataStore(
+        name="new_store",
+        id="new_store_id",
+        parameters={"root": "new_root"},
+        store_type=StoreType.S3,
+        ds_profile="profile1",
+    )
+    plugin_manager.get_payload().set_store(0, new_store)
+    assert plugin_manager.get_store("new_store") is new_store
+    with pytest.raises(RuntimeError):
+        plugin_manager.get_store("store1")
+
+
+def test_find_miss_does_not_reindex(plugin_manager, monkeypatch):
+    monkeypatch.setenv("TEST_ENV_VAR", "test")
+    plugin_manager.get_payload()
+    calls = []
+    index_by_name = PluginManager._index_by_name  # pylint: disable=protected-access
+    monkeypatch.setattr(PluginManager, "_index_by_name", lambda items: calls.append(items) or index_by_name(items))
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            plugin_manager.get_store("missing")
+    assert not calls
+    plugin_manager.get_payload().stores.append(plugin_manager.get_store("store1"))
+    with pytest.raises(RuntimeError):
+        plugin_manager.get_store("missing")
+    assert len(calls) == 1
+
+
+def test_store_sessions_are_lazy(plugin_manager):
+    assert all(store.session is None for store in plugin_manager.get_payload().stores)
+    assert isinstance(plugin_manager.get_file_store("store1"), FileDataStoreS3)
+    assert plugin_manager.get_store("store1").session is not None
+    assert plugin_manager.get_store("store2").session is None
+
+
+def test_eager_store_sessions(plugin_manager, monkeypatch):
+    monkeypatch.setenv(environment_variables.CC_EAGER_STORE_SESSIONS, "True")
+    # pylint: disable=protected-access
+    PluginManager._instance = (
+        None  # don't do this in real code, it defeats the purpose of a singleton.
+    )
+    eager_plugin_manager = PluginManager()
+    assert eager_plugin_manager is not plugin_manager
+    stores = eager_plugin_manager.get_payload().stores
+    assert all(isinstance(store.session, FileDataStoreS3) for store in stores)
+    assert eager_plugin_manager.get_file(
+        eager_plugin_manager.get_input_data_source("input2"), 0
+    ) == b"test data 2"
+
+
+def test_payload_formatted(plugin_manager, payload, monkeypatch):
+    monkeypatch.setenv(environment_variables.CC_PAYLOAD_FORMATTED, payload.serialize())
+    # the CC store is not needed when the payload is handed over
+    monkeypatch.delenv(environment_variables.CC_ROOT)
+    # pylint: disable=protected-access
+    PluginManager._instance = (
+        None  # don't do this in real code, it defeats the purpose of a singleton.
+    )
+    local_plugin_manager = PluginManager()
+    assert local_plugin_manager is not plugin_manager
+    assert local_plugin_manager._cc_store is None
+    assert local_plugin_manager.get_payload().outputs == payload.outputs
+    data_source = local_plugin_manager.get_input_data_source("input1")
+    assert local_plugin_manager.get_file(data_source, 0) == b"test data 1"
+
+
+def test_compact_payload(plugin_manager, monkeypatch):
+    monkeypatch.setenv(environment_variables.CC_PAYLOAD_COMPACT, "True")
+    monkeypatch.setenv("TEST_ENV_VAR", "test")
+    # pylint: disable=protected-access
+    PluginManager._instance = (
+        None  # don't do this in real code, it defeats the purpose of a singleton.
+    )
+    compact_plugin_manager = PluginManager()
+    assert compact_plugin_manager is not plugin_manager
+    data_source = compact_plugin_manager.get_payload().inputs[0]
+    assert isinstance(data_source.data_paths, CompactPathList)
+    assert data_source.data_paths[0] == "test/path/to/value1"
+    assert compact_plugin_manager.get_file(data_source, 0) == b"test data 1"
+
+
+def test_substitute_paths(plugin_manager, monkeypatch):
+    monkeypatch.setenv("TEST_ENV_VAR", "test")
+    assert plugin_manager.substitute_paths("no/placeholders") == "no/placeholders"
+    assert (
+        plugin_manager.substitute_paths("{ENV::TEST_ENV_VAR}/{ATTR::attr1}/{ENV::TEST_ENV_VAR}")
+        == "test/value1/test"
+    )
+    # placeholders of other kinds are left as they are
+    assert plugin_manager.substitute_paths("{OTHER::x}/{plain}/{ENV::TEST_ENV_VAR}") == "{OTHER::x}/{plain}/test"
+    # values are not substituted again
+    monkeypatch.setenv("NESTED_ENV_VAR", "{ENV::TEST_ENV_VAR}")
+    assert plugin_manager.substitute_paths("{ENV::NESTED_ENV_VAR}") == "{ENV::TEST_ENV_VAR}"
+    with pytest.raises(EnvironmentError):
+        plugin_manager.substitute_paths("{ENV::MISSING_ENV_VAR}")
+    with pytest.raises(RuntimeError):
+        plugin_manager.substitute_paths("{ATTR::missing_attr}")
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_run_events(plugin_manager, payload, monkeypatch, prefetch):
+    monkeypatch.setenv("TEST_ENV_VAR", "test")
+    failures = CCStoreS3().set_payloads(
+        payload, range(1, 4), attributes=lambda event: {"attr1": f"event{event}"}
+    )
+    assert not failures
+    seen = []
+    file_stores = set()
+
+    def handler(event):
+        data_source = plugin_manager.get_payload().inputs[0]
+        seen.append((event, plugin_manager.event_number(), data_source.data_paths[0]))
+        file_stores.add(id(plugin_manager.get_file_store("store1")))
+        if event == 2:
+            raise ValueError("event 2 fails")
+
+    failures = plugin_manager.run_events(handler, [1, 2, 9, 3], prefetch=prefetch)
+    assert seen == [
+        (1, 1, "test/path/to/event1"),
+        (2, 2, "test/path/to/event2"),
+        (3, 3, "test/path/to/event3"),
+    ]
+    # sessions are kept between events
+    assert len(file_stores) == 1
+    # event 9 has no payload
+    assert sorted(failures) == [2, 9]
+    assert isinstance(failures[2], ValueError)
+    assert os.getenv(environment_variables.CC_EVENT_NUMBER) == "000"
+
+
+def test_run_events_shared_payload(plugin_manager, payload, monkeypatch):
+    payload.inputs[0].data_paths[0] = "event_{ENV::CC_EVENT_NUMBER}/{ATTR::attr1}"
+    monkeypatch.setenv(environment_variables.CC_PAYLOAD_FORMATTED, payload.serialize())
+    monkeypatch.setattr("sys.stdin", io.StringIO("5\n\nsix\n6\n"))
+    # pylint: disable=protected-access
+    PluginManager._instance = (
+        None  # don't do this in real code, it defeats the purpose of a singleton.
+    )
+    local_plugin_manager = PluginManager()
+    assert local_plugin_manager is not plugin_manager
+    seen = []
+    failures = local_plugin_manager.run_events(
+        lambda event: seen.append(local_plugin_manager.get_payload().inputs[0].data_paths[0])
+    )
+    # the malformed line fails as an event, the others run
+    assert list(failures) == ["six"]
+    assert isinstance(failures["six"], ValueError)
+    assert seen == ["event_5/value1", "event_6/value1"]
+    # the data sources are templates again until the next get_payload
+    local_plugin_manager._reset_paths()
+    assert local_plugin_manager.get_input_data_source("input1").data_paths[0] == payload.inputs[0].data_paths[0]
+
+
+def test_run_events_rolls_back_failed_events(plugin_manager, payload, monkeypatch):
+    monkeypatch.setenv(environment_variables.CC_PAYLOAD_FORMATTED, payload.serialize())
+    PluginManager._instance = None  # pylint: disable=protected-access
+    local_plugin_manager = PluginManager()
+    data_store = local_plugin_manager.get_store("store2")
+    data_store.session = PackedFileDataStore(FileDataStoreS3(data_store), "packed")
+    data_source = DataSource(name="many", id="many", store_name="store2", paths=["out/1", "out/2"], data_paths=[])
+
+    def handler(event):
+        local_plugin_manager.put_file(b"output %d" % event, data_source, event - 1)
+        if event == 2:
+            raise ValueError("event 2 fails")
+
+    failures = local_plugin_manager.run_events(handler, [1, 2])
+    assert sorted(failures) == [2]
+    local_plugin_manager.flush_outputs()
+    reader = PackedFileDataStore(FileDataStoreS3(data_store), "packed")
+    assert reader.get("out/1").getvalue() == b"output 1"
+    assert not reader.list_paths("out/")
+    with pytest.raises(Exception):
+        reader.get("out/2")
+
+
+def _path_and_data(path, data):
+    # runs in a map_paths worker, which has its own PluginManager
+    assert PluginManager._instance is not None  # pylint: disable=protected-access
+    return path, data
+
+
+def _fail_on_data2(path, _):
+    if path.endswith("data2"):
+        raise ValueError(path)
+    return path
+
+
+def test_map_paths(plugin_manager, monkeypatch):
+    monkeypatch.setenv("TEST_ENV_VAR", "test")
+    data_source = DataSource(
+        name="many",
+        id="many_id",
+        store_name="store1",
+        paths=["path/to/data1", "path/to/data1", "path/to/data1"],
+        data_paths=[],
+    )
+    assert list(plugin_manager.map_paths(_path_and_data, data_source, processes=2)) == [
+        ("path/to/data1", b"test data 1")
+    ] * 3
+    input2 = plugin_manager.get_input_data_source("input2")
+    assert list(plugin_manager.map_paths(_path_and_data, input2, processes=1, fetch=False)) == [
+        ("path/to/data2", None)
+    ]
+    with pytest.raises(ValueError):
+        list(plugin_manager.map_paths(_fail_on_data2, input2, processes=1, fetch=False))
+
+
 def test_unimplemented_store_types(monkeypatch):
     # CCStore Env vars
     monkeypatch.setenv(
@@ -0,0 +1,72 @@
+import io
+import os
+import pytest
+from moto import mock_s3
+import boto3
+from cc_sdk import RangeReader
+
+# pylint: disable=redefined-outer-name
+
+DATA = os.urandom(10 * 1024 + 17)
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "my_access_key")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "my_secret_key")
+    with mock_s3():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="my_bucket")
+        client.put_object(Bucket="my_bucket", Key="data.bin", Body=DATA)
+        yield client
+
+
+def test_read(s3_client):
+    reader = RangeReader(s3_client, "my_bucket", "data.bin", block_size=1024)
+    assert reader.size == len(DATA)
+    assert reader.read(10) == DATA[:10]
+    assert reader.read(2000) == DATA[10:2010]
+    assert reader.tell() == 2010
+    assert reader.read() == DATA[2010:]
+    assert reader.read(1) == b""
+
+
+def test_seek_and_readinto(s3_client):
+    reader = RangeReader(s3_client, "my_bucket", "data.bin", block_size=1024)
+    assert reader.seek(-100, io.SEEK_END) == len(DATA) - 100
+    buffer = bytearray(200)
+    assert reader.readinto(buffer) == 100
+    assert buffer[:100] == DATA[-100:]
+    reader.seek(5000)
+    reader.seek(10, io.SEEK_CUR)
+    assert reader.read(3000) == DATA[5010:8010]
+    with pytest.raises(ValueError):
+        reader.seek(-1)
+
+
+def test_block_cache(s3_client):
+    reader = RangeReader(s3_client, "my_bucket", "data.bin", block_size=1024, max_blocks=4)
+    reader.seek(1500)
+    reader.read(100)
+    assert reader.requests == 1
+    # the same block
+    reader.seek(1100)
+    reader.read(800)
+    assert reader.requests == 1
+    # the cached block 1 and the missing blocks 2 and 3, fetched together
+    reader.seek(1024)
+    assert reader.read(3 * 1024) == DATA[1024:4096]
+    assert reader.requests == 2
+    # blocks 4 to 7 evict blocks 1 to 3
+    reader.seek(4096)
+    reader.read(4 * 1024)
+    assert reader.requests == 3
+    reader.seek(1024)
+    reader.read(10)
+    assert reader.requests == 4
+
+
+def test_buffered(s3_client):
+    reader = io.BufferedReader(RangeReader(s3_client, "my_bucket", "data.bin", block_size=1024))
+    lines = reader.read()
+    assert lines == DATA
@@ -0,0 +1,85 @@
+import gzip
+import io
+import pytest
+from cc_sdk.records import iter_records
+
+
+class TrackedStream(io.BytesIO):
+    """Records the largest read, to check that the stream is never read as a whole"""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.largest_read = 0
+
+    def read(self, size=-1):
+        self.largest_read = max(self.largest_read, len(data := super().read(size)))
+        return data
+
+    def read1(self, size=-1):
+        self.largest_read = max(self.largest_read, len(data := super().read1(size)))
+        return data
+
+
+def test_lines():
+    assert list(iter_records(io.BytesIO(b"a\nb\r\n\nc"))) == ["a", "b", "", "c"]
+
+
+def test_csv():
+    stream = io.BytesIO(b"time,value\n0,1.5\n1,\"2,5\"\n")
+    assert list(iter_records(stream, "series.csv")) == [
+        {"time": "0", "value": "1.5"},
+        {"time": "1", "value": "2,5"},
+    ]
+    stream = io.BytesIO(b"0;1.5\n1;2.5\n")
+    assert list(iter_records(stream, format="csv", header=False, delimiter=";")) == [["0", "1.5"], ["1", "2.5"]]
+
+
+def test_jsonl():
+    stream = io.BytesIO(b'{"a": 1}\n\n[1, 2]\n"x"\n')
+    assert list(iter_records(stream, "values.jsonl")) == [{"a": 1}, [1, 2], "x"]
+
+
+def test_gzip_streamed():
+    data = b"".join(b'{"row": %d}\n' % i for i in range(100000))
+    stream = TrackedStream(gzip.compress(data))
+    records = iter_records(stream, "values.jsonl.gz")
+    assert next(records) == {"row": 0}
+    # decoding started before the stream was read
+    assert stream.tell() < len(stream.getvalue())
+    assert sum(1 for _ in records) == 99999
+    assert stream.largest_read < len(data) // 10
+    assert stream.closed
+
+
+def test_zstd():
+    zstandard = pytest.importorskip("zstandard")
+    stream = io.BytesIO(zstandard.ZstdCompressor().compress(b"a\nb\n"))
+    assert list(iter_records(stream, "lines.txt.zst")) == ["a", "b"]
+
+
+def test_batches():
+    stream = io.BytesIO(b"".join(b"%d\n" % i for i in range(7)))
+    assert list(iter_records(stream, batch_size=3)) == [["0", "1", "2"], ["3", "4", "5"], ["6"]]
+
+
+def test_opened_lazily():
+    streams = []
+
+    def open_stream():
+        streams.append(io.BytesIO(b"a\nb\n"))
+        return streams[-1]
+
+    records = iter_records(open_stream, "lines.txt")
+    # an iterator that is never started opens nothing
+    assert not streams
+    assert list(records) == ["a", "b"]
+    assert len(streams) == 1 and streams[0].closed
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        iter_records(io.BytesIO(b""), format="parquet")
+    with pytest.raises(ValueError):
+        iter_records(io.BytesIO(b""), compression="bz2")
+    with pytest.raises(ValueError):
+        iter_records(io.BytesIO(b""), batch_size=0)
@@ -0,0 +1,133 @@
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+import pytest
+from cc_sdk.shared_memory_cache import SharedMemoryCache
+
+# pylint: disable=redefined-outer-name,protected-access
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork and fcntl")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    the_cache = SharedMemoryCache(f"cc_sdk_test_{uuid.uuid4().hex[:8]}", str(tmp_path))
+    yield the_cache
+    the_cache.close()
+
+
+def _segment_exists(name):
+    return os.path.exists(os.path.join("/dev/shm", name))
+
+
+def _read_in_child(cache, key, connection):
+    def fetch():
+        raise AssertionError("the object is already in shared memory")
+
+    view = cache.get(key, fetch)
+    connection.send((bytes(view), len(cache._read_index()[key]["holders"])))
+    view.release()
+    cache.release(key)
+    connection.close()
+
+
+def test_get(cache):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return b"shared data"
+
+    view = cache.get("bucket/key", fetch)
+    assert bytes(view) == b"shared data"
+    assert view.readonly
+    # got again without a download
+    assert bytes(cache.get("bucket/key", fetch)) == b"shared data"
+    assert calls == [1]
+    assert bytes(cache.get("bucket/empty", lambda: b"")) == b""
+
+
+def test_get_from_another_process(cache):
+    view = cache.get("bucket/key", lambda: b"shared data")
+    name = cache._read_index()["bucket/key"]["name"]
+    parent_connection, child_connection = multiprocessing.get_context("fork").Pipe()
+    child = multiprocessing.get_context("fork").Process(
+        target=_read_in_child, args=(cache, "bucket/key", child_connection)
+    )
+    child.start()
+    # the child attached to the segment, and both processes held it
+    assert parent_connection.recv() == (b"shared data", 2)
+    child.join()
+    assert child.exitcode == 0
+    assert cache._read_index()["bucket/key"]["holders"] == [cache._holder]
+    assert _segment_exists(name)
+    view.release()
+    cache.release("bucket/key")
+    # the last holder unlinks the segment
+    assert not _segment_exists(name)
+    assert "bucket/key" not in cache._read_index()
+    with pytest.raises(KeyError):
+        cache.release("bucket/key")
+
+
+def test_release_counts_the_gets(cache):
+    view = cache.get("bucket/key", lambda: b"shared data")
+    name = cache._read_index()["bucket/key"]["name"]
+    other_view = cache.get("bucket/key", lambda: b"shared data")
+    other_view.release()
+    cache.release("bucket/key")
+    # the first get still holds the object
+    assert bytes(view) == b"shared data"
+    assert _segment_exists(name)
+    view.release()
+    cache.release("bucket/key")
+    assert not _segment_exists(name)
+    assert "bucket/key" not in cache._read_index()
+
+
+def test_exited_holders_are_dropped(cache):
+    view = cache.get("bucket/key", lambda: b"shared data")
+    name = cache._read_index()["bucket/key"]["name"]
+    view.release()
+    # pretend this cache's process exited without releasing the object: its holder file is no longer locked
+    cache._attached.pop("bucket/key")[0].close()
+    holder_path = cache._holder_path(cache._holder)
+    cache._holder_file.close()
+    cache._holder_file = None
+    cache._holder = uuid.uuid4().hex
+    assert "bucket/key" not in cache._read_index()
+    assert not _segment_exists(name)
+    assert not os.path.exists(holder_path)
+
+
+def test_holders_in_other_processes_are_alive(cache):
+    view = cache.get("bucket/key", lambda: b"shared data")
+    other = SharedMemoryCache(cache.namespace, cache.directory)
+    # the holder of another cache is checked through its lock file, not a process id
+    assert bytes(other.get("bucket/key", lambda: b"")) == b"shared data"
+    assert other._is_holding(cache._holder)
+    assert not other._is_holding(uuid.uuid4().hex)
+    other.close()
+    assert cache._read_index()["bucket/key"]["holders"] == [cache._holder]
+    view.release()
+
+
+def test_fetches_of_other_keys_run_concurrently(cache):
+    started = threading.Event()
+    finished = threading.Event()
+
+    def slow_fetch():
+        started.set()
+        assert finished.wait(5)
+        return b"slow"
+
+    thread = threading.Thread(target=lambda: cache.get("bucket/slow", slow_fetch))
+    thread.start()
+    assert started.wait(5)
+    # not blocked by the download of the other key
+    assert bytes(cache.get("bucket/fast", lambda: b"fast")) == b"fast"
+    finished.set()
+    thread.join()
+    assert bytes(cache.get("bucket/slow", slow_fetch)) == b"slow"
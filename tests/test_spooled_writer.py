@@ -0,0 +1,65 @@
+import io
+import pytest
+from cc_sdk import SpooledWriter
+
+
+def test_publish_on_close(memory_store):
+    store = memory_store
+    writer = SpooledWriter(store, "out.bin")
+    assert writer.write(b"Hello, ") == 7
+    writer.write(memoryview(b"world!"))
+    assert writer.tell() == 13
+    assert "out.bin" not in store.files
+    writer.close()
+    assert store.files["out.bin"] == b"Hello, world!"
+    assert not writer.spilled
+    assert isinstance(store.streams[0], io.BytesIO)
+    # closing again does not publish again
+    writer.close()
+    assert len(store.streams) == 1
+
+
+def test_spill_to_temporary_file(tmp_path, memory_store):
+    store = memory_store
+    with SpooledWriter(store, "out.bin", max_memory=10, directory=str(tmp_path)) as writer:
+        writer.write(b"0123456")
+        assert not writer.spilled
+        writer.write(b"789abc")
+        assert writer.spilled
+        writer.write(b"def")
+    assert store.files["out.bin"] == b"0123456789abcdef"
+    assert not isinstance(store.streams[0], io.BytesIO)
+
+
+def test_discard_on_exception(memory_store):
+    store = memory_store
+    with pytest.raises(KeyError):
+        with SpooledWriter(store, "out.bin") as writer:
+            writer.write(b"partial")
+            raise KeyError("failed")
+    assert writer.closed
+    assert not store.files
+
+
+def test_discard_on_garbage_collection(memory_store):
+    store = memory_store
+    writer = SpooledWriter(store, "out.bin")
+    writer.write(b"partial")
+    del writer
+    assert not store.files
+
+
+def test_write_after_close(memory_store):
+    writer = SpooledWriter(memory_store, "out.bin")
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.write(b"late")
+
+
+def test_rejected_output(memory_store):
+    memory_store.accept = False
+    writer = SpooledWriter(memory_store, "out.bin")
+    writer.write(b"data")
+    with pytest.raises(IOError):
+        writer.close()
+    assert writer.closed
@@ -0,0 +1,102 @@
+import io
+import os
+import pytest
+from cc_sdk import AWSConfig, CCStoreS3, PluginManager, environment_variables
+from cc_sdk.zygote import run_zygote
+
+# pylint: disable=redefined-outer-name,protected-access
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+
+@pytest.fixture
+def s3_client():
+    config = AWSConfig(
+        aws_access_key_id="zygote_key",
+        aws_secret_access_key_id="zygote_secret",
+        aws_region="us-east-1",
+        aws_bucket="zygote_bucket",
+    )
+    client = CCStoreS3.get_s3_client(config)
+    # a pooled connection the children must not share, no request is made
+    client._endpoint.http_session._manager.connection_from_url("https://example.com")
+    return client
+
+
+def test_run_zygote(tmp_path, s3_client, monkeypatch):
+    monkeypatch.setattr(PluginManager, "_instance", object())
+    pools = s3_client._endpoint.http_session._manager.pools
+
+    def handler(event):
+        if event == 3:
+            raise ValueError("event 3 fails")
+        state = (
+            os.getenv(environment_variables.CC_EVENT_NUMBER),
+            PluginManager._instance is None,
+            len(pools),
+            CCStoreS3.get_s3_client(
+                AWSConfig(
+                    aws_access_key_id="zygote_key",
+                    aws_secret_access_key_id="zygote_secret",
+                    aws_region="us-east-1",
+                    aws_bucket="zygote_bucket",
+                )
+            )
+            is s3_client,
+        )
+        (tmp_path / str(event)).write_text(repr(state))
+
+    exit_codes = run_zygote(handler, range(1, 6), max_children=2)
+    assert exit_codes == {1: 0, 2: 0, 3: 1, 4: 0, 5: 0}
+    for event in (1, 2, 4, 5):
+        # children get the event number, a reset PluginManager and empty pools on the zygote's clients
+        assert (tmp_path / str(event)).read_text() == repr((str(event), True, 0, True))
+    assert not (tmp_path / "3").exists()
+    # the zygote itself is untouched
+    assert PluginManager._instance is not None
+    assert len(pools) == 1
+
+
+def test_run_zygote_handler_name(monkeypatch, capfd):
+    monkeypatch.setattr("sys.stdin", io.StringIO("7\n\n8\n"))
+    assert run_zygote("builtins:print") == {7: 0, 8: 0}
+    assert capfd.readouterr().out.split() == ["7", "8"]
+
+
+def test_run_zygote_malformed_line(monkeypatch, capfd):
+    monkeypatch.setattr("sys.stdin", io.StringIO("7\nseven\n8\n"))
+    assert run_zygote("builtins:print") == {7: 0, 8: 0}
+    out, err = capfd.readouterr()
+    assert out.split() == ["7", "8"]
+    assert "'seven'" in err
+
+
+def test_run_zygote_reaps_children_on_failure(monkeypatch):
+    pids = []
+    fork = os.fork
+
+    def recording_fork():
+        pid = fork()
+        pids.append(pid)
+        return pid
+
+    def events():
+        yield 7
+        raise RuntimeError("no more events")
+
+    monkeypatch.setattr(os, "fork", recording_fork)
+    with pytest.raises(RuntimeError):
+        run_zygote(lambda event: None, events())
+    # the child of event 7 was waited for
+    with pytest.raises(ChildProcessError):
+        os.waitpid(pids[0], os.WNOHANG)
+
+
+def test_other_forks_keep_the_plugin_manager(monkeypatch):
+    instance = object()
+    monkeypatch.setattr(PluginManager, "_instance", instance)
+    pid = os.fork()
+    if pid == 0:
+        # e.g. a worker of the plugin's own process pool
+        os._exit(0 if PluginManager._instance is instance else 1)
+    assert os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1]) == 0